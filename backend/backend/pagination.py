@@ -0,0 +1,36 @@
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import CursorPagination
+
+# ---------------------------
+# PAGINACIÓN POR CURSOR (KEYSET)
+# ---------------------------
+class CursorOrdenadoPagination(CursorPagination):
+    """
+    Paginación por cursor usada por defecto en todos los ViewSets.
+
+    El orden se toma, en este orden de prioridad, de:
+      1. el atributo `ordering` de la vista,
+      2. el order_by explícito del queryset,
+      3. Meta.ordering del modelo (p. ej. '-fecha' en HistorialStock),
+      4. la clave primaria descendente.
+    La primera columna del orden es la que se codifica en el cursor, así que
+    conviene que esté indexada: así la página N cuesta lo mismo que la página 1.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        filtros = getattr(view, 'filter_backends', None) or []
+        if any(issubclass(filtro, OrderingFilter) for filtro in filtros):
+            return super().get_ordering(request, queryset, view)
+
+        ordering = (
+            getattr(view, 'ordering', None)
+            or queryset.query.order_by
+            or queryset.model._meta.ordering
+            or ('-%s' % queryset.model._meta.pk.attname,)
+        )
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
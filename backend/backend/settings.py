@@ -28,6 +28,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     
     'carrito_app',
+    'comun_app',
     'finanzas_app',
     'geografia_app',
     'integraciones_app',
@@ -82,10 +83,66 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Las transacciones toman el bloqueo de escritura al empezar: evita
+            # errores "database is locked" entre reservas de stock concurrentes
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Respuestas de productos y categorías. LocMemCache expulsa por LRU al
+    # superar MAX_ENTRIES; en producción puede usarse FileBasedCache o Redis.
+    'catalogo': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'catalogo',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    },
+}
+
+CATALOGO_CACHE_ALIAS = 'catalogo'
+CATALOGO_CACHE_TIMEOUT = 300
+
+# Meses de HistorialStock que quedan en la tabla principal; los anteriores se
+# mueven a historial_stock_archivado con el comando archivar_historial
+HISTORIAL_STOCK_MESES_ACTIVOS = 6
+# Los snapshots de stock se toman a lo más hasta ahora menos este margen
+# (segundos): debe superar la transacción más larga que escribe HistorialStock
+SNAPSHOT_STOCK_MARGEN_SEGUNDOS = 900
+
+# Horas que se guarda la respuesta de una solicitud con Idempotency-Key; las
+# claves vencidas se borran con el comando purgar_idempotencia
+IDEMPOTENCIA_HORAS = 24
+# Segundos tras los que una clave que quedó "en proceso" (p. ej. el proceso
+# murió a mitad de la solicitud) puede volver a tomarse
+IDEMPOTENCIA_BLOQUEO_SEGUNDOS = 60
+
+# Cada cuántos segundos el índice de autocompletar de un proceso compara su
+# versión con la de Producto en VersionTabla (cambios hechos por otros procesos)
+AUTOCOMPLETAR_VERIFICAR_SEGUNDOS = 5
+
+# Cola de tareas en base de datos (comun_app.cola, comando run_worker)
+# Segundos que una tarea reclamada puede estar en proceso antes de que otro
+# trabajador la considere abandonada y la devuelva a la cola
+COLA_TAREAS_BLOQUEO_SEGUNDOS = 300
+# Espera antes del primer reintento de una tarea fallida; se duplica en cada
+# intento hasta COLA_TAREAS_ESPERA_MAXIMA (segundos)
+COLA_TAREAS_ESPERA_BASE = 10
+COLA_TAREAS_ESPERA_MAXIMA = 3600
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -129,3 +186,16 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Modelo de Usuario Personalizado
 AUTH_USER_MODEL = 'usuarios_app.Usuario'
+
+# Django REST Framework
+REST_FRAMEWORK = {
+    # Paginación por cursor en todos los listados: respuestas de tamaño acotado
+    # sin importar el tamaño de la tabla (ver backend/pagination.py)
+    'DEFAULT_PAGINATION_CLASS': 'backend.pagination.CursorOrdenadoPagination',
+    'PAGE_SIZE': 50,
+    # Igual que JSONRenderer, pero codificado con orjson (requirements.txt); sin él cae al estándar
+    'DEFAULT_RENDERER_CLASSES': [
+        'comun_app.api.renderers.JSONRapidoRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# Índice de autocompletar en memoria: se construye al arrancar, no en la primera consulta
+from productos_app.autocompletar import indice as indice_autocompletar  # noqa: E402
+
+indice_autocompletar.precargar()
@@ -1,10 +1,15 @@
 from rest_framework import serializers
 from carrito_app.models import Carrito, CarritoProducto
+from pagos_app.models import MetodoPago
+from pedidos_app.models import TipoEntrega
 
 # ---------------------------
 # CARRITO DE COMPRAS
 # ---------------------------
 class CarritoProductoSerializer(serializers.ModelSerializer): # Definir antes de CarritoSerializer si se anida
+    # Anotado por las vistas desde la tabla precio_efectivo según la cantidad de la línea
+    precio_unitario = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+
     class Meta:
         model = CarritoProducto
         fields = '__all__'
@@ -13,4 +18,12 @@ class CarritoSerializer(serializers.ModelSerializer):
     items = CarritoProductoSerializer(many=True, read_only=True)
     class Meta:
         model = Carrito
-        fields = ['id', 'cliente', 'fecha_creacion', 'fecha_actualizacion', 'items']
\ No newline at end of file
+        fields = ['id', 'cliente', 'fecha_creacion', 'fecha_actualizacion', 'items']
+
+
+# ---------------------------
+# CHECKOUT
+# ---------------------------
+class CheckoutSerializer(serializers.Serializer):
+    tipo_entrega = serializers.PrimaryKeyRelatedField(queryset=TipoEntrega.objects.all())
+    metodo_pago = serializers.PrimaryKeyRelatedField(queryset=MetodoPago.objects.all())
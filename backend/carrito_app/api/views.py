@@ -1,16 +1,51 @@
-from rest_framework import viewsets, permissions
-from carrito_app.models import Carrito, CarritoProducto
-from .serializers import CarritoSerializer, CarritoProductoSerializer
+from django.db.models import Prefetch
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from carrito_app.checkout import CarritoVacio, checkout, items_con_precio
+from carrito_app.models import Carrito
+from comun_app.idempotencia import responder_idempotente
+from inventario_app.reservas import StockInsuficiente
+from pedidos_app.api.serializers import PedidoSerializer
+from .serializers import CarritoSerializer, CarritoProductoSerializer, CheckoutSerializer
 
 # ---------------------------
 # CARRITO DE COMPRAS
 # ---------------------------
 class CarritoViewSet(viewsets.ModelViewSet):
-    queryset = Carrito.objects.all()
+    queryset = Carrito.objects.prefetch_related(Prefetch('items', queryset=items_con_precio()))
     serializer_class = CarritoSerializer
     permission_classes = [permissions.IsAuthenticated] # Solo el dueño del carrito
 
+    @action(detail=True, methods=['post'])
+    def checkout(self, request, pk=None):
+        """
+        Convierte el carrito en un pedido en una sola transacción: precios
+        efectivos, detalles, asignación de bodegas, reserva de stock y vaciado
+        del carrito. Cuerpo: {"tipo_entrega": 1, "metodo_pago": 2}.
+        Responde 409 con las líneas faltantes si no hay stock suficiente.
+        Acepta Idempotency-Key: un reintento recibe el pedido ya creado.
+        """
+        return responder_idempotente(request, lambda: self._checkout(request, pk))
+
+    def _checkout(self, request, pk):
+        serializer = CheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            # Solo el carrito propio: Cliente.pk es el id del usuario
+            pedido, _ = checkout(
+                pk, serializer.validated_data['tipo_entrega'].pk, serializer.validated_data['metodo_pago'].pk,
+                cliente_id=request.user.pk,
+            )
+        except Carrito.DoesNotExist:
+            return Response({'detail': "Carrito no encontrado"}, status=status.HTTP_404_NOT_FOUND)
+        except CarritoVacio as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except StockInsuficiente as exc:
+            return Response({'detail': str(exc), 'faltantes': exc.faltantes}, status=status.HTTP_409_CONFLICT)
+        return Response(PedidoSerializer(pedido).data, status=status.HTTP_201_CREATED)
+
 class CarritoProductoViewSet(viewsets.ModelViewSet):
-    queryset = CarritoProducto.objects.all()
+    queryset = items_con_precio()
     serializer_class = CarritoProductoSerializer
-    permission_classes = [permissions.IsAuthenticated] # Solo el dueño del carrito
\ No newline at end of file
+    permission_classes = [permissions.IsAuthenticated] # Solo el dueño del carrito
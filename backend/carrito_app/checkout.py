@@ -0,0 +1,87 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+
+from carrito_app.models import Carrito, CarritoProducto
+from inventario_app.reservas import StockInsuficiente
+from marketing_app.precios import CENTAVO, precio_efectivo_subquery
+from pedidos_app.asignacion import Linea, PedidoPendiente, asignar_pedidos
+from pedidos_app.carga import programar_asignacion
+from pedidos_app.estados import PENDIENTE
+from pedidos_app.models import DetallePedido, EstadoPedido, Pedido
+from pedidos_app.resumen_ventas import actualizar_resumen
+
+# ---------------------------
+# CHECKOUT: CARRITO -> PEDIDO
+# ---------------------------
+# En una transacción y con un número de consultas que no depende de las líneas:
+#   1. bloquea el carrito (dos checkouts del mismo carrito no crean dos pedidos);
+#   2. lee las líneas con su precio efectivo para la cantidad en una consulta;
+#   3. crea el Pedido con el total ya calculado y los DetallePedido con
+#      bulk_create (subtotal precalculado, sin un save() por línea);
+#   4. asigna bodegas y reserva el stock (pedidos_app.asignacion); si algo no
+#      alcanza se lanza StockInsuficiente y no queda nada escrito;
+#   5. suma el pedido al resumen diario de ventas y vacía el carrito;
+#   6. programa la asignación de vendedor y bodeguero (una sola tarea
+#      pedidos.asignar_personal pendiente para todos los pedidos nuevos).
+
+ESTADO_INICIAL = PENDIENTE
+
+
+class CarritoVacio(Exception):
+    pass
+
+
+def items_con_precio():
+    """CarritoProducto anotado con `precio_unitario`: el precio efectivo para la cantidad de la línea."""
+    return CarritoProducto.objects.annotate(
+        precio_unitario=Coalesce(precio_efectivo_subquery('producto', 'cantidad'), F('producto__precio'))
+    )
+
+
+def checkout(carrito_id, tipo_entrega_id, metodo_pago_id, motivo='Checkout', cliente_id=None):
+    """
+    Convierte el carrito en un Pedido y devuelve (pedido, ResultadoAsignacion).
+    Con `cliente_id` solo acepta un carrito de ese cliente. Lanza
+    Carrito.DoesNotExist, CarritoVacio o StockInsuficiente.
+    """
+    carritos = Carrito.objects.select_for_update().filter(pk=carrito_id)
+    if cliente_id is not None:
+        carritos = carritos.filter(cliente_id=cliente_id)
+    with transaction.atomic():
+        cliente_id, region_id = carritos.values_list(
+            'cliente_id', 'cliente__comuna__region_id'
+        ).get()
+        lineas = list(
+            items_con_precio().filter(carrito_id=carrito_id).order_by('producto_id').values_list(
+                'producto_id', 'cantidad', 'precio_unitario'
+            )
+        )
+        if not lineas:
+            raise CarritoVacio("El carrito no tiene productos")
+
+        subtotales = [(Decimal(cantidad) * precio).quantize(CENTAVO) for _, cantidad, precio in lineas]
+        estado, _ = EstadoPedido.objects.get_or_create(nombre_estado=ESTADO_INICIAL)
+        pedido = Pedido.objects.create(
+            cliente_id=cliente_id, estado_pedido=estado, tipo_entrega_id=tipo_entrega_id,
+            metodo_pago_id=metodo_pago_id, total=sum(subtotales),
+        )
+        detalles = DetallePedido.objects.bulk_create(
+            DetallePedido(pedido=pedido, producto_id=producto_id, cantidad=cantidad,
+                          precio_unitario=precio, subtotal=subtotal)
+            for (producto_id, cantidad, precio), subtotal in zip(lineas, subtotales)
+        )
+
+        pendiente = PedidoPendiente(pedido.pk, region_id, [
+            Linea(detalle.pk, detalle.producto_id, detalle.cantidad) for detalle in detalles
+        ])
+        resultado, = asignar_pedidos([pendiente], motivo=motivo)
+        if resultado.faltantes:
+            raise StockInsuficiente(resultado.faltantes)
+
+        actualizar_resumen([pedido.pk])
+        CarritoProducto.objects.filter(carrito_id=carrito_id).delete()
+        programar_asignacion()
+    return pedido, resultado
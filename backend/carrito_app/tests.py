@@ -1,3 +1,112 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from carrito_app.models import Carrito, CarritoProducto
+from comun_app.models import Tarea
+from inventario_app.models import HistorialStock, Inventario
+from marketing_app.models import ProductoPromocion, Promocion
+from pedidos_app.carga import programar_asignacion
+from pedidos_app.models import AsignacionDetalle, DetallePedido, Pedido
+from pedidos_app.tests import PedidosTestMixin
+
+
+class CheckoutTests(PedidosTestMixin, TestCase):
+    def setUp(self):
+        self.crear_datos_base()
+        self.bodega = self.crear_bodega('Santiago Centro', self.comuna_santiago)
+        self.carrito = Carrito.objects.create(cliente=self.cliente)
+        self.client = APIClient()
+        self.client.force_authenticate(self.cliente.usuario)
+        self.url = f'/api/carrito/carritos/{self.carrito.pk}/checkout/'
+
+    def agregar(self, producto, cantidad, stock):
+        Inventario.objects.create(producto=producto, bodega=self.bodega, cantidad=stock)
+        CarritoProducto.objects.create(carrito=self.carrito, producto=producto, cantidad=cantidad)
+
+    def comprar(self, **encabezados):
+        return self.client.post(self.url, {'tipo_entrega': self.tipo_entrega.pk, 'metodo_pago': self.metodo_pago.pk},
+                                format='json', **encabezados)
+
+    def test_carrito_ajeno_responde_404(self):
+        self.agregar(self.crear_producto('TAL'), 1, stock=3)
+        self.client.force_authenticate(self.crear_cliente('intruso', self.comuna_santiago).usuario)
+        self.assertEqual(self.comprar().status_code, 404)
+        self.assertFalse(Pedido.objects.exists())
+        self.assertTrue(CarritoProducto.objects.filter(carrito=self.carrito).exists())
+
+    def test_crea_pedido_reserva_stock_y_vacia_carrito(self):
+        taladro = self.crear_producto('TAL', precio='30000.00')
+        broca = self.crear_producto('BRO', precio='1500.00')
+        promocion = Promocion.objects.create(
+            descripcion='10% desde 5', porcentaje_descuento=10, cantidad_minima_productos=5,
+            fecha_inicio=timezone.now() - timedelta(days=1), fecha_fin=timezone.now() + timedelta(days=1),
+        )
+        ProductoPromocion.objects.create(producto=broca, promocion=promocion)
+        self.agregar(taladro, 1, stock=3)
+        self.agregar(broca, 6, stock=10)
+
+        response = self.comprar()
+        self.assertEqual(response.status_code, 201)
+        pedido = Pedido.objects.get(pk=response.data['id'])
+        self.assertEqual(pedido.estado_pedido.nombre_estado, 'Pendiente')
+        self.assertEqual(sorted(pedido.detalles.values_list('producto_id', 'precio_unitario', 'subtotal')), [
+            (taladro.pk, Decimal('30000.00'), Decimal('30000.00')),
+            (broca.pk, Decimal('1350.00'), Decimal('8100.00')),
+        ])
+        self.assertEqual(pedido.total, Decimal('38100.00'))
+        self.assertEqual(AsignacionDetalle.objects.filter(detalle__pedido=pedido).count(), 2)
+        self.assertEqual(Inventario.objects.get(producto=broca).cantidad, 4)
+        self.assertFalse(CarritoProducto.objects.filter(carrito=self.carrito).exists())
+        # El personal se asigna en un trabajador; otro checkout reutiliza la misma tarea pendiente
+        self.assertEqual(Tarea.objects.values_list('nombre', 'argumentos').get(), ('pedidos.asignar_personal', {}))
+        self.agregar(self.crear_producto('LIJ'), 1, stock=3)
+        self.assertEqual(self.comprar().status_code, 201)
+        self.assertEqual(Tarea.objects.count(), 1)
+
+    def test_sin_stock_no_escribe_nada(self):
+        clavo = self.crear_producto('CLA')
+        self.agregar(self.crear_producto('MAR'), 1, stock=5)
+        self.agregar(clavo, 8, stock=2)
+
+        response = self.comprar()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['faltantes'][0]['producto_id'], clavo.pk)
+        self.assertFalse(Pedido.objects.exists())
+        self.assertFalse(HistorialStock.objects.exists())
+        self.assertFalse(Tarea.objects.exists())
+        self.assertEqual(CarritoProducto.objects.filter(carrito=self.carrito).count(), 2)
+
+    def test_carrito_vacio(self):
+        self.assertEqual(self.comprar().status_code, 400)
+        self.assertEqual(self.client.post('/api/carrito/carritos/999/checkout/', {
+            'tipo_entrega': self.tipo_entrega.pk, 'metodo_pago': self.metodo_pago.pk,
+        }, format='json').status_code, 404)
+
+    def test_consultas_no_dependen_de_las_lineas(self):
+        programar_asignacion()  # ambas mediciones reutilizan la tarea pendiente
+
+        def consultas(lineas):
+            for indice in range(lineas):
+                self.agregar(self.crear_producto(f'P{lineas}-{indice}'), 2, stock=10)
+            with CaptureQueriesContext(connection) as contexto:
+                self.assertEqual(self.comprar().status_code, 201)
+            return len(contexto.captured_queries)
+
+        self.assertEqual(consultas(2), consultas(50))
+        self.assertEqual(DetallePedido.objects.count(), 52)
 
-# Create your tests here.
+    def test_reintento_con_idempotency_key_no_repite_el_checkout(self):
+        martillo = self.crear_producto('MAR')
+        self.agregar(martillo, 2, stock=10)
+        primera = self.comprar(HTTP_IDEMPOTENCY_KEY='checkout-1')
+        segunda = self.comprar(HTTP_IDEMPOTENCY_KEY='checkout-1')
+        self.assertEqual((primera.status_code, segunda.status_code), (201, 201))
+        self.assertEqual(segunda.data['id'], primera.data['id'])
+        self.assertEqual(Pedido.objects.count(), 1)
+        self.assertEqual(Inventario.objects.get(producto=martillo).cantidad, 8)
@@ -0,0 +1,19 @@
+from django.contrib import admin
+from .models import ClaveIdempotencia, Tarea, VersionTabla
+
+@admin.register(VersionTabla)
+class VersionTablaAdmin(admin.ModelAdmin):
+    list_display = ('tabla', 'version', 'fecha_modificacion')
+    search_fields = ('tabla',)
+
+@admin.register(ClaveIdempotencia)
+class ClaveIdempotenciaAdmin(admin.ModelAdmin):
+    list_display = ('clave', 'usuario', 'estado', 'codigo_respuesta', 'fecha_creacion', 'fecha_expiracion')
+    search_fields = ('clave',)
+    list_filter = ('estado',)
+
+@admin.register(Tarea)
+class TareaAdmin(admin.ModelAdmin):
+    list_display = ('nombre', 'cola', 'estado', 'prioridad', 'intentos', 'ejecutar_desde', 'trabajador')
+    search_fields = ('nombre', 'trabajador')
+    list_filter = ('estado', 'cola')
@@ -0,0 +1,16 @@
+from rest_framework import serializers
+
+# ---------------------------
+# CAMPOS COMUNES DE SERIALIZERS
+# ---------------------------
+class ListaSeparadaPorComasField(serializers.CharField):
+    """Acepta 'a,b,c' y devuelve ['a', 'b', 'c']."""
+    def __init__(self, child=None, **kwargs):
+        self.child = child
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        valores = [v.strip() for v in super().to_internal_value(data).split(',') if v.strip()]
+        if self.child is not None:
+            valores = [self.child.run_validation(v) for v in valores]
+        return valores
@@ -0,0 +1,77 @@
+import hashlib
+
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from comun_app.idempotencia import responder_idempotente
+from comun_app.versiones import obtener_versiones
+
+# ---------------------------
+# GET CONDICIONAL (ETag / Last-Modified)
+# ---------------------------
+class ConsultaCondicionalMixin:
+    """
+    Agrega ETag y Last-Modified a list/retrieve a partir de las versiones de
+    `condicional_modelos`, y responde 304 sin serializar cuando el cliente ya
+    tiene la representación vigente (If-None-Match / If-Modified-Since).
+
+    `condicional_modelos` debe incluir todos los modelos que aparecen en la
+    respuesta (p. ej. Comuna y Region si la comuna anida su región), y cada uno
+    debe estar registrado con comun_app.versiones.registrar_modelos().
+    """
+    condicional_modelos = ()
+
+    def list(self, request, *args, **kwargs):
+        return self._responder_condicional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._responder_condicional(super().retrieve, request, *args, **kwargs)
+
+    def _validadores(self, request):
+        versiones = obtener_versiones(self.condicional_modelos)
+        huella = '|'.join(f'{tabla}:{version}' for tabla, (version, _) in sorted(versiones.items()))
+        # La misma URL puede renderizarse como JSON o como API navegable
+        huella += f'|{request.get_full_path()}|{request.accepted_media_type}'
+        etag = '"%s"' % hashlib.sha1(huella.encode('utf-8')).hexdigest()
+        fechas = [fecha for _, fecha in versiones.values() if fecha is not None]
+        return etag, max(fechas) if fechas else None
+
+    def _no_modificado(self, request, etag, ultima_modificacion):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            return '*' in etags or etag in [e.removeprefix('W/') for e in etags]
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        if if_modified_since is not None and ultima_modificacion is not None:
+            return int(ultima_modificacion.timestamp()) <= if_modified_since
+        return False
+
+    def _responder_condicional(self, generar, request, *args, **kwargs):
+        etag, ultima_modificacion = self._validadores(request)
+        if self._no_modificado(request, etag, ultima_modificacion):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = generar(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response['ETag'] = etag
+        if ultima_modificacion is not None:
+            response['Last-Modified'] = http_date(ultima_modificacion.timestamp())
+        # Obliga a revalidar siempre: la respuesta es barata si no hubo cambios
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+# ---------------------------
+# CREACIÓN IDEMPOTENTE (Idempotency-Key)
+# ---------------------------
+class IdempotenciaMixin:
+    """
+    create() acepta el encabezado Idempotency-Key: un reintento con la misma
+    clave recibe la respuesta guardada sin volver a crear nada (ver
+    comun_app.idempotencia). Para acciones propias, usar responder_idempotente().
+    """
+
+    def create(self, request, *args, **kwargs):
+        return responder_idempotente(request, lambda: super(IdempotenciaMixin, self).create(request, *args, **kwargs))
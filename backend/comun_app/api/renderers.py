@@ -0,0 +1,33 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional; sin él se usa el renderer estándar
+    orjson = None
+else:
+    OPCIONES_ORJSON = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+# ---------------------------
+# RENDERER JSON RÁPIDO
+# ---------------------------
+class JSONRapidoRenderer(JSONRenderer):
+    """
+    Mismo contrato y salida que JSONRenderer (JSON compacto en UTF-8), pero
+    codificado con orjson cuando está instalado. Los tipos que orjson no conoce
+    (Decimal, textos traducibles, querysets...) se delegan al encoder de DRF.
+    Si el cliente pide indentación (`Accept: application/json; indent=4`) o
+    orjson no está disponible, se usa JSONRenderer sin cambios.
+    """
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            return orjson.dumps(data, default=self._encoder.default, option=OPCIONES_ORJSON)
+        except orjson.JSONEncodeError:
+            # Casos fuera del alcance de orjson (p. ej. enteros de más de 64 bits)
+            return super().render(data, accepted_media_type, renderer_context)
@@ -0,0 +1,154 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# ---------------------------
+# SERIALIZACIÓN RÁPIDA DE LISTADOS
+# ---------------------------
+# Para listados grandes, construir instancias de modelo y recorrer la maquinaria
+# de campos de DRF por cada fila domina el tiempo de CPU. Este camino lee las
+# filas con .values() y las convierte con funciones precompiladas por serializer,
+# produciendo exactamente el mismo JSON que el ModelSerializer.
+
+# Campos cuyo to_representation no transforma valores ya leídos de la base
+CAMPOS_IDENTIDAD = (
+    serializers.IntegerField, serializers.BooleanField, serializers.JSONField, serializers.FloatField,
+)
+# Campos que transforman el valor (formato de decimales, fechas, etc.): se usa su propio to_representation
+CAMPOS_CONVERTIDOS = (
+    serializers.DecimalField, serializers.DateField, serializers.TimeField,
+    serializers.DurationField, serializers.UUIDField, serializers.CharField, serializers.ChoiceField,
+)
+
+
+def _identidad(valor):
+    return valor
+
+
+def _convertidor(campo):
+    representar = campo.to_representation
+
+    def convertir(valor):
+        return None if valor is None else representar(valor)
+    return convertir
+
+
+def _convertidor_fecha_hora(campo, zona):
+    """
+    Igual que DateTimeField.to_representation en formato ISO 8601, pero con la
+    zona horaria ya resuelta para todo el listado en lugar de en cada fila.
+    """
+    formato = getattr(campo, 'format', api_settings.DATETIME_FORMAT)
+    if zona is None or hasattr(campo, 'timezone') or formato is None or formato.lower() != ISO_8601:
+        return _convertidor(campo)
+    representar = campo.to_representation
+
+    def convertir(valor):
+        if valor is None:
+            return None
+        if valor.tzinfo is None:
+            return representar(valor)
+        texto = valor.astimezone(zona).isoformat()
+        return texto[:-6] + 'Z' if texto.endswith('+00:00') else texto
+    return convertir
+
+
+class PlanSerializacion:
+    """
+    Columnas a leer con .values() y, por campo del serializer, la columna de
+    origen y el convertidor a usar. Los campos de fecha y hora se preparan en
+    cada listado porque dependen de la zona horaria activa.
+    """
+
+    def __init__(self, columnas, pasos, campos_fecha_hora):
+        self.columnas = columnas
+        self.pasos = pasos
+        self.campos_fecha_hora = campos_fecha_hora
+
+    def convertir_filas(self, filas):
+        zona = timezone.get_current_timezone() if settings.USE_TZ else None
+        pasos = [
+            (nombre, columna, _convertidor_fecha_hora(self.campos_fecha_hora[nombre], zona)
+             if nombre in self.campos_fecha_hora else convertir)
+            for nombre, columna, convertir in self.pasos
+        ]
+        return [{nombre: convertir(fila[columna]) for nombre, columna, convertir in pasos} for fila in filas]
+
+
+_planes = {}
+
+
+def compilar_plan(serializer_class, queryset):
+    """
+    Devuelve el PlanSerializacion del serializer, o None si tiene campos que el
+    camino rápido no soporta (anidados, SerializerMethodField, fuentes con puntos...).
+    Las columnas anotadas en el queryset se admiten como campos de solo lectura.
+    """
+    anotaciones = tuple(sorted(queryset.query.annotations))
+    clave = (serializer_class, queryset.model, anotaciones)
+    if clave not in _planes:
+        _planes[clave] = _compilar(serializer_class, queryset.model, anotaciones)
+    return _planes[clave]
+
+
+def _compilar(serializer_class, modelo, anotaciones):
+    if serializer_class.to_representation is not serializers.ModelSerializer.to_representation:
+        return None
+    serializer = serializer_class()
+    columnas = [campo.attname for campo in modelo._meta.concrete_fields]
+    pasos = []
+    campos_fecha_hora = {}
+    for nombre, campo in serializer.fields.items():
+        if campo.write_only:
+            continue
+        if '.' in campo.source or campo.source == '*':
+            return None
+        if campo.source in anotaciones:
+            columna = campo.source
+            columnas.append(columna)
+        else:
+            try:
+                campo_modelo = modelo._meta.get_field(campo.source)
+            except FieldDoesNotExist:
+                return None
+            if not campo_modelo.concrete or campo_modelo.many_to_many:
+                return None
+            columna = campo_modelo.attname
+
+        if isinstance(campo, PrimaryKeyRelatedField):
+            if campo.pk_field is not None:
+                return None
+            pasos.append((nombre, columna, _identidad))
+        elif isinstance(campo, serializers.DateTimeField):
+            campos_fecha_hora[nombre] = campo
+            pasos.append((nombre, columna, None))
+        elif isinstance(campo, CAMPOS_IDENTIDAD):
+            pasos.append((nombre, columna, _identidad))
+        elif isinstance(campo, CAMPOS_CONVERTIDOS):
+            pasos.append((nombre, columna, _convertidor(campo)))
+        else:
+            return None
+    return PlanSerializacion(columnas, pasos, campos_fecha_hora)
+
+
+class ListadoRapidoMixin:
+    """
+    Activa el camino rápido en `list()` de un ViewSet. Si el serializer no es
+    compatible se usa el listado normal de DRF, así que es seguro agregarlo.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        plan = compilar_plan(self.get_serializer_class(), queryset)
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        filas = queryset.values(*plan.columnas)
+        page = self.paginate_queryset(filas)
+        if page is not None:
+            return self.get_paginated_response(plan.convertir_filas(page))
+        return Response(plan.convertir_filas(filas))
@@ -0,0 +1,6 @@
+from django.apps import AppConfig
+
+
+class ComunAppConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'comun_app'
@@ -0,0 +1,261 @@
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from comun_app.models import Tarea
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# COLA DE TAREAS EN BASE DE DATOS
+# ---------------------------
+# Las funciones se registran con @tarea('app.nombre') en el módulo tareas.py de
+# cada app y se encolan con encolar(): solo se inserta una fila en la tabla
+# tarea, dentro de la transacción de quien encola (si esta se revierte, la tarea
+# no existe). El comando run_worker las ejecuta fuera del ciclo de solicitud:
+#   - reclamo: SELECT ... FOR UPDATE SKIP LOCKED donde el motor lo soporta
+#     (PostgreSQL, MySQL 8); en SQLite las transacciones IMMEDIATE ya serializan
+#     a los escritores. En ambos casos el UPDATE que marca el reclamo está
+#     condicionado a estado=PENDIENTE y se releen solo las filas con el
+#     identificador de reclamo propio, así dos trabajadores nunca ejecutan la
+#     misma tarea;
+#   - reintentos: si la función lanza una excepción se reprograma con espera
+#     exponencial (COLA_TAREAS_ESPERA_BASE * 2^(intento-1), con azar y tope)
+#     hasta max_intentos; luego queda FALLIDA con el error;
+#   - tareas programadas: ejecutar_desde (encolar(..., ejecutar_en=/retraso=));
+#   - mientras el trabajador vive, un hilo de latido extiende bloqueada_hasta de
+#     las tareas que tiene reclamadas (ejecutándose o esperando en su lote) cada
+#     tercio del bloqueo, así una tarea larga no vuelve a la cola a media ejecución;
+#   - un trabajador que muere deja sus tareas EN_PROCESO con bloqueada_hasta
+#     vencido; recuperar_vencidas() las devuelve a la cola como un intento fallido.
+# Las funciones deben ser idempotentes: una tarea puede ejecutarse más de una vez
+# si el trabajador muere después de terminarla y antes de marcarla.
+
+REGISTRO = {}
+TAMANO_LOTE = 10
+
+
+def tarea(nombre):
+    """Registra la función decorada como tarea `nombre`. Sus argumentos deben ser serializables a JSON."""
+    def registrar(funcion):
+        if REGISTRO.get(nombre, funcion) is not funcion:
+            raise ValueError(f"Ya existe una tarea registrada como {nombre!r}")
+        REGISTRO[nombre] = funcion
+        return funcion
+    return registrar
+
+
+def descubrir_tareas():
+    """Importa el módulo tareas.py de cada app instalada (registra sus @tarea)."""
+    autodiscover_modules('tareas')
+
+
+def encolar(nombre, *, cola='default', prioridad=0, ejecutar_en=None, retraso=None, max_intentos=5, **argumentos):
+    """Crea una Tarea para ejecutar `nombre(**argumentos)` en un trabajador. Devuelve la Tarea."""
+    ejecutar_desde = ejecutar_en or timezone.now()
+    if retraso is not None:
+        ejecutar_desde += retraso if isinstance(retraso, timedelta) else timedelta(seconds=retraso)
+    return Tarea.objects.create(
+        nombre=nombre, argumentos=argumentos, cola=cola, prioridad=prioridad,
+        ejecutar_desde=ejecutar_desde, max_intentos=max_intentos,
+    )
+
+
+def encolar_unica(nombre, *, cola='default', **opciones):
+    """
+    Como encolar(), pero si ya hay una tarea PENDIENTE de `nombre` en `cola` con
+    los mismos argumentos la devuelve sin crear otra: varios avisos seguidos
+    se atienden con una sola ejecución.
+    """
+    argumentos = {clave: valor for clave, valor in opciones.items()
+                  if clave not in ('prioridad', 'ejecutar_en', 'retraso', 'max_intentos')}
+    for pendiente in Tarea.objects.filter(nombre=nombre, cola=cola, estado=Tarea.PENDIENTE).only('argumentos'):
+        if pendiente.argumentos == argumentos:
+            return pendiente
+    return encolar(nombre, cola=cola, **opciones)
+
+
+def _bloqueo():
+    return timedelta(seconds=getattr(settings, 'COLA_TAREAS_BLOQUEO_SEGUNDOS', 300))
+
+
+def espera_reintento(intento):
+    """Segundos antes del reintento número `intento` (1, 2, ...): exponencial con azar y tope."""
+    base = getattr(settings, 'COLA_TAREAS_ESPERA_BASE', 10)
+    tope = getattr(settings, 'COLA_TAREAS_ESPERA_MAXIMA', 3600)
+    return min(tope, base * 2 ** (intento - 1)) * random.uniform(0.8, 1.2)
+
+
+# ---------------------------
+# RECLAMO Y EJECUCIÓN
+# ---------------------------
+def reclamar(colas, cantidad, trabajador):
+    """Marca EN_PROCESO hasta `cantidad` tareas listas de `colas` y las devuelve."""
+    ahora = timezone.now()
+    reclamo = f'{trabajador[:80]}:{uuid.uuid4().hex[:12]}'
+    with transaction.atomic():
+        listas = Tarea.objects.filter(estado=Tarea.PENDIENTE, cola__in=colas, ejecutar_desde__lte=ahora).order_by(
+            '-prioridad', 'ejecutar_desde', 'pk'
+        )
+        if connection.features.has_select_for_update_skip_locked:
+            listas = listas.select_for_update(skip_locked=True)
+        ids = list(listas.values_list('pk', flat=True)[:cantidad])
+        if not ids:
+            return []
+        Tarea.objects.filter(pk__in=ids, estado=Tarea.PENDIENTE).update(
+            estado=Tarea.EN_PROCESO, trabajador=reclamo, intentos=F('intentos') + 1,
+            fecha_inicio=ahora, bloqueada_hasta=ahora + _bloqueo(),
+        )
+    return list(Tarea.objects.filter(trabajador=reclamo, estado=Tarea.EN_PROCESO).order_by('-prioridad', 'pk'))
+
+
+def renovar_bloqueos(reclamos):
+    """Extiende bloqueada_hasta de las tareas EN_PROCESO de esos reclamos. Devuelve cuántas renovó."""
+    if not reclamos:
+        return 0
+    return Tarea.objects.filter(trabajador__in=reclamos, estado=Tarea.EN_PROCESO).update(
+        bloqueada_hasta=timezone.now() + _bloqueo()
+    )
+
+
+def _fallar(tarea, error):
+    """Reprograma la tarea con espera exponencial o la deja FALLIDA si agotó los intentos."""
+    ahora = timezone.now()
+    propia = Tarea.objects.filter(pk=tarea.pk, trabajador=tarea.trabajador, estado=Tarea.EN_PROCESO)
+    if tarea.intentos < tarea.max_intentos:
+        propia.update(estado=Tarea.PENDIENTE, ultimo_error=error, bloqueada_hasta=None,
+                      ejecutar_desde=ahora + timedelta(seconds=espera_reintento(tarea.intentos)))
+    else:
+        propia.update(estado=Tarea.FALLIDA, ultimo_error=error, bloqueada_hasta=None, fecha_fin=ahora)
+
+
+def ejecutar(tarea):
+    """Ejecuta una tarea reclamada y registra el resultado. Devuelve True si terminó bien."""
+    funcion = REGISTRO.get(tarea.nombre)
+    try:
+        if funcion is None:
+            raise LookupError(f"No hay una tarea registrada como {tarea.nombre!r}")
+        resultado = funcion(**tarea.argumentos)
+    except Exception:
+        logger.exception("Falló la tarea %s #%s (intento %s)", tarea.nombre, tarea.pk, tarea.intentos)
+        _fallar(tarea, traceback.format_exc())
+        return False
+    Tarea.objects.filter(pk=tarea.pk, trabajador=tarea.trabajador, estado=Tarea.EN_PROCESO).update(
+        estado=Tarea.COMPLETADA, resultado=resultado, bloqueada_hasta=None, fecha_fin=timezone.now(),
+    )
+    return True
+
+
+def recuperar_vencidas():
+    """Devuelve a la cola (o marca FALLIDA) las tareas cuyo trabajador dejó vencer el bloqueo."""
+    ahora = timezone.now()
+    vencidas = Tarea.objects.filter(estado=Tarea.EN_PROCESO, bloqueada_hasta__lt=ahora)
+    error = "El trabajador no terminó la tarea antes de que venciera su bloqueo"
+    fallidas = vencidas.filter(intentos__gte=F('max_intentos')).update(
+        estado=Tarea.FALLIDA, ultimo_error=error, bloqueada_hasta=None, fecha_fin=ahora
+    )
+    return fallidas + vencidas.update(
+        estado=Tarea.PENDIENTE, ultimo_error=error, bloqueada_hasta=None, ejecutar_desde=ahora
+    )
+
+
+# ---------------------------
+# TRABAJADOR
+# ---------------------------
+class Trabajador:
+    """
+    Reclama hasta `lote` tareas a la vez y las ejecuta en un pool de `hilos`
+    hilos (cada hilo con su propia conexión a la base). detener() termina el
+    ciclo después del lote en curso. Durante el ciclo, un hilo de latido renueva
+    el bloqueo de las tareas del lote en curso.
+    """
+
+    def __init__(self, colas=('default',), hilos=1, lote=TAMANO_LOTE, intervalo=1.0, nombre=None):
+        self.colas = list(colas)
+        self.hilos = hilos
+        self.lote = lote
+        self.intervalo = intervalo
+        self.nombre = nombre or f'{socket.gethostname()}:{os.getpid()}'
+        self.evento_detener = threading.Event()
+        self.procesadas = self.fallidas = 0
+        self.reclamos = set()
+
+    def detener(self, *args):
+        self.evento_detener.set()
+
+    def latir(self):
+        """Renueva el bloqueo de las tareas reclamadas por el lote en curso."""
+        return renovar_bloqueos(list(self.reclamos))
+
+    def _latido(self, terminado):
+        try:
+            while not terminado.wait(_bloqueo().total_seconds() / 3):
+                try:
+                    self.latir()
+                except Exception:
+                    logger.exception("No se pudo renovar el bloqueo de las tareas en curso")
+        finally:
+            connection.close()
+
+    def _ejecutar_en_hilo(self, tarea):
+        try:
+            return ejecutar(tarea)
+        finally:
+            connection.close()
+
+    def procesar_lote(self, pool=None):
+        """Reclama y ejecuta un lote. Devuelve cuántas tareas ejecutó."""
+        tareas = reclamar(self.colas, self.lote, self.nombre)
+        reclamos = {tarea.trabajador for tarea in tareas}
+        self.reclamos |= reclamos
+        try:
+            if pool is None:
+                resultados = [ejecutar(tarea) for tarea in tareas]
+            else:
+                resultados = list(pool.map(self._ejecutar_en_hilo, tareas))
+        finally:
+            self.reclamos -= reclamos
+        self.procesadas += len(resultados)
+        self.fallidas += resultados.count(False)
+        return len(resultados)
+
+    def ciclo(self, una_vez=False, max_tareas=None):
+        """
+        Procesa lotes hasta detener(). Con una_vez=True termina cuando no quedan
+        tareas listas; max_tareas corta tras ejecutar al menos esa cantidad.
+        """
+        pool = ThreadPoolExecutor(self.hilos, thread_name_prefix='trabajador') if self.hilos > 1 else None
+        terminado = threading.Event()
+        latido = threading.Thread(target=self._latido, args=(terminado,), name='trabajador-latido', daemon=True)
+        latido.start()
+        proxima_recuperacion = timezone.now()
+        try:
+            while not self.evento_detener.is_set():
+                if timezone.now() >= proxima_recuperacion:
+                    recuperar_vencidas()
+                    proxima_recuperacion = timezone.now() + _bloqueo() / 10
+                ejecutadas = self.procesar_lote(pool)
+                if max_tareas is not None and self.procesadas >= max_tareas:
+                    break
+                if not ejecutadas:
+                    if una_vez:
+                        break
+                    self.evento_detener.wait(self.intervalo)
+        finally:
+            terminado.set()
+            if pool is not None:
+                pool.shutdown(wait=True)
+            latido.join()
+        return self.procesadas
@@ -0,0 +1,150 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from comun_app.models import ClaveIdempotencia
+
+# ---------------------------
+# SOLICITUDES IDEMPOTENTES (Idempotency-Key)
+# ---------------------------
+# El cliente envía una clave única por operación; los reintentos con la misma
+# clave reciben la respuesta guardada sin volver a ejecutar la vista:
+#   1. si la clave no existe se reclama con un INSERT (único por usuario y
+#      clave): de dos solicitudes concurrentes solo una lo logra y ejecuta la
+#      vista; la otra recibe 409 mientras la primera está en proceso y la
+#      respuesta guardada cuando termina;
+#   2. la vista y el guardado de su respuesta 2xx ocurren en una misma
+#      transacción, así una clave nunca queda "en proceso" con los efectos ya
+#      confirmados; si la vista falla o responde un error, la clave se libera
+#      y un reintento vuelve a ejecutarla;
+#   3. la misma clave con otra solicitud (método, ruta o cuerpo) responde 422.
+# Una clave vencida, o "en proceso" por más de IDEMPOTENCIA_BLOQUEO_SEGUNDOS,
+# se vuelve a tomar con un UPDATE condicionado a la fecha leída, así solo un
+# proceso la recupera. El comando purgar_idempotencia borra las vencidas.
+
+ENCABEZADO = 'Idempotency-Key'
+TAMANO_LOTE = 1000
+INTENTOS = 3
+
+
+def _huella(request):
+    contenido = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(f'{request.method}\n{request.path}\n{contenido}'.encode('utf-8')).hexdigest()
+
+
+def _vencimiento(ahora):
+    return ahora + timedelta(hours=getattr(settings, 'IDEMPOTENCIA_HORAS', 24))
+
+
+def _reclamar(usuario_id, clave, huella):
+    """Devuelve (registro, propio): propio=True si esta solicitud debe ejecutar la vista."""
+    for _ in range(INTENTOS):
+        ahora = timezone.now()
+        # Se lee primero: un reintento (el caso común con clave existente) cuesta una consulta
+        registro = ClaveIdempotencia.objects.filter(usuario_id=usuario_id, clave=clave).first()
+        if registro is None:
+            try:
+                with transaction.atomic():
+                    return ClaveIdempotencia.objects.create(
+                        usuario_id=usuario_id, clave=clave, huella=huella,
+                        fecha_creacion=ahora, fecha_expiracion=_vencimiento(ahora),
+                    ), True
+            except IntegrityError:
+                continue  # Otra solicitud concurrente la insertó primero: se vuelve a leer
+        bloqueo = timedelta(seconds=getattr(settings, 'IDEMPOTENCIA_BLOQUEO_SEGUNDOS', 60))
+        abandonada = registro.estado == ClaveIdempotencia.EN_PROCESO and registro.fecha_creacion <= ahora - bloqueo
+        if registro.fecha_expiracion > ahora and not abandonada:
+            return registro, False
+        # Condicionado también al estado leído: una clave completada entre la
+        # lectura y este UPDATE no se vuelve a tomar
+        tomada = ClaveIdempotencia.objects.filter(
+            pk=registro.pk, fecha_creacion=registro.fecha_creacion, estado=registro.estado
+        ).update(
+            huella=huella, estado=ClaveIdempotencia.EN_PROCESO, codigo_respuesta=None, cuerpo_respuesta=None,
+            fecha_creacion=ahora, fecha_expiracion=_vencimiento(ahora),
+        )
+        if tomada:
+            registro.huella, registro.estado, registro.fecha_creacion = huella, ClaveIdempotencia.EN_PROCESO, ahora
+            return registro, True
+    raise IntegrityError(f"No se pudo reclamar la clave de idempotencia {clave!r}")
+
+
+def _propia(registro):
+    # fecha_creacion identifica a quien reclamó la clave: si otro proceso la
+    # tomó después (clave abandonada), sus cambios no se pisan
+    return ClaveIdempotencia.objects.filter(pk=registro.pk, fecha_creacion=registro.fecha_creacion)
+
+
+def _respuesta_guardada(registro, huella):
+    if registro.huella != huella:
+        return Response({'detail': "La clave de idempotencia ya se usó con otra solicitud."},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    if registro.estado == ClaveIdempotencia.EN_PROCESO:
+        return Response({'detail': "Una solicitud con esta clave está en proceso; reintente más tarde."},
+                        status=status.HTTP_409_CONFLICT, headers={'Retry-After': '1'})
+    return Response(registro.cuerpo_respuesta, status=registro.codigo_respuesta,
+                    headers={'Idempotent-Replayed': 'true'})
+
+
+class ClaveRetomada(Exception):
+    """Otra solicitud retomó la clave mientras esta ejecutaba la vista."""
+
+
+def _completar(registro, response):
+    if not _propia(registro).update(estado=ClaveIdempotencia.COMPLETADA, codigo_respuesta=response.status_code,
+                                    cuerpo_respuesta=response.data):
+        raise ClaveRetomada(registro.clave)
+
+
+def responder_idempotente(request, generar):
+    """
+    Ejecuta `generar()` (que devuelve un Response) una sola vez por
+    Idempotency-Key y usuario. Sin encabezado se ejecuta siempre.
+    """
+    clave = request.headers.get(ENCABEZADO)
+    if not clave or not request.user.is_authenticated:
+        return generar()
+    if len(clave) > ClaveIdempotencia._meta.get_field('clave').max_length:
+        return Response({'detail': f"{ENCABEZADO} no puede superar 255 caracteres."},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    huella = _huella(request)
+    registro, propio = _reclamar(request.user.pk, clave, huella)
+    if not propio:
+        return _respuesta_guardada(registro, huella)
+    # El reclamo ya está confirmado; la vista y la marca COMPLETADA van en una
+    # sola transacción: si el proceso muere entre ambas no queda nada hecho y
+    # retomar la clave es seguro. Si otra solicitud la retomó mientras tanto
+    # (vista de más de IDEMPOTENCIA_BLOQUEO_SEGUNDOS), esta se revierte.
+    try:
+        with transaction.atomic():
+            response = generar()
+            if status.is_success(response.status_code):
+                _completar(registro, response)
+    except ClaveRetomada:
+        return Response({'detail': "Otra solicitud con esta clave la retomó; reintente más tarde."},
+                        status=status.HTTP_409_CONFLICT, headers={'Retry-After': '1'})
+    except Exception:
+        _propia(registro).delete()
+        raise
+    if not status.is_success(response.status_code):
+        _propia(registro).delete()
+    return response
+
+
+def purgar_claves(lote=TAMANO_LOTE, ahora=None):
+    """Borra por lotes las claves vencidas. Devuelve cuántas borró."""
+    ahora = ahora or timezone.now()
+    borradas = 0
+    while True:
+        ids = list(ClaveIdempotencia.objects.filter(fecha_expiracion__lte=ahora).values_list('pk', flat=True)[:lote])
+        if not ids:
+            return borradas
+        borradas += ClaveIdempotencia.objects.filter(pk__in=ids).delete()[0]
@@ -0,0 +1,95 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from comun_app.api.renderers import JSONRapidoRenderer
+from comun_app.api.serializacion import compilar_plan
+from inventario_app.api.serializers import HistorialStockSerializer
+from inventario_app.models import HistorialStock
+from marketing_app.precios import anotar_precio_efectivo
+from productos_app.api.serializers import ProductoSerializer
+from productos_app.models import Categoria, Producto
+from sucursales_app.models import Bodega, Sucursal
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el listado con ModelSerializer + JSONRenderer contra el camino rápido "
+        "(values() + plan precompilado + JSONRapidoRenderer) sobre datos sintéticos. "
+        "Los datos se crean dentro de una transacción que se revierte al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=5000, help="Filas por listado (default: 5000)")
+        parser.add_argument('--repeticiones', type=int, default=3, help="Se informa el mejor tiempo (default: 3)")
+
+    def handle(self, *args, **options):
+        if options['filas'] < 1 or options['repeticiones'] < 1:
+            raise CommandError("--filas y --repeticiones deben ser mayores que 0")
+        self.repeticiones = options['repeticiones']
+        try:
+            with transaction.atomic():
+                self._generar(options['filas'])
+                casos = [
+                    ('productos', ProductoSerializer, anotar_precio_efectivo(Producto.objects.order_by('-pk'))),
+                    ('historial_stock', HistorialStockSerializer, HistorialStock.objects.all()),
+                ]
+                for nombre, serializer_class, queryset in casos:
+                    self._comparar(nombre, serializer_class, queryset[:options['filas']])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _generar(self, filas):
+        categoria = Categoria.objects.create(nombre_categoria='benchmark-serializacion')
+        Producto.objects.bulk_create(
+            Producto(nombre_producto=f'Producto {i}', descripcion='Descripción de prueba', precio='1990.50',
+                     stock=i % 50, marca='Marca', codigo_producto=f'BENCH-SER-{i}', categoria=categoria)
+            for i in range(filas)
+        )
+        sucursal = Sucursal.objects.create(nombre_sucursal='benchmark-serializacion', direccion='-')
+        bodega = Bodega.objects.create(nombre_bodega='Principal', sucursal=sucursal)
+        productos = list(Producto.objects.filter(categoria=categoria).values_list('pk', flat=True))
+        HistorialStock.objects.bulk_create(
+            HistorialStock(producto_id=productos[i % len(productos)], bodega=bodega,
+                           cantidad_cambiada=(i % 7) - 3, motivo='Ajuste')
+            for i in range(filas)
+        )
+
+    def _medir(self, funcion):
+        mejor, resultado = None, None
+        for _ in range(self.repeticiones):
+            inicio = time.perf_counter()
+            resultado = funcion()
+            transcurrido = time.perf_counter() - inicio
+            mejor = transcurrido if mejor is None else min(mejor, transcurrido)
+        return mejor, resultado
+
+    def _comparar(self, nombre, serializer_class, queryset):
+        plan = compilar_plan(serializer_class, queryset)
+        if plan is None:
+            self.stdout.write(self.style.WARNING(f"{nombre}: el serializer no es compatible con el camino rápido"))
+            return
+
+        def estandar():
+            return JSONRenderer().render(serializer_class(queryset.all(), many=True).data)
+
+        def rapido():
+            return JSONRapidoRenderer().render(plan.convertir_filas(queryset.values(*plan.columnas)))
+
+        tiempo_estandar, salida_estandar = self._medir(estandar)
+        tiempo_rapido, salida_rapida = self._medir(rapido)
+        iguales = json.loads(salida_estandar) == json.loads(salida_rapida)
+        filas = len(json.loads(salida_rapida))
+        self.stdout.write(
+            f"{nombre}: {filas} filas | DRF {tiempo_estandar * 1000:.0f} ms | "
+            f"rápido {tiempo_rapido * 1000:.0f} ms | x{tiempo_estandar / tiempo_rapido:.1f} | "
+            f"salida idéntica: {'sí' if iguales else 'NO'}"
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from comun_app.idempotencia import TAMANO_LOTE, purgar_claves
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra las claves de idempotencia vencidas (IDEMPOTENCIA_HORAS) y sus respuestas guardadas. "
+        "Pensado para ejecutarse periódicamente (p. ej. cada hora)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE,
+                            help=f"Claves por DELETE (default: {TAMANO_LOTE})")
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que 0")
+        borradas = purgar_claves(lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f"{borradas} clave(s) de idempotencia borrada(s)."))
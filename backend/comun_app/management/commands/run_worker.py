@@ -0,0 +1,72 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from comun_app.cola import TAMANO_LOTE, Trabajador, descubrir_tareas
+
+
+def _ejecutar_proceso(opciones):
+    trabajador = Trabajador(opciones['colas'], opciones['hilos'], opciones['lote'], opciones['intervalo'])
+    anteriores = {senal: signal.signal(senal, trabajador.detener) for senal in (signal.SIGTERM, signal.SIGINT)}
+    try:
+        trabajador.ciclo(opciones['una_vez'], opciones['max_tareas'])
+    finally:
+        for senal, manejador in anteriores.items():
+            signal.signal(senal, manejador)
+    return trabajador
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta las tareas de la cola en base de datos (comun_app.cola): reclama tareas listas, las "
+        "ejecuta en un pool de hilos y, con --procesos, en varios procesos. SIGTERM/SIGINT terminan "
+        "después del lote en curso."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--colas', default='default', help="Colas a atender, separadas por comas (default: default)")
+        parser.add_argument('--hilos', type=int, default=1, help="Hilos por proceso (default: 1)")
+        parser.add_argument('--procesos', type=int, default=1, help="Procesos trabajadores (default: 1)")
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE,
+                            help=f"Tareas reclamadas a la vez por proceso (default: {TAMANO_LOTE})")
+        parser.add_argument('--intervalo', type=float, default=1.0,
+                            help="Segundos de espera cuando no hay tareas listas (default: 1)")
+        parser.add_argument('--una-vez', action='store_true', help="Termina cuando no quedan tareas listas")
+        parser.add_argument('--max-tareas', type=int, help="Termina tras ejecutar esta cantidad de tareas")
+
+    def handle(self, *args, **options):
+        if min(options['hilos'], options['procesos'], options['lote']) < 1:
+            raise CommandError("--hilos, --procesos y --lote deben ser mayores que 0")
+        options['colas'] = [cola.strip() for cola in options['colas'].split(',') if cola.strip()]
+        if not options['colas']:
+            raise CommandError("--colas no puede estar vacío")
+        descubrir_tareas()
+
+        if options['procesos'] == 1:
+            trabajador = _ejecutar_proceso(options)
+            self.stdout.write(self.style.SUCCESS(
+                f"{trabajador.procesadas} tarea(s) ejecutada(s), {trabajador.fallidas} con error."
+            ))
+            return
+
+        # Cada proceso abre sus propias conexiones: no se heredan las del padre
+        connections.close_all()
+        opciones = {clave: options[clave] for clave in ('colas', 'hilos', 'lote', 'intervalo', 'una_vez', 'max_tareas')}
+        procesos = [
+            multiprocessing.Process(target=_ejecutar_proceso, args=(opciones,), name=f'trabajador-{numero}')
+            for numero in range(options['procesos'])
+        ]
+        for proceso in procesos:
+            proceso.start()
+        # El padre reenvía la señal de término a los hijos y espera que terminen su lote
+        def reenviar(*args):
+            for proceso in procesos:
+                if proceso.is_alive():
+                    proceso.terminate()
+        signal.signal(signal.SIGTERM, reenviar)
+        signal.signal(signal.SIGINT, reenviar)
+        for proceso in procesos:
+            proceso.join()
+        self.stdout.write(self.style.SUCCESS(f"{len(procesos)} proceso(s) trabajador(es) terminados."))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionTabla',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tabla', models.CharField(help_text='Etiqueta del modelo (app_label.modelo)', max_length=100, unique=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('fecha_modificacion', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Versión de Tabla',
+                'verbose_name_plural': 'Versiones de Tablas',
+                'db_table': 'version_tabla',
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:11
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comun_app', '0002_clave_idempotencia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(help_text='Nombre con el que se registró la función (@tarea)', max_length=100)),
+                ('argumentos', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('cola', models.CharField(default='default', max_length=50)),
+                ('prioridad', models.SmallIntegerField(default=0, help_text='Mayor prioridad se ejecuta primero')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_PROCESO', 'En proceso'), ('COMPLETADA', 'Completada'), ('FALLIDA', 'Fallida')], default='PENDIENTE', max_length=20)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('max_intentos', models.PositiveSmallIntegerField(default=5)),
+                ('ejecutar_desde', models.DateTimeField(default=django.utils.timezone.now, help_text='No se ejecuta antes de esta fecha')),
+                ('trabajador', models.CharField(blank=True, help_text='Reclamo del trabajador que la ejecuta', max_length=100, null=True)),
+                ('bloqueada_hasta', models.DateTimeField(blank=True, help_text='Si vence en proceso, el trabajador murió', null=True)),
+                ('ultimo_error', models.TextField(blank=True, null=True)),
+                ('resultado', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Tarea',
+                'verbose_name_plural': 'Tareas',
+                'db_table': 'tarea',
+                'indexes': [models.Index(fields=['estado', 'cola', 'ejecutar_desde'], name='tarea_estado_8e3c97_idx'), models.Index(fields=['estado', 'bloqueada_hasta'], name='tarea_estado_a05ccd_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,89 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+class VersionTabla(models.Model):
+    """
+    Contador de versión por tabla. Se incrementa en cada cambio de los modelos
+    registrados y se usa para calcular ETag/Last-Modified sin tocar la tabla de datos.
+    """
+    tabla = models.CharField(max_length=100, unique=True, help_text="Etiqueta del modelo (app_label.modelo)")
+    version = models.PositiveBigIntegerField(default=0)
+    fecha_modificacion = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'version_tabla'
+        verbose_name = 'Versión de Tabla'
+        verbose_name_plural = 'Versiones de Tablas'
+
+    def __str__(self):
+        return f"{self.tabla} v{self.version}"
+
+class ClaveIdempotencia(models.Model):
+    """
+    Clave enviada por el cliente en el encabezado Idempotency-Key y la respuesta
+    que produjo, para devolverla tal cual si el cliente reintenta la solicitud
+    (ver comun_app.idempotencia).
+    """
+    EN_PROCESO = 'EN_PROCESO'
+    COMPLETADA = 'COMPLETADA'
+    ESTADO_CHOICES = [(EN_PROCESO, 'En proceso'), (COMPLETADA, 'Completada')]
+
+    usuario = models.ForeignKey('usuarios_app.Usuario', on_delete=models.CASCADE, related_name='+')
+    clave = models.CharField(max_length=255)
+    huella = models.CharField(max_length=64, help_text="SHA-256 de método, ruta y cuerpo de la solicitud")
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default=EN_PROCESO)
+    codigo_respuesta = models.PositiveSmallIntegerField(null=True, blank=True)
+    cuerpo_respuesta = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    fecha_creacion = models.DateTimeField(default=timezone.now)
+    fecha_expiracion = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'clave_idempotencia'
+        verbose_name = 'Clave de Idempotencia'
+        verbose_name_plural = 'Claves de Idempotencia'
+        unique_together = ('usuario', 'clave')
+
+    def __str__(self):
+        return f"{self.clave} ({self.estado})"
+
+class Tarea(models.Model):
+    """
+    Trabajo diferido de la cola en base de datos (ver comun_app.cola). Se crea
+    con encolar() y lo ejecuta el comando run_worker.
+    """
+    PENDIENTE = 'PENDIENTE'
+    EN_PROCESO = 'EN_PROCESO'
+    COMPLETADA = 'COMPLETADA'
+    FALLIDA = 'FALLIDA'
+    ESTADO_CHOICES = [
+        (PENDIENTE, 'Pendiente'), (EN_PROCESO, 'En proceso'), (COMPLETADA, 'Completada'), (FALLIDA, 'Fallida'),
+    ]
+
+    nombre = models.CharField(max_length=100, help_text="Nombre con el que se registró la función (@tarea)")
+    argumentos = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    cola = models.CharField(max_length=50, default='default')
+    prioridad = models.SmallIntegerField(default=0, help_text="Mayor prioridad se ejecuta primero")
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default=PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    max_intentos = models.PositiveSmallIntegerField(default=5)
+    ejecutar_desde = models.DateTimeField(default=timezone.now, help_text="No se ejecuta antes de esta fecha")
+    trabajador = models.CharField(max_length=100, blank=True, null=True, help_text="Reclamo del trabajador que la ejecuta")
+    bloqueada_hasta = models.DateTimeField(null=True, blank=True, help_text="Si vence en proceso, el trabajador murió")
+    ultimo_error = models.TextField(blank=True, null=True)
+    resultado = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'tarea'
+        verbose_name = 'Tarea'
+        verbose_name_plural = 'Tareas'
+        indexes = [
+            models.Index(fields=['estado', 'cola', 'ejecutar_desde']),
+            models.Index(fields=['estado', 'bloqueada_hasta']),
+        ]
+
+    def __str__(self):
+        return f"{self.nombre} #{self.pk} ({self.estado})"
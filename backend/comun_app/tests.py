@@ -0,0 +1,270 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from comun_app import idempotencia
+from comun_app.api.renderers import JSONRapidoRenderer
+from comun_app.api.serializacion import compilar_plan
+from comun_app.cola import REGISTRO, Trabajador, encolar, reclamar, recuperar_vencidas, tarea
+from comun_app.models import ClaveIdempotencia, Tarea
+from geografia_app.models import Comuna, Region
+from geografia_app.api.serializers import ComunaSerializer
+from inventario_app.api.serializers import HistorialStockSerializer
+from inventario_app.models import HistorialStock
+from pedidos_app.models import Pedido
+from pedidos_app.tests import PedidosTestMixin
+from productos_app.models import Producto
+from sucursales_app.models import Bodega, Sucursal
+from usuarios_app.models import Usuario
+
+
+class ConsultaCondicionalTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.region = Region.objects.create(nombre_region='Valparaíso')
+        Comuna.objects.create(nombre_comuna='Viña del Mar', region=self.region)
+
+    def test_if_none_match_responde_304_sin_serializar(self):
+        response = self.client.get('/api/geografia/comunas/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        # Solo la consulta de versiones: ni COUNT ni SELECT de comunas
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/geografia/comunas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_cambio_en_tabla_anidada_cambia_el_etag(self):
+        etag = self.client.get('/api/geografia/comunas/')['ETag']
+        self.region.nombre_region = 'Región de Valparaíso'
+        self.region.save()
+        response = self.client.get('/api/geografia/comunas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since(self):
+        ultima = self.client.get('/api/geografia/regiones/')['Last-Modified']
+        response = self.client.get('/api/geografia/regiones/', HTTP_IF_MODIFIED_SINCE=ultima)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_distinto_por_representacion(self):
+        json = self.client.get('/api/geografia/regiones/', HTTP_ACCEPT='application/json')['ETag']
+        html = self.client.get('/api/geografia/regiones/', HTTP_ACCEPT='text/html')['ETag']
+        self.assertNotEqual(json, html)
+
+
+class SerializacionRapidaTests(TestCase):
+    def setUp(self):
+        producto = Producto.objects.create(nombre_producto='Serrucho', precio='7490.00', codigo_producto='SER-1')
+        bodega = Bodega.objects.create(nombre_bodega='Central', sucursal=Sucursal.objects.create(
+            nombre_sucursal='Maipú', direccion='Av. Pajaritos 123'))
+        HistorialStock.objects.create(producto=producto, bodega=bodega, cantidad_cambiada=5, motivo='Compra')
+        HistorialStock.objects.create(producto=producto, cantidad_cambiada=-2)
+        self.client = APIClient()
+        self.client.force_authenticate(Usuario.objects.create_user('bodeguero', 'clave-segura'))
+
+    def test_misma_salida_que_el_serializer(self):
+        esperado = HistorialStockSerializer(HistorialStock.objects.all(), many=True).data
+        response = self.client.get('/api/inventario/historial-stock/')
+        self.assertEqual(response.data['results'], esperado)
+
+    @override_settings(TIME_ZONE='America/Santiago')
+    def test_fechas_en_zona_horaria_activa(self):
+        esperado = HistorialStockSerializer(HistorialStock.objects.first()).data['fecha']
+        response = self.client.get('/api/inventario/historial-stock/')
+        self.assertEqual(response.data['results'][0]['fecha'], esperado)
+        self.assertFalse(esperado.endswith('Z'))
+
+    def test_serializer_anidado_usa_el_camino_normal(self):
+        self.assertIsNone(compilar_plan(ComunaSerializer, Comuna.objects.all()))
+        self.assertIsNotNone(compilar_plan(HistorialStockSerializer, HistorialStock.objects.all()))
+
+    def test_renderer_equivalente_a_json_renderer(self):
+        data = self.client.get('/api/productos/productos/').data
+        self.assertEqual(json.loads(JSONRapidoRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+        indentado = JSONRapidoRenderer().render(data, 'application/json; indent=2')
+        self.assertEqual(indentado, JSONRenderer().render(data, 'application/json; indent=2'))
+
+
+class IdempotenciaTests(PedidosTestMixin, TestCase):
+    def setUp(self):
+        self.crear_datos_base()
+        self.client = APIClient()
+        self.client.force_authenticate(self.cliente.usuario)
+        self.cuerpo = {'cliente': self.cliente.pk, 'estado_pedido': self.estado.pk, 'tipo_entrega': self.tipo_entrega.pk,
+                       'metodo_pago': self.metodo_pago.pk, 'total': '1500.00'}
+
+    def crear(self, clave, cuerpo=None):
+        return self.client.post('/api/pedidos/pedidos/', cuerpo or self.cuerpo, format='json',
+                                HTTP_IDEMPOTENCY_KEY=clave)
+
+    def test_reintento_devuelve_la_respuesta_guardada(self):
+        primera = self.crear('pedido-1')
+        self.assertEqual(primera.status_code, 201)
+        with self.assertNumQueries(1):  # Solo la lectura de la clave: la vista no se ejecuta
+            segunda = self.crear('pedido-1')
+        self.assertEqual((segunda.status_code, segunda.data), (201, primera.data))
+        self.assertEqual(segunda['Idempotent-Replayed'], 'true')
+        self.assertEqual(Pedido.objects.count(), 1)
+        # Otra clave crea otro pedido; la misma clave con otro cuerpo se rechaza
+        self.assertEqual(self.crear('pedido-2').status_code, 201)
+        self.assertEqual(self.crear('pedido-1', {**self.cuerpo, 'total': '9.00'}).status_code, 422)
+        self.assertEqual(Pedido.objects.count(), 2)
+
+    def test_error_libera_la_clave(self):
+        self.assertEqual(self.crear('pedido-1', {**self.cuerpo, 'metodo_pago': 999}).status_code, 400)
+        self.assertFalse(ClaveIdempotencia.objects.exists())
+        self.assertEqual(self.crear('pedido-1').status_code, 201)
+
+    def test_solicitud_concurrente_y_clave_abandonada(self):
+        self.assertEqual(self.crear('pedido-1').status_code, 201)
+        # Simula otra solicitud con la misma clave todavía en curso
+        ClaveIdempotencia.objects.update(estado=ClaveIdempotencia.EN_PROCESO, codigo_respuesta=None,
+                                         cuerpo_respuesta=None)
+        Pedido.objects.all().delete()
+        response = self.crear('pedido-1')
+        self.assertEqual((response.status_code, response['Retry-After']), (409, '1'))
+        self.assertFalse(Pedido.objects.exists())
+        # Si quedó en proceso más que el bloqueo (el proceso murió), se vuelve a tomar
+        ClaveIdempotencia.objects.update(fecha_creacion=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(self.crear('pedido-1').status_code, 201)
+        self.assertEqual(Pedido.objects.count(), 1)
+        self.assertEqual(ClaveIdempotencia.objects.get().estado, ClaveIdempotencia.COMPLETADA)
+
+    def test_proceso_muerto_antes_de_completar_no_duplica(self):
+        # Simula que el proceso muere entre la vista y la marca COMPLETADA
+        with mock.patch('comun_app.idempotencia._completar', side_effect=SystemExit):
+            with self.assertRaises(SystemExit):
+                self.crear('pedido-1')
+        # La vista se revirtió junto con la marca; la clave quedó "en proceso"
+        self.assertFalse(Pedido.objects.exists())
+        self.assertEqual(ClaveIdempotencia.objects.get().estado, ClaveIdempotencia.EN_PROCESO)
+        ClaveIdempotencia.objects.update(fecha_creacion=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(self.crear('pedido-1').status_code, 201)
+        self.assertEqual(Pedido.objects.count(), 1)
+
+    def test_clave_retomada_revierte_la_solicitud_lenta(self):
+        propia = idempotencia._propia
+
+        def retomada(registro):
+            # Otra solicitud retomó la clave mientras esta ejecutaba la vista
+            ClaveIdempotencia.objects.update(fecha_creacion=timezone.now() + timedelta(seconds=1))
+            return propia(registro)
+
+        with mock.patch('comun_app.idempotencia._propia', retomada):
+            response = self.crear('pedido-1')
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Pedido.objects.exists())
+
+    def test_purga_claves_vencidas(self):
+        self.crear('pedido-1')
+        self.crear('pedido-2')
+        ClaveIdempotencia.objects.filter(clave='pedido-1').update(fecha_expiracion=timezone.now())
+        call_command('purgar_idempotencia', stdout=StringIO())
+        self.assertEqual(list(ClaveIdempotencia.objects.values_list('clave', flat=True)), ['pedido-2'])
+
+
+EJECUCIONES = []
+
+
+@tarea('pruebas.registrar')
+def _registrar(valor):
+    EJECUCIONES.append(valor)
+    return {'valor': valor}
+
+
+@tarea('pruebas.fallar')
+def _fallar(mensaje):
+    raise RuntimeError(mensaje)
+
+
+class ColaTareasTests(TestCase):
+    def setUp(self):
+        EJECUCIONES.clear()
+
+    def test_ejecuta_tareas_por_prioridad(self):
+        encolar('pruebas.registrar', valor='normal')
+        encolar('pruebas.registrar', prioridad=5, valor='urgente')
+        trabajador = Trabajador(lote=1)
+        self.assertEqual(trabajador.ciclo(una_vez=True), 2)
+        self.assertEqual(EJECUCIONES, ['urgente', 'normal'])
+        self.assertEqual(
+            set(Tarea.objects.values_list('estado', 'intentos')), {(Tarea.COMPLETADA, 1)}
+        )
+        self.assertEqual(Tarea.objects.get(prioridad=5).resultado, {'valor': 'urgente'})
+
+    def test_tarea_programada_espera_su_hora(self):
+        tarea_futura = encolar('pruebas.registrar', retraso=60, valor='despues')
+        Trabajador().ciclo(una_vez=True)
+        self.assertEqual(EJECUCIONES, [])
+        Tarea.objects.filter(pk=tarea_futura.pk).update(ejecutar_desde=timezone.now())
+        Trabajador().ciclo(una_vez=True)
+        self.assertEqual(EJECUCIONES, ['despues'])
+
+    @override_settings(COLA_TAREAS_ESPERA_BASE=10)
+    def test_reintentos_con_espera_y_fallo_definitivo(self):
+        fallida = encolar('pruebas.fallar', max_intentos=2, mensaje='sin conexión')
+        with self.assertLogs('comun_app.cola', 'ERROR'):
+            Trabajador().ciclo(una_vez=True)
+        fallida.refresh_from_db()
+        self.assertEqual((fallida.estado, fallida.intentos), (Tarea.PENDIENTE, 1))
+        self.assertIn('sin conexión', fallida.ultimo_error)
+        # Espera del primer reintento: 10 s con ±20 % de azar
+        self.assertGreater(fallida.ejecutar_desde, timezone.now() + timedelta(seconds=7))
+
+        Tarea.objects.filter(pk=fallida.pk).update(ejecutar_desde=timezone.now())
+        with self.assertLogs('comun_app.cola', 'ERROR'):
+            Trabajador().ciclo(una_vez=True)
+        fallida.refresh_from_db()
+        self.assertEqual((fallida.estado, fallida.intentos), (Tarea.FALLIDA, 2))
+        self.assertIsNotNone(fallida.fecha_fin)
+
+    def test_reclamos_no_se_repiten(self):
+        for valor in range(5):
+            encolar('pruebas.registrar', valor=valor)
+        primeras = reclamar(['default'], 3, 'trabajador-a')
+        segundas = reclamar(['default'], 3, 'trabajador-b')
+        self.assertEqual((len(primeras), len(segundas)), (3, 2))
+        self.assertFalse({t.pk for t in primeras} & {t.pk for t in segundas})
+        self.assertEqual(reclamar(['default'], 3, 'trabajador-c'), [])
+
+    def test_recupera_tareas_de_trabajadores_caidos(self):
+        encolar('pruebas.registrar', valor='huerfana')
+        reclamar(['default'], 1, 'trabajador-caido')
+        self.assertEqual(recuperar_vencidas(), 0)
+        Tarea.objects.update(bloqueada_hasta=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(recuperar_vencidas(), 1)
+        Trabajador().ciclo(una_vez=True)
+        self.assertEqual(EJECUCIONES, ['huerfana'])
+        self.assertEqual(Tarea.objects.get().intentos, 2)
+
+    def test_latido_renueva_el_bloqueo_de_tareas_largas(self):
+        trabajador = Trabajador()
+
+        def larga():
+            # Simula que la tarea ya superó el bloqueo inicial
+            Tarea.objects.update(bloqueada_hasta=timezone.now() - timedelta(seconds=1))
+            EJECUCIONES.append((trabajador.latir(), recuperar_vencidas()))
+
+        with mock.patch.dict(REGISTRO, {'pruebas.larga': larga}):
+            encolar('pruebas.larga')
+            trabajador.ciclo(una_vez=True)
+        self.assertEqual(EJECUCIONES, [(1, 0)])
+        self.assertEqual(Tarea.objects.values_list('estado', 'intentos').get(), (Tarea.COMPLETADA, 1))
+        self.assertEqual(trabajador.reclamos, set())
+
+    def test_comando_run_worker(self):
+        encolar('pruebas.registrar', cola='reportes', valor='reporte')
+        encolar('pruebas.registrar', valor='otra cola')
+        salida = StringIO()
+        call_command('run_worker', '--colas', 'reportes', '--una-vez', stdout=salida)
+        self.assertEqual(EJECUCIONES, ['reporte'])
+        self.assertIn('1 tarea(s) ejecutada(s)', salida.getvalue())
@@ -0,0 +1,71 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from comun_app.models import VersionTabla
+
+# ---------------------------
+# VERSIONES POR TABLA
+# ---------------------------
+# Los modelos registrados incrementan su versión en post_save/post_delete.
+# Las operaciones masivas (update, bulk_create, bulk_update) no emiten señales:
+# quien las use debe llamar a incrementar_version() explícitamente.
+# Además de modelos se aceptan contadores con nombre propio (un str, p. ej.
+# 'productos_app.producto.stock') para estados derivados que cambian con otra
+# frecuencia que la tabla y no deben invalidar a quienes dependen de ella.
+
+def etiqueta(modelo):
+    return modelo if isinstance(modelo, str) else modelo._meta.label_lower
+
+
+def _incrementar(tabla, ahora):
+    actualizadas = VersionTabla.objects.filter(tabla=tabla).update(
+        version=F('version') + 1, fecha_modificacion=ahora
+    )
+    if not actualizadas:
+        try:
+            with transaction.atomic():
+                VersionTabla.objects.create(tabla=tabla, version=1, fecha_modificacion=ahora)
+        except IntegrityError:
+            # Otro proceso creó la fila entre el UPDATE y el INSERT
+            VersionTabla.objects.filter(tabla=tabla).update(version=F('version') + 1, fecha_modificacion=ahora)
+
+
+def incrementar_version(*modelos):
+    ahora = timezone.now()
+    for modelo in modelos:
+        _incrementar(etiqueta(modelo), ahora)
+
+
+def incrementar_contador(nombre):
+    """Incrementa la versión de un modelo o contador y devuelve la nueva (la fila queda bloqueada hasta el commit)."""
+    tabla = etiqueta(nombre)
+    with transaction.atomic():
+        _incrementar(tabla, timezone.now())
+        return VersionTabla.objects.filter(tabla=tabla).values_list('version', flat=True).get()
+
+
+def obtener_versiones(modelos):
+    """
+    Devuelve {etiqueta: (version, fecha_modificacion)} en una sola consulta.
+    Las tablas que nunca cambiaron desde que se registraron tienen versión 0.
+    """
+    etiquetas = [etiqueta(modelo) for modelo in modelos]
+    versiones = {tabla: (0, None) for tabla in etiquetas}
+    for tabla, version, fecha in VersionTabla.objects.filter(tabla__in=etiquetas).values_list(
+        'tabla', 'version', 'fecha_modificacion'
+    ):
+        versiones[tabla] = (version, fecha)
+    return versiones
+
+
+def _al_cambiar(sender, **kwargs):
+    incrementar_version(sender)
+
+
+def registrar_modelos(*modelos):
+    """Conecta las señales que mantienen la versión de cada modelo. Llamar desde AppConfig.ready()."""
+    for modelo in modelos:
+        post_save.connect(_al_cambiar, sender=modelo, dispatch_uid=f'version_tabla_save_{etiqueta(modelo)}')
+        post_delete.connect(_al_cambiar, sender=modelo, dispatch_uid=f'version_tabla_delete_{etiqueta(modelo)}')
@@ -1,16 +1,19 @@
 from rest_framework import viewsets, permissions
+from comun_app.api.mixins import ConsultaCondicionalMixin
 from geografia_app.models import Region, Comuna
 from .serializers import RegionSerializer, ComunaSerializer
 
 # ---------------------------
 # REGIÓN Y COMUNA
 # ---------------------------
-class RegionViewSet(viewsets.ModelViewSet):
+class RegionViewSet(ConsultaCondicionalMixin, viewsets.ModelViewSet):
     queryset = Region.objects.all()
+    condicional_modelos = (Region,)
     serializer_class = RegionSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly] # Permitir lectura, requerir auth para escritura
 
-class ComunaViewSet(viewsets.ModelViewSet):
-    queryset = Comuna.objects.all()
+class ComunaViewSet(ConsultaCondicionalMixin, viewsets.ModelViewSet):
+    queryset = Comuna.objects.select_related('region')
+    condicional_modelos = (Comuna, Region) # La comuna anida su región
     serializer_class = ComunaSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
\ No newline at end of file
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class GeografiaAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'geografia_app'
+
+    def ready(self):
+        from comun_app.versiones import registrar_modelos
+        from .models import Comuna, Region
+
+        registrar_modelos(Region, Comuna)
@@ -1,11 +1,12 @@
 from rest_framework import viewsets, permissions
+from comun_app.api.serializacion import ListadoRapidoMixin
 from integraciones_app.models import ApiIntegrationLog, ApiConfig
 from .serializers import ApiIntegrationLogSerializer, ApiConfigSerializer
 
 # ---------------------------
 # INTEGRACIONES Y CONFIG API
 # ---------------------------
-class ApiIntegrationLogViewSet(viewsets.ModelViewSet):
+class ApiIntegrationLogViewSet(ListadoRapidoMixin, viewsets.ModelViewSet):
     queryset = ApiIntegrationLog.objects.all()
     serializer_class = ApiIntegrationLogSerializer
     permission_classes = [permissions.IsAdminUser]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integraciones_app', '0002_apiintegrationlog'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='apiintegrationlog',
+            options={'ordering': ['-fecha_hora_llamada'], 'verbose_name': 'Registro de Integración API', 'verbose_name_plural': 'Registros de Integraciones API'},
+        ),
+        migrations.AddIndex(
+            model_name='apiintegrationlog',
+            index=models.Index(fields=['fecha_hora_llamada'], name='api_integra_fecha_h_2c8614_idx'),
+        ),
+    ]
@@ -27,6 +27,10 @@ class ApiIntegrationLog(models.Model):
         db_table = 'api_integration_log'
         verbose_name = 'Registro de Integración API'
         verbose_name_plural = 'Registros de Integraciones API'
+        ordering = ['-fecha_hora_llamada']
+        indexes = [
+            models.Index(fields=['fecha_hora_llamada']),
+        ]
 
 class ApiConfig(models.Model):
     nombre_api = models.CharField(max_length=100, unique=True)
@@ -0,0 +1,72 @@
+import json
+import time
+import urllib.error
+import urllib.request
+
+from comun_app.cola import tarea
+from integraciones_app.models import ApiConfig, ApiIntegrationLog
+
+# ---------------------------
+# LLAMADAS A APIS EXTERNAS (comun_app.cola)
+# ---------------------------
+# Las llamadas a ApiConfig se hacen en un trabajador, nunca en la solicitud del
+# usuario: cada intento queda en ApiIntegrationLog y, si falla por red o por un
+# error 5xx/429 del servicio, la tarea lanza una excepción y la cola la reintenta
+# con espera exponencial. Los demás errores 4xx no se reintentan.
+
+TIEMPO_ESPERA = 30
+REINTENTABLES = (429,)
+
+
+class ErrorIntegracion(Exception):
+    pass
+
+
+def _encabezados(config):
+    encabezados = {'Accept': 'application/json', **(config.headers_json or {})}
+    credenciales = config.autenticacion_credenciales_json or {}
+    if config.autenticacion_tipo == 'Bearer' and credenciales.get('token'):
+        encabezados['Authorization'] = f"Bearer {credenciales['token']}"
+    elif config.autenticacion_tipo == 'API_KEY' and credenciales.get('api_key'):
+        encabezados[credenciales.get('header', 'X-API-Key')] = credenciales['api_key']
+    return encabezados
+
+
+def _leer(respuesta):
+    contenido = respuesta.read().decode('utf-8', errors='replace')
+    try:
+        return json.loads(contenido) if contenido else None
+    except ValueError:
+        return {'contenido': contenido[:2000]}
+
+
+@tarea('integraciones.llamar_api')
+def llamar_api(api_config_id, ruta='', datos=None):
+    """Llama a la API configurada (endpoint_url + ruta) y registra la llamada. Devuelve el código HTTP."""
+    config = ApiConfig.objects.get(pk=api_config_id, activo=True)
+    endpoint = config.endpoint_url.rstrip('/') + ('/' + ruta.lstrip('/') if ruta else '')
+    metodo = config.metodo_http.upper()
+    cuerpo = json.dumps(datos).encode('utf-8') if datos is not None and metodo != 'GET' else None
+    encabezados = _encabezados(config)
+    if cuerpo is not None:
+        encabezados['Content-Type'] = 'application/json'
+    registro = ApiIntegrationLog(api_config=config, endpoint=endpoint[:500], metodo_http=metodo, request_data=datos)
+    inicio = time.perf_counter()
+    try:
+        solicitud = urllib.request.Request(endpoint, data=cuerpo, headers=encabezados, method=metodo)
+        with urllib.request.urlopen(solicitud, timeout=TIEMPO_ESPERA) as respuesta:
+            registro.codigo_estado = respuesta.status
+            registro.response_data = _leer(respuesta)
+            registro.success = True
+    except urllib.error.HTTPError as error:
+        registro.codigo_estado = error.code
+        registro.response_data = _leer(error)
+        registro.error_message = str(error)
+    except (urllib.error.URLError, OSError) as error:
+        registro.error_message = str(error)
+    registro.duracion_ms = round((time.perf_counter() - inicio) * 1000)
+    registro.save()
+    if not registro.success and (registro.codigo_estado is None or registro.codigo_estado >= 500
+                                 or registro.codigo_estado in REINTENTABLES):
+        raise ErrorIntegracion(f"{metodo} {endpoint}: {registro.error_message}")
+    return registro.codigo_estado
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Inventario, HistorialStock
+from .models import (
+    Inventario, HistorialStock, HistorialStockArchivado, ParticionHistorialStock, SnapshotStock,
+    SugerenciaReposicion, UmbralReposicion
+)
 
 @admin.register(Inventario)
 class InventarioAdmin(admin.ModelAdmin):
@@ -11,4 +14,37 @@ class InventarioAdmin(admin.ModelAdmin):
 class HistorialStockAdmin(admin.ModelAdmin):
     list_display = ('producto', 'bodega', 'cantidad_cambiada', 'motivo', 'fecha')
     search_fields = ('producto__nombre_producto',)
-    list_filter = ('bodega', 'fecha')
\ No newline at end of file
+    list_filter = ('bodega', 'fecha')
+    date_hierarchy = 'fecha'
+    show_full_result_count = False
+
+@admin.register(HistorialStockArchivado)
+class HistorialStockArchivadoAdmin(admin.ModelAdmin):
+    list_display = ('id', 'producto', 'bodega', 'cantidad_cambiada', 'motivo', 'fecha')
+    search_fields = ('producto__nombre_producto',)
+    date_hierarchy = 'fecha'
+    show_full_result_count = False
+
+@admin.register(ParticionHistorialStock)
+class ParticionHistorialStockAdmin(admin.ModelAdmin):
+    list_display = ('periodo', 'filas', 'completa', 'fecha_archivado')
+    readonly_fields = ('periodo', 'desde', 'hasta', 'filas', 'completa', 'fecha_archivado')
+
+@admin.register(SnapshotStock)
+class SnapshotStockAdmin(admin.ModelAdmin):
+    list_display = ('producto', 'bodega', 'fecha', 'cantidad')
+    search_fields = ('producto__nombre_producto',)
+    list_filter = ('fecha',)
+
+@admin.register(UmbralReposicion)
+class UmbralReposicionAdmin(admin.ModelAdmin):
+    list_display = ('producto', 'bodega', 'umbral', 'alerta_activa', 'fecha_alerta')
+    search_fields = ('producto__nombre_producto',)
+    list_filter = ('alerta_activa', 'bodega')
+
+@admin.register(SugerenciaReposicion)
+class SugerenciaReposicionAdmin(admin.ModelAdmin):
+    list_display = ('producto', 'bodega', 'demanda_diaria', 'punto_reorden', 'stock_actual', 'cantidad_sugerida',
+                    'fecha_calculo')
+    search_fields = ('producto__nombre_producto',)
+    list_filter = ('bodega',)
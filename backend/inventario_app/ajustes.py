@@ -0,0 +1,113 @@
+from collections import Counter
+
+from django.db import transaction
+
+from inventario_app.alertas import evaluar_umbrales
+from inventario_app.models import HistorialStock, Inventario
+from inventario_app.stock import aplicar_deltas_stock
+from productos_app.models import Producto
+from sucursales_app.models import Bodega
+
+# ---------------------------
+# AJUSTE MASIVO DE INVENTARIO
+# ---------------------------
+# Aplica miles de ajustes (producto, bodega, delta), p. ej. tras un conteo
+# cíclico, en una transacción: las filas de inventario se bloquean y leen por
+# lotes, las cantidades nuevas se escriben con bulk_create(update_conflicts=True)
+# sobre (producto, bodega) y el historial con un único bulk_create. Los pares
+# sin fila se insertan antes en cero (ignore_conflicts) para poder bloquearlos:
+# dos lotes concurrentes sobre la misma fila nueva no leen ambos cero.
+
+TAMANO_LOTE = 500
+
+
+def _lotes(valores):
+    valores = sorted(valores)
+    for inicio in range(0, len(valores), TAMANO_LOTE):
+        yield valores[inicio:inicio + TAMANO_LOTE]
+
+
+def _existentes(modelo, ids):
+    encontrados = set()
+    for lote in _lotes(ids):
+        encontrados.update(modelo.objects.filter(pk__in=lote).values_list('pk', flat=True))
+    return encontrados
+
+
+def _cantidades_actuales(pares):
+    """Bloquea y lee las filas de inventario de los pares, por lotes de productos."""
+    cantidades = {}
+    bodegas = {bodega_id for _, bodega_id in pares}
+    for lote in _lotes({producto_id for producto_id, _ in pares}):
+        filas = Inventario.objects.select_for_update().filter(
+            producto_id__in=lote, bodega_id__in=bodegas
+        ).order_by('producto_id', 'bodega_id').values_list('producto_id', 'bodega_id', 'cantidad')
+        for producto_id, bodega_id, cantidad in filas:
+            if (producto_id, bodega_id) in pares:
+                cantidades[producto_id, bodega_id] = cantidad
+    return cantidades
+
+
+def aplicar_ajustes(ajustes, motivo='Ajuste de inventario', parcial=False):
+    """
+    `ajustes` es una lista de dicts con producto, bodega y delta. Devuelve
+    (aplicado, resultados) con un resultado por ajuste, en el mismo orden.
+
+    Un ajuste falla si el producto o la bodega no existen o si dejaría la
+    cantidad bajo cero. Sin `parcial`, un solo error cancela todo el lote; con
+    `parcial`, se aplican los ajustes válidos y se informan los rechazados.
+    """
+    pares = {(ajuste['producto'], ajuste['bodega']) for ajuste in ajustes}
+    with transaction.atomic():
+        productos = _existentes(Producto, {producto_id for producto_id, _ in pares})
+        bodegas = _existentes(Bodega, {bodega_id for _, bodega_id in pares})
+        Inventario.objects.bulk_create(
+            [Inventario(producto_id=producto_id, bodega_id=bodega_id, cantidad=0)
+             for producto_id, bodega_id in sorted(pares) if producto_id in productos and bodega_id in bodegas],
+            ignore_conflicts=True, batch_size=TAMANO_LOTE,
+        )
+        cantidades = _cantidades_actuales(pares)
+
+        resultados = []
+        validos = []
+        for indice, ajuste in enumerate(ajustes):
+            par = (ajuste['producto'], ajuste['bodega'])
+            anterior = cantidades.get(par, 0)
+            resultado = {'indice': indice, 'producto': par[0], 'bodega': par[1], 'delta': ajuste['delta'],
+                         'cantidad_anterior': anterior, 'cantidad_nueva': anterior}
+            if par[0] not in productos:
+                resultado['error'] = "El producto no existe"
+            elif par[1] not in bodegas:
+                resultado['error'] = "La bodega no existe"
+            elif anterior + ajuste['delta'] < 0:
+                resultado['error'] = f"La cantidad quedaría en {anterior + ajuste['delta']}"
+            else:
+                resultado['cantidad_nueva'] = cantidades[par] = anterior + ajuste['delta']
+                validos.append(resultado)
+            resultado['estado'] = 'error' if 'error' in resultado else 'ok'
+            resultados.append(resultado)
+
+        if len(validos) < len(resultados) and not parcial:
+            # Deshace las filas en cero insertadas arriba
+            transaction.set_rollback(True)
+            return False, resultados
+
+        modificados = {(r['producto'], r['bodega']) for r in validos if r['delta']}
+        Inventario.objects.bulk_create(
+            [Inventario(producto_id=producto_id, bodega_id=bodega_id, cantidad=cantidades[producto_id, bodega_id])
+             for producto_id, bodega_id in sorted(modificados)],
+            update_conflicts=True, unique_fields=['producto', 'bodega'],
+            update_fields=['cantidad', 'fecha_actualizacion'], batch_size=TAMANO_LOTE,
+        )
+        HistorialStock.objects.bulk_create(
+            (HistorialStock(producto_id=r['producto'], bodega_id=r['bodega'],
+                            cantidad_cambiada=r['delta'], motivo=motivo)
+             for r in validos if r['delta']),
+            batch_size=TAMANO_LOTE,
+        )
+        deltas = Counter()
+        for r in validos:
+            deltas[r['producto']] += r['delta']
+        aplicar_deltas_stock(deltas)
+        evaluar_umbrales(modificados)
+    return True, resultados
@@ -0,0 +1,66 @@
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from inventario_app.models import Inventario, UmbralReposicion
+from marketing_app.models import Notificacion
+
+# ---------------------------
+# ALERTAS DE REPOSICIÓN
+# ---------------------------
+# Cada cambio de inventario evalúa solo los pares (producto, bodega) que tocó,
+# contra su UmbralReposicion, en la misma transacción: una consulta por lote de
+# pares (la mayoría no tiene umbral y no trae filas), sin recorrer la tabla.
+# Al cruzar el umbral hacia abajo se crea una Notificacion para el personal y
+# se marca alerta_activa; la alerta se rearma cuando el stock vuelve a superarlo,
+# así un producto que sigue bajo el umbral no genera una notificación por venta.
+# Quien modifique inventario sin pasar por Inventario.save() (update/bulk_create)
+# debe llamar a evaluar_umbrales() con los pares afectados.
+
+TAMANO_LOTE = 500
+
+
+def _notificacion(fila):
+    return Notificacion(
+        titulo=f"Stock bajo: {fila['producto__nombre_producto']} en {fila['bodega__nombre_bodega']}",
+        contenido=(f"Quedan {fila['cantidad']} unidades del producto {fila['producto__codigo_producto']} "
+                   f"en la bodega {fila['bodega__nombre_bodega']} (umbral de reposición: {fila['umbral']})."),
+    )
+
+
+def evaluar_umbrales(pares):
+    """
+    Recibe pares (producto_id, bodega_id) cuyo inventario cambió, activa o
+    rearma sus alertas y devuelve las Notificacion creadas.
+    """
+    pares = set(pares)
+    if not pares:
+        return []
+    cantidad = Inventario.objects.filter(
+        producto_id=OuterRef('producto_id'), bodega_id=OuterRef('bodega_id')
+    ).values('cantidad')
+    bodegas = {bodega_id for _, bodega_id in pares}
+    productos = sorted({producto_id for producto_id, _ in pares})
+    activar, rearmar, notificaciones = [], [], []
+    for inicio in range(0, len(productos), TAMANO_LOTE):
+        filas = UmbralReposicion.objects.filter(
+            producto_id__in=productos[inicio:inicio + TAMANO_LOTE], bodega_id__in=bodegas
+        ).annotate(cantidad=Coalesce(Subquery(cantidad), Value(0))).values(
+            'pk', 'producto_id', 'bodega_id', 'umbral', 'alerta_activa', 'cantidad',
+            'producto__nombre_producto', 'producto__codigo_producto', 'bodega__nombre_bodega',
+        )
+        for fila in filas:
+            if (fila['producto_id'], fila['bodega_id']) not in pares:
+                continue
+            bajo_umbral = fila['cantidad'] <= fila['umbral']
+            if bajo_umbral and not fila['alerta_activa']:
+                activar.append(fila['pk'])
+                notificaciones.append(_notificacion(fila))
+            elif not bajo_umbral and fila['alerta_activa']:
+                rearmar.append(fila['pk'])
+
+    if activar:
+        UmbralReposicion.objects.filter(pk__in=activar).update(alerta_activa=True, fecha_alerta=timezone.now())
+    if rearmar:
+        UmbralReposicion.objects.filter(pk__in=rearmar).update(alerta_activa=False, fecha_alerta=None)
+    return Notificacion.objects.bulk_create(notificaciones)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from inventario_app.models import Inventario, HistorialStock
+from inventario_app.models import Inventario, HistorialStock, SugerenciaReposicion, UmbralReposicion
+from comun_app.api.campos import ListaSeparadaPorComasField
 
 # ---------------------------
 # INVENTARIO Y HISTORIAL
@@ -12,4 +13,45 @@ class InventarioSerializer(serializers.ModelSerializer):
 class HistorialStockSerializer(serializers.ModelSerializer):
     class Meta:
         model = HistorialStock
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class UmbralReposicionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UmbralReposicion
+        fields = '__all__'
+        read_only_fields = ['alerta_activa', 'fecha_alerta']
+
+class RangoHistorialSerializer(serializers.Serializer):
+    fecha_desde = serializers.DateTimeField(required=False)
+    fecha_hasta = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if 'fecha_desde' in attrs and 'fecha_hasta' in attrs and attrs['fecha_desde'] > attrs['fecha_hasta']:
+            raise serializers.ValidationError("fecha_desde no puede ser posterior a fecha_hasta")
+        return attrs
+
+class SugerenciaReposicionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SugerenciaReposicion
+        fields = '__all__'
+
+# ---------------------------
+# STOCK EN UNA FECHA
+# ---------------------------
+class StockEnFechaSerializer(serializers.Serializer):
+    fecha = serializers.DateTimeField()
+    producto = ListaSeparadaPorComasField(child=serializers.IntegerField(), required=False)
+    bodega = ListaSeparadaPorComasField(child=serializers.IntegerField(), required=False)
+
+# ---------------------------
+# AJUSTE MASIVO
+# ---------------------------
+class AjusteInventarioSerializer(serializers.Serializer):
+    producto = serializers.IntegerField()
+    bodega = serializers.IntegerField()
+    delta = serializers.IntegerField()
+
+class AjusteMasivoSerializer(serializers.Serializer):
+    ajustes = AjusteInventarioSerializer(many=True, allow_empty=False, max_length=20000)
+    motivo = serializers.CharField(required=False, default='Ajuste de inventario')
+    parcial = serializers.BooleanField(required=False, default=False)
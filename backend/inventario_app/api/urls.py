@@ -1,11 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import InventarioViewSet, HistorialStockViewSet
+from .views import InventarioViewSet, HistorialStockViewSet, UmbralReposicionViewSet, SugerenciaReposicionViewSet
 
 # Crear router para ViewSets
 router = DefaultRouter()
 router.register(r'inventarios', InventarioViewSet)
 router.register(r'historial-stock', HistorialStockViewSet)
+router.register(r'umbrales-reposicion', UmbralReposicionViewSet)
+router.register(r'sugerencias-reposicion', SugerenciaReposicionViewSet)
 
 # URLs de la aplicación
 urlpatterns = [
@@ -1,16 +1,121 @@
-from rest_framework import viewsets, permissions
-from inventario_app.models import Inventario, HistorialStock
-from .serializers import InventarioSerializer, HistorialStockSerializer
+import time
+
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from comun_app.api.serializacion import ListadoRapidoMixin
+from inventario_app.models import Inventario, HistorialStock, SugerenciaReposicion, UmbralReposicion
+from inventario_app.alertas import evaluar_umbrales
+from inventario_app.ajustes import aplicar_ajustes
+from inventario_app.archivo import historial_en_rango
+from inventario_app.snapshots import stock_en_fecha
+from .serializers import (
+    InventarioSerializer, HistorialStockSerializer, StockEnFechaSerializer, AjusteMasivoSerializer,
+    UmbralReposicionSerializer, RangoHistorialSerializer, SugerenciaReposicionSerializer
+)
 
 # ---------------------------
 # INVENTARIO Y HISTORIAL
 # ---------------------------
-class InventarioViewSet(viewsets.ModelViewSet):
+class InventarioViewSet(ListadoRapidoMixin, viewsets.ModelViewSet):
     queryset = Inventario.objects.all()
     serializer_class = InventarioSerializer
     permission_classes = [permissions.IsAuthenticated] # Personal autorizado
 
-class HistorialStockViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post'], url_path='ajuste-masivo')
+    def ajuste_masivo(self, request):
+        """
+        Aplica muchos ajustes de stock en una transacción, con su historial.
+        Cuerpo: {"ajustes": [{"producto": 1, "bodega": 2, "delta": -3}, ...],
+                 "motivo": "Conteo cíclico", "parcial": false}
+        Devuelve un resultado por ajuste. Sin "parcial", cualquier error cancela
+        todo el lote y se responde 400.
+        """
+        serializer = AjusteMasivoSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        inicio = time.perf_counter()
+        aplicado, resultados = aplicar_ajustes(**serializer.validated_data)
+        return Response({
+            'aplicado': aplicado,
+            'ajustes_aplicados': sum(r['estado'] == 'ok' for r in resultados) if aplicado else 0,
+            'errores': sum(r['estado'] == 'error' for r in resultados),
+            'duracion_ms': round((time.perf_counter() - inicio) * 1000, 1),
+            'resultados': resultados,
+        }, status=status.HTTP_200_OK if aplicado else status.HTTP_400_BAD_REQUEST)
+
+class HistorialStockViewSet(ListadoRapidoMixin, viewsets.ModelViewSet):
     queryset = HistorialStock.objects.all()
     serializer_class = HistorialStockSerializer
-    permission_classes = [permissions.IsAuthenticated] # Personal autorizado
\ No newline at end of file
+    permission_classes = [permissions.IsAuthenticated] # Personal autorizado
+
+    def get_queryset(self):
+        """
+        El listado acepta ?fecha_desde=...&fecha_hasta=... (ISO 8601) y lee la
+        tabla principal, el archivo de meses antiguos o ambos según el rango
+        (ver inventario_app/archivo.py). Sin rango lista solo los meses activos.
+        """
+        if self.action != 'list':
+            return super().get_queryset()
+        rango = RangoHistorialSerializer(data=self.request.query_params)
+        rango.is_valid(raise_exception=True)
+        return historial_en_rango(rango.validated_data.get('fecha_desde'), rango.validated_data.get('fecha_hasta'))
+
+    @action(detail=False, methods=['get'], url_path='stock-en-fecha')
+    def stock_en_fecha(self, request):
+        """
+        Stock por producto y bodega en un instante pasado.
+        Uso: /api/inventario/historial-stock/stock-en-fecha/?fecha=2026-01-31T23:59:59&producto=1,2&bodega=3
+        Parte del snapshot más cercano anterior (comando snapshot_stock) y suma los movimientos posteriores.
+        """
+        parametros = StockEnFechaSerializer(data=request.query_params)
+        parametros.is_valid(raise_exception=True)
+        cantidades, snapshot = stock_en_fecha(
+            parametros.validated_data['fecha'],
+            parametros.validated_data.get('producto'),
+            parametros.validated_data.get('bodega'),
+        )
+        return Response({
+            'fecha': parametros.data['fecha'],
+            'snapshot': snapshot,
+            'resultados': [
+                {'producto': producto_id, 'bodega': bodega_id, 'cantidad': cantidad}
+                for (producto_id, bodega_id), cantidad in sorted(
+                    cantidades.items(), key=lambda item: (item[0][0], item[0][1] or 0)
+                )
+            ],
+        })
+
+class UmbralReposicionViewSet(viewsets.ModelViewSet):
+    queryset = UmbralReposicion.objects.all()
+    serializer_class = UmbralReposicionSerializer
+    permission_classes = [permissions.IsAdminUser] # Administradores definen umbrales
+
+    # Un umbral nuevo o modificado se evalúa de inmediato contra el stock actual
+    def perform_create(self, serializer):
+        self._evaluar(serializer.save())
+
+    def perform_update(self, serializer):
+        self._evaluar(serializer.save())
+
+    def _evaluar(self, umbral):
+        evaluar_umbrales({(umbral.producto_id, umbral.bodega_id)})
+        umbral.refresh_from_db(fields=['alerta_activa', 'fecha_alerta'])
+
+class SugerenciaReposicionViewSet(ListadoRapidoMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Resultado del comando pronosticar_demanda, de mayor a menor cantidad sugerida.
+    Filtros: ?bodega=3 y ?solo_reponer=true (solo filas con cantidad sugerida).
+    """
+    queryset = SugerenciaReposicion.objects.all()
+    serializer_class = SugerenciaReposicionSerializer
+    permission_classes = [permissions.IsAuthenticated] # Personal autorizado
+    ordering = ('-cantidad_sugerida', 'pk')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        bodega = self.request.query_params.get('bodega')
+        if bodega and bodega.isdigit():
+            queryset = queryset.filter(bodega_id=bodega)
+        if self.request.query_params.get('solo_reponer') in ('true', '1'):
+            queryset = queryset.filter(cantidad_sugerida__gt=0)
+        return queryset
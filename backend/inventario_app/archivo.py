@@ -0,0 +1,172 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from inventario_app.models import HistorialStock, HistorialStockArchivado, ParticionHistorialStock
+
+# ---------------------------
+# ARCHIVO MENSUAL DE HISTORIAL DE STOCK
+# ---------------------------
+# Los meses más antiguos que HISTORIAL_STOCK_MESES_ACTIVOS se mueven, por lotes
+# de filas y un mes a la vez, de historial_stock a historial_stock_archivado
+# (mismos ids y columnas). ParticionHistorialStock registra cada mes movido;
+# con ese catálogo las consultas por rango de fechas van solo a la tabla que
+# tiene esas filas, y si el rango cruza el límite se leen ambas (ConsultaParticionada).
+# Cada lote copia y borra en la misma transacción, así que una fila está siempre
+# en exactamente una de las dos tablas, aunque el comando se interrumpa.
+
+TAMANO_LOTE = 5000
+
+
+def _inicio_mes(fecha):
+    fecha = timezone.localtime(fecha)
+    return timezone.make_aware(datetime(fecha.year, fecha.month, 1))
+
+
+def _sumar_meses(inicio_mes, meses):
+    indice = inicio_mes.year * 12 + inicio_mes.month - 1 + meses
+    return timezone.make_aware(datetime(indice // 12, indice % 12 + 1, 1))
+
+
+def horizonte():
+    """
+    Devuelve (completo_hasta, archivo_hasta): toda fila con fecha anterior a
+    completo_hasta está archivada, y ninguna fila con fecha posterior a
+    archivo_hasta lo está. Ambos son None si nunca se archivó.
+    """
+    completo = ParticionHistorialStock.objects.filter(completa=True).aggregate(hasta=Max('hasta'))['hasta']
+    archivo = ParticionHistorialStock.objects.aggregate(hasta=Max('hasta'))['hasta']
+    return completo, archivo
+
+
+def archivar_mes(inicio, lote=TAMANO_LOTE):
+    """Mueve a historial_stock_archivado el mes que empieza en `inicio`. Devuelve las filas movidas."""
+    fin = _sumar_meses(inicio, 1)
+    particion, _ = ParticionHistorialStock.objects.get_or_create(
+        periodo=timezone.localtime(inicio).date(), defaults={'desde': inicio, 'hasta': fin}
+    )
+    movidas = 0
+    while True:
+        with transaction.atomic():
+            filas = list(
+                HistorialStock.objects.filter(fecha__gte=inicio, fecha__lt=fin).order_by('pk').values(
+                    'id', 'producto_id', 'bodega_id', 'cantidad_cambiada', 'motivo', 'fecha'
+                )[:lote]
+            )
+            if not filas:
+                break
+            # ignore_conflicts: las filas ya copiadas por una ejecución anterior no se duplican
+            HistorialStockArchivado.objects.bulk_create(
+                (HistorialStockArchivado(**fila) for fila in filas), ignore_conflicts=True
+            )
+            HistorialStock.objects.filter(pk__in=[fila['id'] for fila in filas]).delete()
+        movidas += len(filas)
+
+    particion.filas = HistorialStockArchivado.objects.filter(fecha__gte=inicio, fecha__lt=fin).count()
+    particion.completa = True
+    particion.fecha_archivado = timezone.now()
+    particion.save(update_fields=['filas', 'completa', 'fecha_archivado'])
+    return movidas
+
+
+def meses_por_archivar(meses_activos=None, ahora=None):
+    """Inicio de cada mes con filas en historial_stock anterior al horizonte configurado."""
+    if meses_activos is None:
+        meses_activos = getattr(settings, 'HISTORIAL_STOCK_MESES_ACTIVOS', 6)
+    limite = _sumar_meses(_inicio_mes(ahora or timezone.now()), -meses_activos)
+    primera = HistorialStock.objects.filter(fecha__lt=limite).aggregate(fecha=Min('fecha'))['fecha']
+    meses = []
+    if primera is not None:
+        mes = _inicio_mes(primera)
+        while mes < limite:
+            meses.append(mes)
+            mes = _sumar_meses(mes, 1)
+    return meses
+
+
+# ---------------------------
+# CONSULTAS POR RANGO DE FECHAS
+# ---------------------------
+class ConsultaParticionada:
+    """
+    Une consultas equivalentes sobre historial_stock y su archivo. Implementa
+    lo que usan la paginación por cursor y ListadoRapidoMixin (filter, order_by,
+    values, slicing): cada corte pide a cada tabla solo hasta el final del corte
+    y mezcla las filas según el orden de la consulta.
+    """
+
+    def __init__(self, consultas):
+        self.consultas = consultas
+        self.model = consultas[0].model
+        self.query = consultas[0].query
+
+    def _aplicar(self, metodo, *args, **kwargs):
+        return ConsultaParticionada([getattr(consulta, metodo)(*args, **kwargs) for consulta in self.consultas])
+
+    def all(self):
+        return self._aplicar('all')
+
+    def filter(self, *args, **kwargs):
+        return self._aplicar('filter', *args, **kwargs)
+
+    def exclude(self, *args, **kwargs):
+        return self._aplicar('exclude', *args, **kwargs)
+
+    def order_by(self, *campos):
+        return self._aplicar('order_by', *campos)
+
+    def values(self, *campos):
+        return self._aplicar('values', *campos)
+
+    def count(self):
+        return sum(consulta.count() for consulta in self.consultas)
+
+    def _mezclar(self, filas):
+        orden = self.query.order_by or self.model._meta.ordering
+        # Ordenamiento estable desde la última clave hacia la primera
+        for campo in reversed(orden):
+            nombre = campo.lstrip('-')
+            if nombre == 'pk':
+                nombre = self.model._meta.pk.attname
+            filas.sort(
+                key=lambda fila: fila[nombre] if isinstance(fila, dict) else getattr(fila, nombre),
+                reverse=campo.startswith('-'),
+            )
+        return filas
+
+    def __getitem__(self, indice):
+        if isinstance(indice, int):
+            return self[indice:indice + 1][0]
+        if indice.stop is None or indice.step is not None:
+            return list(self)[indice]
+        return self._mezclar([fila for consulta in self.consultas for fila in consulta[:indice.stop]])[indice]
+
+    def __iter__(self):
+        return iter(self._mezclar([fila for consulta in self.consultas for fila in consulta]))
+
+    def __len__(self):
+        return self.count()
+
+
+def historial_en_rango(desde=None, hasta=None):
+    """
+    Movimientos con desde <= fecha <= hasta, leídos de la tabla o tablas que
+    pueden tenerlos. Sin rango se consulta solo historial_stock (meses activos).
+    """
+    consultas = []
+    completo_hasta, archivo_hasta = horizonte()
+    if hasta is None or completo_hasta is None or hasta >= completo_hasta:
+        consultas.append(HistorialStock.objects.all())
+    if archivo_hasta is not None and (desde is not None or hasta is not None) and (
+            desde is None or desde < archivo_hasta):
+        consultas.append(HistorialStockArchivado.objects.all())
+    if desde is not None:
+        consultas = [consulta.filter(fecha__gte=desde) for consulta in consultas]
+    if hasta is not None:
+        consultas = [consulta.filter(fecha__lte=hasta) for consulta in consultas]
+    if not consultas:
+        return HistorialStock.objects.none()
+    return consultas[0] if len(consultas) == 1 else ConsultaParticionada(consultas)
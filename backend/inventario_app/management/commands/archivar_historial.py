@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventario_app.archivo import TAMANO_LOTE, archivar_mes, meses_por_archivar
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve los meses de HistorialStock anteriores a HISTORIAL_STOCK_MESES_ACTIVOS a la tabla "
+        "historial_stock_archivado, por lotes de filas. Puede interrumpirse y volver a ejecutarse: "
+        "continúa donde quedó. Pensado para ejecutarse una vez al mes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meses', type=int, help="Meses que quedan en la tabla principal (default: settings)")
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE,
+                            help=f"Filas por transacción (default: {TAMANO_LOTE})")
+        parser.add_argument('--simular', action='store_true', help="Solo lista los meses que se archivarían")
+
+    def handle(self, *args, **options):
+        if options['meses'] is not None and options['meses'] < 0:
+            raise CommandError("--meses no puede ser negativo")
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que 0")
+        meses = meses_por_archivar(options['meses'])
+        if not meses:
+            self.stdout.write("No hay meses por archivar.")
+            return
+        for inicio in meses:
+            if options['simular']:
+                self.stdout.write(f"{inicio:%Y-%m}: se archivaría")
+                continue
+            filas = archivar_mes(inicio, lote=options['lote'])
+            self.stdout.write(f"{inicio:%Y-%m}: {filas} filas archivadas")
+        if not options['simular']:
+            self.stdout.write(self.style.SUCCESS(f"{len(meses)} mes(es) archivado(s)."))
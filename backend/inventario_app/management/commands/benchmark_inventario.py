@@ -0,0 +1,168 @@
+import random
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+
+from inventario_app.ajustes import aplicar_ajustes
+from inventario_app.models import HistorialStock, Inventario
+from inventario_app.reservas import StockInsuficiente, reservar_stock
+from inventario_app.stock import productos_descuadrados
+from productos_app.models import Producto
+from sucursales_app.models import Bodega, Sucursal
+
+PREFIJO = 'BENCH-INV-'
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el rendimiento de operaciones de inventario con varios hilos concurrentes "
+        "sobre datos sintéticos, que se eliminan al terminar. "
+        "Escenario 'reservas': checkouts simultáneos que compiten por las mismas filas. "
+        "Escenario 'ajustes': un ajuste masivo de --filas filas en una transacción."
+    )
+    escenarios = ('reservas', 'ajustes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escenario', choices=self.escenarios, default='reservas')
+        parser.add_argument('--hilos', type=int, default=8, help="Hilos concurrentes (default: 8)")
+        parser.add_argument('--operaciones', type=int, default=200, help="Operaciones por hilo (default: 200)")
+        parser.add_argument('--productos', type=int, default=50, help="Productos sintéticos (default: 50)")
+        parser.add_argument('--bodegas', type=int, default=4, help="Bodegas sintéticas (default: 4)")
+        parser.add_argument('--stock-inicial', type=int, default=500, help="Cantidad por fila de inventario")
+        parser.add_argument('--lineas', type=int, default=3, help="Líneas por pedido en 'reservas' (default: 3)")
+        parser.add_argument('--filas', type=int, default=10000, help="Ajustes del lote en 'ajustes' (default: 10000)")
+        parser.add_argument('--semilla', type=int, default=1)
+
+    def handle(self, *args, **options):
+        if min(options['hilos'], options['operaciones'], options['productos'], options['bodegas']) < 1:
+            raise CommandError("--hilos, --operaciones, --productos y --bodegas deben ser mayores que 0")
+        self.options = options
+        self._generar()
+        try:
+            getattr(self, f"_escenario_{options['escenario']}")()
+            self._verificar()
+        finally:
+            self._limpiar()
+
+    # ---------------------------
+    # DATOS SINTÉTICOS
+    # ---------------------------
+    def _generar(self):
+        self._limpiar()
+        self.sucursal = Sucursal.objects.create(nombre_sucursal=f'{PREFIJO}sucursal', direccion='-')
+        self.bodegas = list(Bodega.objects.bulk_create(
+            Bodega(nombre_bodega=f'Bodega {i}', sucursal=self.sucursal) for i in range(self.options['bodegas'])
+        ))
+        Producto.objects.bulk_create(
+            Producto(nombre_producto=f'Producto {i}', precio='1000.00', codigo_producto=f'{PREFIJO}{i}',
+                     stock=self.options['stock_inicial'] * len(self.bodegas))
+            for i in range(self.options['productos'])
+        )
+        self.productos = list(
+            Producto.objects.filter(codigo_producto__startswith=PREFIJO).values_list('pk', flat=True)
+        )
+        Inventario.objects.bulk_create(
+            Inventario(producto_id=producto_id, bodega=bodega, cantidad=self.options['stock_inicial'])
+            for producto_id in self.productos for bodega in self.bodegas
+        )
+        self.total_inicial = self.options['stock_inicial'] * len(self.productos) * len(self.bodegas)
+
+    def _limpiar(self):
+        productos = Producto.objects.filter(codigo_producto__startswith=PREFIJO)
+        HistorialStock.objects.filter(producto__in=productos).delete()
+        Inventario.objects.filter(producto__in=productos).delete()
+        productos.delete()
+        Sucursal.objects.filter(nombre_sucursal=f'{PREFIJO}sucursal').delete()
+
+    # ---------------------------
+    # EJECUCIÓN CONCURRENTE
+    # ---------------------------
+    def _ejecutar(self, operacion):
+        """Corre `operacion(aleatorio)` en cada hilo y cuenta resultados por tipo."""
+        resultados = {'ok': 0, 'rechazadas': 0, 'errores': 0}
+        lock = threading.Lock()
+
+        def trabajador(indice):
+            aleatorio = random.Random(self.options['semilla'] + indice)
+            locales = dict.fromkeys(resultados, 0)
+            try:
+                for _ in range(self.options['operaciones']):
+                    try:
+                        operacion(aleatorio)
+                        locales['ok'] += 1
+                    except StockInsuficiente:
+                        locales['rechazadas'] += 1
+                    except Exception as exc:
+                        locales['errores'] += 1
+                        self.stderr.write(f"Hilo {indice}: {exc}")
+            finally:
+                connection.close()
+                with lock:
+                    for clave, valor in locales.items():
+                        resultados[clave] += valor
+
+        hilos = [threading.Thread(target=trabajador, args=(i,)) for i in range(self.options['hilos'])]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        transcurrido = time.perf_counter() - inicio
+        total = sum(resultados.values())
+        self.stdout.write(
+            f"{self.options['escenario']}: {total} operaciones en {transcurrido:.2f}s "
+            f"({total / transcurrido:.0f} op/s) con {self.options['hilos']} hilos | "
+            f"{resultados['ok']} ok, {resultados['rechazadas']} sin stock, {resultados['errores']} errores"
+        )
+        return resultados
+
+    def _escenario_reservas(self):
+        self.reservado = 0
+        lock = threading.Lock()
+
+        def reservar(aleatorio):
+            lineas = [
+                (aleatorio.choice(self.productos), aleatorio.choice(self.bodegas).pk, aleatorio.randint(1, 5))
+                for _ in range(self.options['lineas'])
+            ]
+            reservadas = reservar_stock(lineas, motivo='benchmark')
+            with lock:
+                self.reservado += sum(linea.cantidad for linea in reservadas)
+
+        self._ejecutar(reservar)
+        self.esperado = self.total_inicial - self.reservado
+
+    def _escenario_ajustes(self):
+        aleatorio = random.Random(self.options['semilla'])
+        ajustes = [
+            {'producto': aleatorio.choice(self.productos), 'bodega': aleatorio.choice(self.bodegas).pk,
+             'delta': aleatorio.randint(-3, 5)}
+            for _ in range(self.options['filas'])
+        ]
+        inicio = time.perf_counter()
+        _, resultados = aplicar_ajustes(ajustes, motivo='benchmark', parcial=True)
+        transcurrido = time.perf_counter() - inicio
+        aplicados = [r for r in resultados if r['estado'] == 'ok']
+        self.stdout.write(
+            f"ajustes: {len(ajustes)} filas en {transcurrido * 1000:.0f} ms "
+            f"({len(ajustes) / transcurrido:.0f} filas/s) | {len(aplicados)} aplicadas, "
+            f"{len(resultados) - len(aplicados)} rechazadas"
+        )
+        self.esperado = self.total_inicial + sum(r['delta'] for r in aplicados)
+
+    # ---------------------------
+    # VERIFICACIÓN
+    # ---------------------------
+    def _verificar(self):
+        inventario = Inventario.objects.filter(producto_id__in=self.productos)
+        total = inventario.aggregate(total=Sum('cantidad'))['total'] or 0
+        historial = HistorialStock.objects.filter(producto_id__in=self.productos).aggregate(
+            total=Sum('cantidad_cambiada'))['total'] or 0
+        descuadrados = [fila for fila in productos_descuadrados() if fila[0] in set(self.productos)]
+        correcto = total == self.esperado == self.total_inicial + historial and not descuadrados
+        mensaje = (f"Inventario final {total} (esperado {self.esperado}), historial {historial:+d}, "
+                   f"{len(descuadrados)} productos descuadrados")
+        self.stdout.write(self.style.SUCCESS(mensaje) if correcto else self.style.ERROR(mensaje))
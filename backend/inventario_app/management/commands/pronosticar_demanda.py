@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Calcula con NumPy la demanda diaria, el stock de seguridad y el punto de reorden de cada "
+        "producto/bodega a partir de las salidas de HistorialStock y los pedidos no asignados, y "
+        "reemplaza la tabla sugerencia_reposicion. Pensado para ejecutarse cada noche."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=365, help="Días de historial (default: 365)")
+        parser.add_argument('--ventana', type=int, default=28, help="Días del promedio móvil (default: 28)")
+        parser.add_argument('--plazo', type=int, default=7, help="Días de reposición del proveedor (default: 7)")
+        parser.add_argument('--revision', type=int, default=7, help="Días entre revisiones (default: 7)")
+        parser.add_argument('--nivel-servicio', type=float, default=0.95, help="Entre 0 y 1 (default: 0.95)")
+
+    def handle(self, *args, **options):
+        try:
+            from inventario_app.pronostico import pronosticar
+        except ImportError as exc:
+            raise CommandError(f"El pronóstico requiere NumPy (pip install numpy): {exc}")
+        try:
+            resumen = pronosticar(
+                dias=options['dias'], ventana=options['ventana'], plazo=options['plazo'],
+                revision=options['revision'], nivel_servicio=options['nivel_servicio'],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"{resumen['skus']} producto/bodega calculados sobre {resumen['dias']} días, "
+            f"{resumen['con_sugerencia']} con sugerencia de reposición, en {resumen['duracion_ms']} ms."
+        ))
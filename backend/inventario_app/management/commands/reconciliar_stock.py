@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from inventario_app.stock import corregir_stock, productos_descuadrados
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara Producto.stock con la suma de Inventario.cantidad de todas las bodegas "
+        "(una sola consulta agrupada) e informa las diferencias. Con --aplicar las corrige."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--aplicar', action='store_true', help="Corrige Producto.stock con el total de inventario")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            descuadrados = productos_descuadrados()
+            for producto_id, stock, total in descuadrados:
+                self.stdout.write(f"Producto {producto_id}: stock {stock}, inventario {total} (diferencia {stock - total:+d})")
+            if not descuadrados:
+                self.stdout.write(self.style.SUCCESS("El stock de todos los productos coincide con el inventario."))
+                return
+            if options['aplicar']:
+                corregir_stock(descuadrados)
+                self.stdout.write(self.style.SUCCESS(f"{len(descuadrados)} productos corregidos."))
+            else:
+                self.stdout.write(self.style.WARNING(
+                    f"{len(descuadrados)} productos descuadrados. Use --aplicar para corregirlos."
+                ))
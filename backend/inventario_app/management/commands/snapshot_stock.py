@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from inventario_app.snapshots import tomar_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Guarda el stock acumulado de HistorialStock por producto y bodega (tabla snapshot_stock). "
+        "Pensado para ejecutarse periódicamente (p. ej. cada noche): las consultas de stock en una "
+        "fecha solo suman los movimientos posteriores al snapshot más cercano."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', help="Instante del snapshot en ISO 8601 (default: ahora menos SNAPSHOT_STOCK_MARGEN_SEGUNDOS)")
+
+    def handle(self, *args, **options):
+        fecha = None
+        if options['fecha']:
+            fecha = parse_datetime(options['fecha'])
+            if fecha is None:
+                raise CommandError("--fecha debe tener formato ISO 8601, p. ej. 2026-01-31T23:59:59")
+            if timezone.is_naive(fecha):
+                fecha = timezone.make_aware(fecha)
+        try:
+            filas = tomar_snapshot(fecha)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f"Snapshot guardado con {filas} filas producto/bodega."))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario_app', '0001_initial'),
+        ('productos_app', '0003_producto_productos_precio_0725e3_idx'),
+        ('sucursales_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SnapshotStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(help_text='Incluye los movimientos con fecha menor o igual')),
+                ('cantidad', models.IntegerField()),
+                ('bodega', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='sucursales_app.bodega')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='productos_app.producto')),
+            ],
+            options={
+                'verbose_name': 'Snapshot de Stock',
+                'verbose_name_plural': 'Snapshots de Stock',
+                'db_table': 'snapshot_stock',
+                'indexes': [models.Index(fields=['fecha'], name='snapshot_st_fecha_f2149f_idx')],
+                'unique_together': {('producto', 'bodega', 'fecha')},
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario_app', '0002_snapshotstock'),
+        ('productos_app', '0003_producto_productos_precio_0725e3_idx'),
+        ('sucursales_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UmbralReposicion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('umbral', models.PositiveIntegerField()),
+                ('alerta_activa', models.BooleanField(default=False)),
+                ('fecha_alerta', models.DateTimeField(blank=True, null=True)),
+                ('bodega', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sucursales_app.bodega')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='productos_app.producto')),
+            ],
+            options={
+                'verbose_name': 'Umbral de Reposición',
+                'verbose_name_plural': 'Umbrales de Reposición',
+                'db_table': 'umbral_reposicion',
+                'indexes': [models.Index(fields=['alerta_activa'], name='umbral_repo_alerta__4e98da_idx')],
+                'unique_together': {('producto', 'bodega')},
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario_app', '0003_umbralreposicion'),
+        ('productos_app', '0003_producto_productos_precio_0725e3_idx'),
+        ('sucursales_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParticionHistorialStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.DateField(help_text='Primer día del mes archivado', unique=True)),
+                ('desde', models.DateTimeField()),
+                ('hasta', models.DateTimeField(help_text='Excluye este instante (inicio del mes siguiente)')),
+                ('filas', models.PositiveIntegerField(default=0)),
+                ('completa', models.BooleanField(default=False)),
+                ('fecha_archivado', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Partición de Historial de Stock',
+                'verbose_name_plural': 'Particiones de Historial de Stock',
+                'db_table': 'particion_historial_stock',
+                'ordering': ['periodo'],
+            },
+        ),
+        migrations.CreateModel(
+            name='HistorialStockArchivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('cantidad_cambiada', models.IntegerField()),
+                ('motivo', models.TextField(blank=True, null=True)),
+                ('fecha', models.DateTimeField()),
+                ('bodega', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='sucursales_app.bodega')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='productos_app.producto')),
+            ],
+            options={
+                'verbose_name': 'Historial de Stock Archivado',
+                'verbose_name_plural': 'Historiales de Stock Archivados',
+                'db_table': 'historial_stock_archivado',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['fecha'], name='historial_s_fecha_278feb_idx'), models.Index(fields=['producto', 'bodega', 'fecha'], name='historial_s_product_7028be_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario_app', '0004_historial_archivado'),
+        ('productos_app', '0003_producto_productos_precio_0725e3_idx'),
+        ('sucursales_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SugerenciaReposicion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('demanda_diaria', models.FloatField(help_text='Promedio móvil de la demanda diaria')),
+                ('desviacion_diaria', models.FloatField(help_text='Desviación estándar de la demanda diaria en el historial')),
+                ('stock_seguridad', models.PositiveIntegerField()),
+                ('punto_reorden', models.PositiveIntegerField()),
+                ('stock_actual', models.PositiveIntegerField()),
+                ('cantidad_sugerida', models.PositiveIntegerField(default=0)),
+                ('fecha_calculo', models.DateTimeField()),
+                ('bodega', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='sucursales_app.bodega')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='productos_app.producto')),
+            ],
+            options={
+                'verbose_name': 'Sugerencia de Reposición',
+                'verbose_name_plural': 'Sugerencias de Reposición',
+                'db_table': 'sugerencia_reposicion',
+                'indexes': [models.Index(fields=['cantidad_sugerida'], name='sugerencia__cantida_34a213_idx')],
+                'unique_together': {('producto', 'bodega')},
+            },
+        ),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from collections import Counter
+
+from django.db import models, transaction
 
 class Inventario(models.Model):
     producto = models.ForeignKey('productos_app.Producto', on_delete=models.CASCADE)
@@ -15,6 +17,28 @@ class Inventario(models.Model):
             models.Index(fields=['fecha_actualizacion']),
         ]
 
+    def save(self, *args, **kwargs):
+        # Aplica la diferencia con la fila guardada a Producto.stock (ver inventario_app/stock.py)
+        # y evalúa los umbrales de reposición de la fila (ver inventario_app/alertas.py).
+        # La fila anterior se bloquea para que dos guardados concurrentes no calculen el mismo delta.
+        from inventario_app.alertas import evaluar_umbrales
+        from inventario_app.stock import aplicar_deltas_stock
+
+        with transaction.atomic():
+            deltas = Counter()
+            pares = {(self.producto_id, self.bodega_id)}
+            if self.pk is not None:
+                anterior = Inventario.objects.select_for_update().filter(pk=self.pk).values_list(
+                    'producto_id', 'bodega_id', 'cantidad'
+                ).first()
+                if anterior is not None:
+                    deltas[anterior[0]] -= anterior[2]
+                    pares.add(anterior[:2])
+            super().save(*args, **kwargs)
+            deltas[self.producto_id] += self.cantidad
+            aplicar_deltas_stock(deltas)
+            evaluar_umbrales(pares)
+
     def __str__(self):
         return f"{self.producto.nombre_producto} en {self.bodega.nombre_bodega}: {self.cantidad}"
 
@@ -38,4 +62,129 @@ class HistorialStock(models.Model):
 
     def __str__(self):
         bodega_nombre = self.bodega.nombre_bodega if self.bodega else "N/A"
-        return f"Cambio stock: {self.producto.nombre_producto} ({self.cantidad_cambiada}) en {bodega_nombre}"
\ No newline at end of file
+        return f"Cambio stock: {self.producto.nombre_producto} ({self.cantidad_cambiada}) en {bodega_nombre}"
+
+class SnapshotStock(models.Model):
+    """
+    Stock acumulado de HistorialStock por producto y bodega en un instante.
+
+    Los snapshots se toman para todos los pares a la vez (comando snapshot_stock),
+    así una consulta "stock al día X" parte del snapshot más cercano anterior y
+    solo suma los movimientos posteriores. Se mantiene desde inventario_app.snapshots.
+    """
+    producto = models.ForeignKey('productos_app.Producto', on_delete=models.CASCADE)
+    bodega = models.ForeignKey('sucursales_app.Bodega', on_delete=models.CASCADE, null=True, blank=True)
+    fecha = models.DateTimeField(help_text="Incluye los movimientos con fecha menor o igual")
+    cantidad = models.IntegerField()
+
+    class Meta:
+        db_table = 'snapshot_stock'
+        verbose_name = 'Snapshot de Stock'
+        verbose_name_plural = 'Snapshots de Stock'
+        unique_together = ('producto', 'bodega', 'fecha')
+        indexes = [
+            models.Index(fields=['fecha']),
+        ]
+
+    def __str__(self):
+        return f"Stock de producto {self.producto_id} en bodega {self.bodega_id} al {self.fecha}: {self.cantidad}"
+
+class UmbralReposicion(models.Model):
+    """
+    Cantidad mínima de un producto en una bodega. Cuando el inventario baja a
+    `umbral` o menos se notifica al personal una sola vez (alerta_activa) hasta
+    que el stock vuelve a superarlo. Se evalúa desde inventario_app.alertas.
+    """
+    producto = models.ForeignKey('productos_app.Producto', on_delete=models.CASCADE)
+    bodega = models.ForeignKey('sucursales_app.Bodega', on_delete=models.CASCADE)
+    umbral = models.PositiveIntegerField()
+    alerta_activa = models.BooleanField(default=False)
+    fecha_alerta = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'umbral_reposicion'
+        verbose_name = 'Umbral de Reposición'
+        verbose_name_plural = 'Umbrales de Reposición'
+        unique_together = ('producto', 'bodega')
+        indexes = [
+            models.Index(fields=['alerta_activa']),
+        ]
+
+    def __str__(self):
+        return f"Reponer producto {self.producto_id} en bodega {self.bodega_id} bajo {self.umbral}"
+
+class HistorialStockArchivado(models.Model):
+    """
+    Movimientos de HistorialStock de meses ya archivados, con el mismo id y
+    columnas que tenían en historial_stock. Solo lo escribe inventario_app.archivo.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    producto = models.ForeignKey('productos_app.Producto', on_delete=models.CASCADE, related_name='+')
+    bodega = models.ForeignKey('sucursales_app.Bodega', on_delete=models.CASCADE, null=True, blank=True,
+                               related_name='+')
+    cantidad_cambiada = models.IntegerField()
+    motivo = models.TextField(blank=True, null=True)
+    fecha = models.DateTimeField()
+
+    class Meta:
+        db_table = 'historial_stock_archivado'
+        verbose_name = 'Historial de Stock Archivado'
+        verbose_name_plural = 'Historiales de Stock Archivados'
+        ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['fecha']),
+            models.Index(fields=['producto', 'bodega', 'fecha']),
+        ]
+
+    def __str__(self):
+        return f"Cambio stock archivado: producto {self.producto_id} ({self.cantidad_cambiada}) el {self.fecha}"
+
+class ParticionHistorialStock(models.Model):
+    """
+    Catálogo de meses de HistorialStock movidos a historial_stock_archivado.
+    Mientras `completa` es falso el mes puede tener filas en ambas tablas.
+    """
+    periodo = models.DateField(unique=True, help_text="Primer día del mes archivado")
+    desde = models.DateTimeField()
+    hasta = models.DateTimeField(help_text="Excluye este instante (inicio del mes siguiente)")
+    filas = models.PositiveIntegerField(default=0)
+    completa = models.BooleanField(default=False)
+    fecha_archivado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'particion_historial_stock'
+        verbose_name = 'Partición de Historial de Stock'
+        verbose_name_plural = 'Particiones de Historial de Stock'
+        ordering = ['periodo']
+
+    def __str__(self):
+        estado = 'completa' if self.completa else 'en curso'
+        return f"Historial {self.periodo:%Y-%m} ({self.filas} filas, {estado})"
+
+class SugerenciaReposicion(models.Model):
+    """
+    Resultado del último cálculo de inventario_app.pronostico (comando
+    pronosticar_demanda) por producto y bodega. Bodega nula agrupa la demanda
+    de pedidos que no se pudieron asignar a ninguna bodega.
+    """
+    producto = models.ForeignKey('productos_app.Producto', on_delete=models.CASCADE)
+    bodega = models.ForeignKey('sucursales_app.Bodega', on_delete=models.CASCADE, null=True, blank=True)
+    demanda_diaria = models.FloatField(help_text="Promedio móvil de la demanda diaria")
+    desviacion_diaria = models.FloatField(help_text="Desviación estándar de la demanda diaria en el historial")
+    stock_seguridad = models.PositiveIntegerField()
+    punto_reorden = models.PositiveIntegerField()
+    stock_actual = models.PositiveIntegerField()
+    cantidad_sugerida = models.PositiveIntegerField(default=0)
+    fecha_calculo = models.DateTimeField()
+
+    class Meta:
+        db_table = 'sugerencia_reposicion'
+        verbose_name = 'Sugerencia de Reposición'
+        verbose_name_plural = 'Sugerencias de Reposición'
+        unique_together = ('producto', 'bodega')
+        indexes = [
+            models.Index(fields=['cantidad_sugerida']),
+        ]
+
+    def __str__(self):
+        return f"Reponer {self.cantidad_sugerida} de producto {self.producto_id} en bodega {self.bodega_id}"
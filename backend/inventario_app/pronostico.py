@@ -0,0 +1,166 @@
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from statistics import NormalDist
+
+import numpy as np
+from django.db import transaction
+from django.db.models import DateField, Sum
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from inventario_app.archivo import horizonte
+from inventario_app.models import HistorialStock, HistorialStockArchivado, Inventario, SugerenciaReposicion
+from pedidos_app.estados import CANCELADO
+from pedidos_app.models import DetallePedido
+
+# ---------------------------
+# PRONÓSTICO DE DEMANDA Y PUNTO DE REORDEN
+# ---------------------------
+# La demanda diaria por (producto, bodega) sale de:
+#   - las salidas de HistorialStock (cantidad_cambiada < 0), incluido el archivo;
+#   - las líneas de pedido sin asignación de bodega (demanda no atendida), que
+#     se cuentan con bodega nula.
+# Cada fuente se lee con una consulta agrupada por día UTC (Cast a fecha, que la
+# base resuelve sin la conversión de zona horaria por fila de TruncDate, muy
+# costosa en SQLite) y se carga en una matriz
+# SKU x día; promedio móvil, desviación, stock de seguridad y punto de reorden
+# se calculan para todos los SKU a la vez con NumPy:
+#   stock_seguridad = z * desviacion * sqrt(plazo)
+#   punto_reorden   = demanda_diaria * plazo + stock_seguridad
+#   se sugiere reponer hasta punto_reorden + demanda_diaria * revision cuando
+#   el stock actual está en el punto de reorden o bajo él.
+
+TAMANO_LOTE = 1000
+SIN_BODEGA = 0  # Las pk empiezan en 1: 0 representa bodega nula en los arreglos
+
+
+def _salidas(modelo, inicio, fin):
+    """(producto_id, bodega_id, día, unidades) de las salidas por día."""
+    return modelo.objects.filter(fecha__gte=inicio, fecha__lt=fin, cantidad_cambiada__lt=0).annotate(
+        dia=Cast('fecha', DateField())
+    ).order_by().values('producto_id', 'bodega_id', 'dia').annotate(
+        total=Sum('cantidad_cambiada')
+    ).values_list('producto_id', 'bodega_id', 'dia', 'total')
+
+
+def _pedidos_no_asignados(inicio, fin):
+    """(producto_id, día, unidades) de las líneas de pedido sin bodega asignada (sin contar las canceladas)."""
+    return DetallePedido.objects.filter(
+        pedido__fecha__gte=inicio, pedido__fecha__lt=fin, asignaciones__isnull=True
+    ).exclude(pedido__estado_pedido__nombre_estado=CANCELADO).annotate(
+        dia=Cast('pedido__fecha', DateField())
+    ).order_by().values('producto_id', 'dia').annotate(
+        total=Sum('cantidad')
+    ).values_list('producto_id', 'dia', 'total')
+
+
+def _arreglos(filas, primer_dia):
+    """Convierte filas (producto, bodega, día, unidades) en arreglos NumPy paralelos."""
+    cantidad = len(filas)
+    return (
+        np.fromiter((fila[0] for fila in filas), dtype=np.int64, count=cantidad),
+        np.fromiter((fila[1] or SIN_BODEGA for fila in filas), dtype=np.int64, count=cantidad),
+        np.fromiter((fila[2].toordinal() - primer_dia for fila in filas), dtype=np.int64, count=cantidad),
+        np.fromiter((abs(fila[3]) for fila in filas), dtype=np.float64, count=cantidad),
+    )
+
+
+def cargar_demanda(inicio, dias):
+    """
+    Devuelve (pares, matriz): `pares` es un arreglo (n, 2) de (producto_id,
+    bodega_id o SIN_BODEGA) y `matriz` la demanda (n, dias) por día desde `inicio`.
+    """
+    fin = inicio + timedelta(days=dias)
+    filas = list(_salidas(HistorialStock, inicio, fin))
+    _, archivo_hasta = horizonte()
+    if archivo_hasta is not None and inicio < archivo_hasta:
+        filas += _salidas(HistorialStockArchivado, inicio, fin)
+    filas += ((producto_id, None, dia, total) for producto_id, dia, total in _pedidos_no_asignados(inicio, fin))
+
+    productos, bodegas, columnas, unidades = _arreglos(filas, inicio.date().toordinal())
+    if not len(productos):
+        return np.empty((0, 2), dtype=np.int64), np.empty((0, dias))
+    pares, filas_matriz = np.unique(np.column_stack([productos, bodegas]), axis=0, return_inverse=True)
+    filas_matriz = filas_matriz.reshape(-1)
+    matriz = np.bincount(
+        filas_matriz * dias + columnas, weights=unidades, minlength=len(pares) * dias
+    ).reshape(len(pares), dias)
+    return pares, matriz
+
+
+def _stock_actual(pares):
+    """Inventario actual de cada par (0 para bodega nula o filas inexistentes)."""
+    productos = sorted({int(producto_id) for producto_id in pares[:, 0]})
+    cantidades = {}
+    for inicio in range(0, len(productos), TAMANO_LOTE):
+        cantidades.update(
+            ((producto_id, bodega_id), cantidad) for producto_id, bodega_id, cantidad in Inventario.objects.filter(
+                producto_id__in=productos[inicio:inicio + TAMANO_LOTE]
+            ).values_list('producto_id', 'bodega_id', 'cantidad')
+        )
+    return np.fromiter(
+        (cantidades.get((int(producto_id), int(bodega_id)), 0) for producto_id, bodega_id in pares),
+        dtype=np.float64, count=len(pares),
+    )
+
+
+def calcular_sugerencias(pares, matriz, stock, ventana=28, plazo=7, revision=7, nivel_servicio=0.95):
+    """
+    Cálculo vectorizado sobre la matriz de demanda. Devuelve un dict de
+    arreglos (uno por columna de SugerenciaReposicion), alineados con `pares`.
+    """
+    z = NormalDist().inv_cdf(nivel_servicio)
+    demanda = matriz[:, -ventana:].mean(axis=1)
+    desviacion = matriz.std(axis=1, ddof=1) if matriz.shape[1] > 1 else np.zeros(len(pares))
+    stock_seguridad = np.ceil(z * desviacion * np.sqrt(plazo))
+    punto_reorden = np.ceil(demanda * plazo + stock_seguridad)
+    objetivo = punto_reorden + np.ceil(demanda * revision)
+    reponer = (stock <= punto_reorden) & (demanda > 0)
+    return {
+        'demanda_diaria': demanda,
+        'desviacion_diaria': desviacion,
+        'stock_seguridad': stock_seguridad,
+        'punto_reorden': punto_reorden,
+        'stock_actual': stock,
+        'cantidad_sugerida': np.where(reponer, np.maximum(objetivo - stock, 0), 0),
+    }
+
+
+def pronosticar(dias=365, ventana=28, plazo=7, revision=7, nivel_servicio=0.95, hoy=None):
+    """
+    Recalcula SugerenciaReposicion con la demanda de los últimos `dias` días
+    (UTC) hasta `hoy` (inclusive) y reemplaza el resultado anterior. Devuelve un
+    resumen con conteos y duración.
+    """
+    if not 0 < nivel_servicio < 1:
+        raise ValueError("nivel_servicio debe estar entre 0 y 1")
+    if min(dias, ventana, plazo) < 1 or revision < 0:
+        raise ValueError("dias, ventana y plazo deben ser mayores que 0 y revision no puede ser negativa")
+    reloj = time.perf_counter()
+    hoy = hoy or timezone.now().astimezone(dt_timezone.utc).date()
+    inicio = datetime.combine(hoy - timedelta(days=dias - 1), datetime.min.time(), tzinfo=dt_timezone.utc)
+    pares, matriz = cargar_demanda(inicio, dias)
+    columnas = calcular_sugerencias(pares, matriz, _stock_actual(pares), min(ventana, dias), plazo, revision,
+                                    nivel_servicio)
+
+    ahora = timezone.now()
+    with transaction.atomic():
+        SugerenciaReposicion.objects.all().delete()
+        SugerenciaReposicion.objects.bulk_create(
+            (SugerenciaReposicion(
+                producto_id=int(producto_id), bodega_id=int(bodega_id) or None, fecha_calculo=ahora,
+                demanda_diaria=float(columnas['demanda_diaria'][i]),
+                desviacion_diaria=float(columnas['desviacion_diaria'][i]),
+                stock_seguridad=int(columnas['stock_seguridad'][i]),
+                punto_reorden=int(columnas['punto_reorden'][i]),
+                stock_actual=int(columnas['stock_actual'][i]),
+                cantidad_sugerida=int(columnas['cantidad_sugerida'][i]),
+            ) for i, (producto_id, bodega_id) in enumerate(pares)),
+            batch_size=TAMANO_LOTE,
+        )
+    return {
+        'skus': len(pares),
+        'con_sugerencia': int(np.count_nonzero(columnas['cantidad_sugerida'])),
+        'dias': dias,
+        'duracion_ms': round((time.perf_counter() - reloj) * 1000, 1),
+    }
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+
+from inventario_app.alertas import evaluar_umbrales
+from inventario_app.models import Inventario
+from inventario_app.stock import aplicar_deltas_stock
+
+# ---------------------------
+# STOCK TOTAL DEL PRODUCTO
+# ---------------------------
+# El borrado se maneja por señal (y no en Inventario.delete) para cubrir también
+# los borrados en cascada de bodegas y los de QuerySet.delete(). La cantidad
+# a descontar se relee bajo bloqueo antes de borrar: la de la instancia puede
+# estar desactualizada si otra transacción cambió la fila después de leerla.
+@receiver(pre_delete, sender=Inventario)
+def bloquear_inventario_eliminado(sender, instance, **kwargs):
+    instance._cantidad_eliminada = Inventario.objects.select_for_update().filter(pk=instance.pk).values_list(
+        'cantidad', flat=True
+    ).first() or 0
+
+
+@receiver(post_delete, sender=Inventario)
+def descontar_stock_eliminado(sender, instance, origin=None, **kwargs):
+    aplicar_deltas_stock({instance.producto_id: -getattr(instance, '_cantidad_eliminada', instance.cantidad)})
+    # Solo se alerta si se borró el inventario mismo: al borrar una bodega o un
+    # producto, sus umbrales desaparecen con él
+    if isinstance(origin, Inventario) or getattr(origin, 'model', None) is Inventario:
+        evaluar_umbrales({(instance.producto_id, instance.bodega_id)})
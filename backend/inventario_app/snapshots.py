@@ -0,0 +1,99 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from inventario_app.archivo import horizonte
+from inventario_app.models import HistorialStock, HistorialStockArchivado, SnapshotStock
+
+# ---------------------------
+# STOCK EN UNA FECHA (SNAPSHOTS + MOVIMIENTOS)
+# ---------------------------
+# El stock de un par (producto, bodega) al instante T es la suma de
+# HistorialStock.cantidad_cambiada con fecha <= T. En vez de sumar desde el
+# inicio, se parte del último snapshot <= T y se suman solo los movimientos
+# posteriores (índice (producto, bodega, fecha) de HistorialStock).
+# HistorialStock.fecha se fija al insertar, no al confirmar: una transacción
+# larga puede confirmar un movimiento con fecha anterior a un snapshot ya
+# tomado, y ese movimiento no entraría nunca (las consultas solo suman
+# fecha > snapshot). Por eso un snapshot solo puede tomarse hasta
+# ahora - SNAPSHOT_STOCK_MARGEN_SEGUNDOS, más que cualquier transacción.
+
+TAMANO_LOTE = 1000
+
+
+def ultimo_snapshot(hasta):
+    """Instante del snapshot más reciente con fecha <= hasta, o None."""
+    return SnapshotStock.objects.filter(fecha__lte=hasta).aggregate(fecha=Max('fecha'))['fecha']
+
+
+def _filtrar(queryset, productos, bodegas):
+    if productos:
+        queryset = queryset.filter(producto_id__in=productos)
+    if bodegas:
+        queryset = queryset.filter(bodega_id__in=bodegas)
+    return queryset
+
+
+def stock_en_fecha(fecha, productos=None, bodegas=None):
+    """
+    Devuelve ({(producto_id, bodega_id): cantidad}, instante del snapshot usado).
+    `productos` y `bodegas` restringen el resultado a esos ids. Los pares sin
+    movimientos ni snapshot hasta esa fecha no aparecen.
+    """
+    desde = ultimo_snapshot(fecha)
+    cantidades = Counter()
+    if desde is not None:
+        base = _filtrar(SnapshotStock.objects.filter(fecha=desde), productos, bodegas)
+        for producto_id, bodega_id, cantidad in base.values_list('producto_id', 'bodega_id', 'cantidad'):
+            cantidades[producto_id, bodega_id] = cantidad
+
+    # Los movimientos posteriores al snapshot pueden estar ya archivados (ver archivo.py)
+    _, archivo_hasta = horizonte()
+    modelos = [HistorialStock]
+    if archivo_hasta is not None and (desde is None or desde < archivo_hasta):
+        modelos.append(HistorialStockArchivado)
+    for modelo in modelos:
+        movimientos = _filtrar(modelo.objects.filter(fecha__lte=fecha), productos, bodegas)
+        if desde is not None:
+            movimientos = movimientos.filter(fecha__gt=desde)
+        for producto_id, bodega_id, total in movimientos.order_by().values('producto_id', 'bodega_id').annotate(
+            total=Sum('cantidad_cambiada')
+        ).values_list('producto_id', 'bodega_id', 'total'):
+            cantidades[producto_id, bodega_id] += total
+    return dict(cantidades), desde
+
+
+def limite_snapshot():
+    """Instante más reciente en que puede tomarse un snapshot (ahora menos el margen)."""
+    return timezone.now() - timedelta(seconds=getattr(settings, 'SNAPSHOT_STOCK_MARGEN_SEGUNDOS', 900))
+
+
+def tomar_snapshot(fecha=None):
+    """
+    Guarda el stock de todos los pares al instante `fecha` (por defecto,
+    limite_snapshot()). Se calcula desde el snapshot anterior, por lo que cada
+    ejecución solo lee los movimientos del último período. Devuelve la
+    cantidad de filas creadas.
+    """
+    limite = limite_snapshot()
+    fecha = fecha or limite
+    if fecha > limite:
+        raise ValueError(
+            f"El snapshot debe ser anterior a {limite.isoformat()}: "
+            "aún pueden confirmarse movimientos con fecha posterior"
+        )
+    anterior = SnapshotStock.objects.aggregate(fecha=Max('fecha'))['fecha']
+    if anterior is not None and fecha <= anterior:
+        raise ValueError(f"Ya existe un snapshot al {anterior.isoformat()} o posterior")
+    cantidades, _ = stock_en_fecha(fecha)
+    with transaction.atomic():
+        SnapshotStock.objects.bulk_create(
+            (SnapshotStock(producto_id=producto_id, bodega_id=bodega_id, fecha=fecha, cantidad=cantidad)
+             for (producto_id, bodega_id), cantidad in cantidades.items()),
+            batch_size=TAMANO_LOTE,
+        )
+    return len(cantidades)
@@ -0,0 +1,131 @@
+import logging
+import threading
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from comun_app.versiones import incrementar_version
+from inventario_app.models import Inventario
+from productos_app import cache_catalogo
+from productos_app.models import Producto
+
+# ---------------------------
+# STOCK TOTAL DEL PRODUCTO
+# ---------------------------
+# Producto.stock es la suma de Inventario.cantidad en todas las bodegas. Se
+# mantiene aplicando el delta de cada cambio de inventario (UPDATE con F(), sin
+# leer el valor actual), así nunca hace falta sumar por producto al leer.
+# Inventario.save() y la señal post_delete lo hacen solos; quien modifique
+# inventario con update()/bulk_create() debe llamar a aplicar_deltas_stock().
+# Un cambio de stock no mueve la versión de Producto (que invalidaría todo el
+# catálogo en cada venta) sino un contador propio, CONTADOR_STOCK, que entra en
+# el ETag del catálogo, y solo invalida el detalle en caché de cada producto:
+# los listados en caché pueden mostrar un stock de hasta CATALOGO_CACHE_TIMEOUT
+# segundos. Ambas cosas se hacen fuera de la transacción (la fila de
+# VersionTabla serializaría a todos los que escriben stock): los productos
+# cambiados se acumulan y se publican una sola vez al confirmar (on_commit).
+
+TAMANO_LOTE = 500
+CONTADOR_STOCK = 'productos_app.producto.stock'
+logger = logging.getLogger(__name__)
+# Por hilo, igual que las conexiones de Django: cada uno publica lo de su transacción
+_local = threading.local()
+
+
+def _por_publicar():
+    if not hasattr(_local, 'productos'):
+        _local.productos = set()
+    return _local.productos
+
+
+def _publicar_cambios():
+    # Varios on_commit de la misma transacción: el primero publica todo y los demás no hacen nada
+    pendientes = _por_publicar()
+    if not pendientes:
+        return
+    productos = list(pendientes)
+    pendientes.clear()
+    for producto_id in productos:
+        cache_catalogo.invalidar_detalle('producto', producto_id)
+    incrementar_version(CONTADOR_STOCK)
+
+
+def publicar_cambios(productos_ids):
+    """Invalida el detalle en caché de esos productos e incrementa CONTADOR_STOCK al confirmar la transacción."""
+    pendientes = _por_publicar()
+    pendientes.update(productos_ids)
+    if pendientes:
+        transaction.on_commit(_publicar_cambios)
+
+
+def _reportar_descuadre(lote, delta):
+    # Solo interesa cuando algún delta es negativo: son los únicos que pueden dejar el stock bajo cero
+    descuadrados = list(
+        Producto.objects.filter(pk__in=lote).alias(nuevo=F('stock') + delta).filter(nuevo__lt=0)
+        .values_list('pk', 'stock')
+    )
+    for producto_id, stock in descuadrados:
+        logger.warning(
+            "Producto %s: el stock (%s) quedaría bajo cero, se deja en 0; revisar con reconciliar_stock",
+            producto_id, stock,
+        )
+
+
+def aplicar_deltas_stock(deltas):
+    """
+    Recibe {producto_id: delta} y suma cada delta a Producto.stock con un UPDATE
+    por lote de productos. Debe llamarse dentro de la misma transacción que el
+    cambio de inventario.
+    """
+    deltas = {producto_id: delta for producto_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    ids = sorted(deltas)
+    for inicio in range(0, len(ids), TAMANO_LOTE):
+        lote = ids[inicio:inicio + TAMANO_LOTE]
+        delta = Case(
+            *[When(pk=producto_id, then=Value(deltas[producto_id])) for producto_id in lote],
+            default=Value(0), output_field=IntegerField(),
+        )
+        # Greatest evita violar el CHECK de PositiveIntegerField si Producto.stock ya
+        # venía descuadrado; se deja constancia en el log y `reconciliar_stock` lo corrige.
+        if any(deltas[producto_id] < 0 for producto_id in lote):
+            _reportar_descuadre(lote, delta)
+        Producto.objects.filter(pk__in=lote).update(stock=Greatest(F('stock') + delta, Value(0)))
+    publicar_cambios(ids)
+
+
+def _total_inventario():
+    """Subconsulta con la suma de Inventario.cantidad de OuterRef('pk')."""
+    return Inventario.objects.filter(producto=OuterRef('pk')).order_by().values('producto').annotate(
+        total=Sum('cantidad')
+    ).values('total')
+
+
+def productos_descuadrados():
+    """
+    Productos cuyo stock no coincide con la suma de su inventario, en una sola
+    consulta agrupada. Devuelve una lista de (producto_id, stock, total_inventario).
+    """
+    return list(
+        Producto.objects.annotate(total=Coalesce(Subquery(_total_inventario()), Value(0)))
+        .exclude(stock=F('total'))
+        .order_by('pk')
+        .values_list('pk', 'stock', 'total')
+    )
+
+
+def corregir_stock(descuadrados):
+    """
+    Fija Producto.stock al total de inventario para las filas de
+    productos_descuadrados(). El total se recalcula dentro del mismo UPDATE
+    (subconsulta por producto), así un delta confirmado después de la lectura
+    no se pisa con un total viejo.
+    """
+    ids = sorted(producto_id for producto_id, _, _ in descuadrados)
+    for inicio in range(0, len(ids), TAMANO_LOTE):
+        Producto.objects.filter(pk__in=ids[inicio:inicio + TAMANO_LOTE]).update(
+            stock=Coalesce(Subquery(_total_inventario()), Value(0))
+        )
+    publicar_cambios(ids)
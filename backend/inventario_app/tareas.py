@@ -0,0 +1,24 @@
+from datetime import date
+
+from django.db import transaction
+
+from comun_app.cola import tarea
+from inventario_app.pronostico import pronosticar
+from inventario_app.stock import corregir_stock, productos_descuadrados
+
+# ---------------------------
+# TAREAS DIFERIDAS DE INVENTARIO (comun_app.cola)
+# ---------------------------
+@tarea('inventario.reconciliar_stock')
+def reconciliar_stock():
+    """Corrige Producto.stock de los productos descuadrados. Devuelve cuántos corrigió."""
+    with transaction.atomic():
+        descuadrados = productos_descuadrados()
+        corregir_stock(descuadrados)
+    return {'corregidos': len(descuadrados)}
+
+
+@tarea('inventario.pronosticar_demanda')
+def pronosticar_demanda(hoy=None, **parametros):
+    """Recalcula las sugerencias de reposición (parámetros de pronostico.pronosticar; `hoy` en ISO)."""
+    return pronosticar(hoy=date.fromisoformat(hoy) if hoy else None, **parametros)
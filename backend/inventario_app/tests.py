@@ -1,3 +1,463 @@
+from datetime import timedelta
+from io import StringIO
+from math import ceil, sqrt
+from statistics import NormalDist, mean, stdev
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from comun_app.versiones import obtener_versiones
+from inventario_app.ajustes import aplicar_ajustes
+from inventario_app.archivo import archivar_mes, historial_en_rango, meses_por_archivar
+from inventario_app.models import (
+    HistorialStock, HistorialStockArchivado, Inventario, ParticionHistorialStock, SnapshotStock,
+    SugerenciaReposicion, UmbralReposicion
+)
+from inventario_app.reservas import StockInsuficiente, liberar_stock, reservar_stock
+from inventario_app.snapshots import stock_en_fecha, tomar_snapshot
+from inventario_app.stock import CONTADOR_STOCK, aplicar_deltas_stock, corregir_stock, productos_descuadrados
+from marketing_app.models import Notificacion
+from pedidos_app.tests import PedidosTestMixin
+from productos_app.models import Producto
+from sucursales_app.models import Bodega, Sucursal
+from usuarios_app.models import Usuario
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class StockProductoTests(TestCase):
+    def setUp(self):
+        sucursal = Sucursal.objects.create(nombre_sucursal='Centro', direccion='Alameda 100')
+        self.bodega_a = Bodega.objects.create(nombre_bodega='A', sucursal=sucursal)
+        self.bodega_b = Bodega.objects.create(nombre_bodega='B', sucursal=sucursal)
+        self.taladro = Producto.objects.create(nombre_producto='Taladro', precio='1.00', codigo_producto='T-1')
+        self.sierra = Producto.objects.create(nombre_producto='Sierra', precio='1.00', codigo_producto='S-1')
+
+    def stock(self, producto):
+        producto.refresh_from_db(fields=['stock'])
+        return producto.stock
+
+    def test_cambios_de_inventario_aplican_el_delta(self):
+        inventario = Inventario.objects.create(producto=self.taladro, bodega=self.bodega_a, cantidad=10)
+        Inventario.objects.create(producto=self.taladro, bodega=self.bodega_b, cantidad=5)
+        self.assertEqual(self.stock(self.taladro), 15)
+
+        inventario.cantidad = 7
+        inventario.save()
+        self.assertEqual(self.stock(self.taladro), 12)
+
+        # Reasignar la fila a otro producto mueve su cantidad
+        inventario.producto = self.sierra
+        inventario.save()
+        self.assertEqual((self.stock(self.taladro), self.stock(self.sierra)), (5, 7))
+
+        inventario.delete()
+        self.assertEqual(self.stock(self.sierra), 0)
+
+    def test_borrado_en_cascada(self):
+        Inventario.objects.create(producto=self.taladro, bodega=self.bodega_a, cantidad=4)
+        Inventario.objects.create(producto=self.taladro, bodega=self.bodega_b, cantidad=6)
+        self.bodega_b.delete()
+        self.assertEqual(self.stock(self.taladro), 4)
+
+    def test_instancia_desactualizada_no_duplica_el_delta(self):
+        Inventario.objects.create(producto=self.taladro, bodega=self.bodega_a, cantidad=10)
+        copia = Inventario.objects.get(producto=self.taladro)
+        Inventario.objects.get(pk=copia.pk).save()  # otro guardado sin cambios
+        copia.cantidad = 8
+        copia.save()
+        self.assertEqual(self.stock(self.taladro), 8)
+
+    def test_borrar_instancia_desactualizada_descuenta_lo_guardado(self):
+        Inventario.objects.create(producto=self.taladro, bodega=self.bodega_a, cantidad=10)
+        copia = Inventario.objects.get(producto=self.taladro)
+        Inventario.objects.filter(pk=copia.pk).update(cantidad=3)
+        aplicar_deltas_stock({self.taladro.pk: -7})
+        copia.delete()
+        self.assertEqual(self.stock(self.taladro), 0)
+
+    def test_contador_de_stock_se_publica_una_vez_al_confirmar(self):
+        def versiones():
+            actuales = obtener_versiones([Producto, CONTADOR_STOCK])
+            return actuales['productos_app.producto'][0], actuales[CONTADOR_STOCK][0]
+
+        producto, stock = versiones()
+        with self.captureOnCommitCallbacks(execute=True):
+            Inventario.objects.create(producto=self.taladro, bodega=self.bodega_a, cantidad=4)
+            Inventario.objects.create(producto=self.sierra, bodega=self.bodega_a, cantidad=2)
+            self.assertEqual(versiones(), (producto, stock))
+        # La versión de Producto (catálogo, autocompletar) no se mueve con el stock
+        self.assertEqual(versiones(), (producto, stock + 1))
+
+    def test_corregir_recalcula_el_total_al_escribir(self):
+        Inventario.objects.create(producto=self.taladro, bodega=self.bodega_a, cantidad=10)
+        Producto.objects.filter(pk=self.taladro.pk).update(stock=3)
+        descuadrados = productos_descuadrados()
+        # Un delta confirmado entre la lectura y la corrección no se pisa
+        Inventario.objects.filter(producto=self.taladro).update(cantidad=12)
+        aplicar_deltas_stock({self.taladro.pk: 2})
+        corregir_stock(descuadrados)
+        self.assertEqual(self.stock(self.taladro), 12)
+
+    def test_descuadre_queda_en_el_log(self):
+        with self.assertLogs('inventario_app.stock', 'WARNING') as registro:
+            aplicar_deltas_stock({self.taladro.pk: -3})
+        self.assertEqual(self.stock(self.taladro), 0)
+        self.assertIn(f'Producto {self.taladro.pk}', registro.output[0])
+
+    def test_reconciliar_stock(self):
+        Inventario.objects.create(producto=self.taladro, bodega=self.bodega_a, cantidad=3)
+        Producto.objects.filter(pk=self.taladro.pk).update(stock=9)
+        Producto.objects.filter(pk=self.sierra.pk).update(stock=2)
+
+        salida = StringIO()
+        call_command('reconciliar_stock', stdout=salida)
+        self.assertIn('2 productos descuadrados', salida.getvalue())
+        self.assertEqual(self.stock(self.taladro), 9)
+
+        call_command('reconciliar_stock', '--aplicar', stdout=StringIO())
+        self.assertEqual((self.stock(self.taladro), self.stock(self.sierra)), (3, 0))
+        salida = StringIO()
+        call_command('reconciliar_stock', stdout=salida)
+        self.assertIn('coincide', salida.getvalue())
+
+
+class ReservaStockTests(TestCase):
+    def setUp(self):
+        sucursal = Sucursal.objects.create(nombre_sucursal='Norte', direccion='Independencia 500')
+        self.bodega = Bodega.objects.create(nombre_bodega='Principal', sucursal=sucursal)
+        self.clavos = Producto.objects.create(nombre_producto='Clavos', precio='1.00', codigo_producto='C-1')
+        self.tornillos = Producto.objects.create(nombre_producto='Tornillos', precio='1.00', codigo_producto='T-2')
+        Inventario.objects.create(producto=self.clavos, bodega=self.bodega, cantidad=10)
+        Inventario.objects.create(producto=self.tornillos, bodega=self.bodega, cantidad=3)
+
+    def cantidades(self):
+        return dict(Inventario.objects.values_list('producto_id', 'cantidad'))
+
+    def test_reserva_todas_las_lineas(self):
+        reservar_stock([
+            (self.clavos.pk, self.bodega.pk, 4), (self.tornillos.pk, self.bodega.pk, 3),
+            (self.clavos.pk, self.bodega.pk, 1),  # líneas repetidas se suman
+        ])
+        self.assertEqual(self.cantidades(), {self.clavos.pk: 5, self.tornillos.pk: 0})
+        self.assertEqual(
+            sorted(HistorialStock.objects.values_list('producto_id', 'cantidad_cambiada')),
+            sorted([(self.clavos.pk, -5), (self.tornillos.pk, -3)]),
+        )
+        self.clavos.refresh_from_db()
+        self.assertEqual(self.clavos.stock, 5)
+
+    def test_falta_stock_no_modifica_nada(self):
+        with self.assertRaises(StockInsuficiente) as contexto:
+            reservar_stock([
+                (self.clavos.pk, self.bodega.pk, 2), (self.tornillos.pk, self.bodega.pk, 5),
+                (self.clavos.pk, self.bodega.pk + 1, 1),
+            ])
+        self.assertEqual(contexto.exception.faltantes, [
+            {'producto_id': self.clavos.pk, 'bodega_id': self.bodega.pk + 1, 'solicitado': 1, 'disponible': 0},
+            {'producto_id': self.tornillos.pk, 'bodega_id': self.bodega.pk, 'solicitado': 5, 'disponible': 3},
+        ])
+        self.assertEqual(self.cantidades(), {self.clavos.pk: 10, self.tornillos.pk: 3})
+        self.assertFalse(HistorialStock.objects.exists())
+
+    def test_liberar_devuelve_lo_reservado(self):
+        lineas = [(self.clavos.pk, self.bodega.pk, 6)]
+        reservar_stock(lineas)
+        liberar_stock(lineas)
+        self.assertEqual(self.cantidades()[self.clavos.pk], 10)
+        self.assertEqual(HistorialStock.objects.filter(cantidad_cambiada=6).count(), 1)
+
+
+class StockEnFechaTests(TestCase):
+    def setUp(self):
+        sucursal = Sucursal.objects.create(nombre_sucursal='Sur', direccion='Gran Avenida 900')
+        self.bodega = Bodega.objects.create(nombre_bodega='Principal', sucursal=sucursal)
+        self.producto = Producto.objects.create(nombre_producto='Pala', precio='1.00', codigo_producto='P-1')
+        self.inicio = timezone.now() - timedelta(days=10)
+
+    def movimiento(self, dias, cantidad):
+        historial = HistorialStock.objects.create(producto=self.producto, bodega=self.bodega, cantidad_cambiada=cantidad)
+        HistorialStock.objects.filter(pk=historial.pk).update(fecha=self.inicio + timedelta(days=dias))
+
+    def en_fecha(self, dias):
+        cantidades, _ = stock_en_fecha(self.inicio + timedelta(days=dias))
+        return cantidades.get((self.producto.pk, self.bodega.pk))
+
+    def test_snapshot_mas_movimientos_posteriores(self):
+        self.movimiento(0, 20)
+        self.movimiento(1, -5)
+        tomar_snapshot(self.inicio + timedelta(days=2))
+        self.movimiento(3, -4)
+        self.movimiento(5, 10)
+
+        self.assertEqual(SnapshotStock.objects.get().cantidad, 15)
+        self.assertEqual(self.en_fecha(0.5), 20)   # anterior al snapshot
+        self.assertEqual(self.en_fecha(4), 11)
+        tomar_snapshot(self.inicio + timedelta(days=6))
+        self.assertEqual(SnapshotStock.objects.order_by('-fecha').first().cantidad, 21)
+        self.assertEqual(self.en_fecha(7), 21)
+        with self.assertRaises(ValueError):
+            tomar_snapshot(self.inicio + timedelta(days=6))
+
+    def test_movimiento_confirmado_tarde_no_se_pierde(self):
+        self.movimiento(0, 20)
+        with self.assertRaises(ValueError):
+            tomar_snapshot(timezone.now())
+        tomar_snapshot()
+        # Un movimiento con fecha de hace un minuto que se confirma después del snapshot
+        historial = HistorialStock.objects.create(producto=self.producto, bodega=self.bodega, cantidad_cambiada=-3)
+        HistorialStock.objects.filter(pk=historial.pk).update(fecha=timezone.now() - timedelta(minutes=1))
+        cantidades, _ = stock_en_fecha(timezone.now())
+        self.assertEqual(cantidades[self.producto.pk, self.bodega.pk], 17)
+
+    def test_endpoint(self):
+        self.movimiento(0, 8)
+        client = APIClient()
+        client.force_authenticate(Usuario.objects.create_user('auditor', 'clave-segura'))
+        response = client.get('/api/inventario/historial-stock/stock-en-fecha/', {
+            'fecha': (self.inicio + timedelta(days=1)).isoformat(), 'producto': self.producto.pk,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['resultados'], [
+            {'producto': self.producto.pk, 'bodega': self.bodega.pk, 'cantidad': 8},
+        ])
+        self.assertEqual(client.get('/api/inventario/historial-stock/stock-en-fecha/').status_code, 400)
+
+
+class AjusteMasivoTests(TestCase):
+    url = '/api/inventario/inventarios/ajuste-masivo/'
+
+    def setUp(self):
+        sucursal = Sucursal.objects.create(nombre_sucursal='Oriente', direccion='Tobalaba 10')
+        self.bodega = Bodega.objects.create(nombre_bodega='Principal', sucursal=sucursal)
+        self.brocha = Producto.objects.create(nombre_producto='Brocha', precio='1.00', codigo_producto='B-1')
+        self.rodillo = Producto.objects.create(nombre_producto='Rodillo', precio='1.00', codigo_producto='R-1')
+        Inventario.objects.create(producto=self.brocha, bodega=self.bodega, cantidad=5)
+        self.client = APIClient()
+        self.client.force_authenticate(Usuario.objects.create_user('bodeguero', 'clave-segura'))
+
+    def ajuste(self, producto, delta):
+        return {'producto': producto.pk, 'bodega': self.bodega.pk, 'delta': delta}
+
+    def test_aplica_upsert_e_historial(self):
+        response = self.client.post(self.url, {'ajustes': [
+            self.ajuste(self.brocha, -2), self.ajuste(self.rodillo, 7), self.ajuste(self.brocha, 4),
+        ], 'motivo': 'Conteo cíclico'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(r['cantidad_anterior'], r['cantidad_nueva']) for r in response.data['resultados']],
+                         [(5, 3), (0, 7), (3, 7)])
+        self.assertIn('duracion_ms', response.data)
+        self.assertEqual(dict(Inventario.objects.values_list('producto_id', 'cantidad')),
+                         {self.brocha.pk: 7, self.rodillo.pk: 7})
+        self.assertEqual(HistorialStock.objects.filter(motivo='Conteo cíclico').count(), 3)
+        self.rodillo.refresh_from_db()
+        self.assertEqual(self.rodillo.stock, 7)
+
+    def test_un_error_cancela_el_lote(self):
+        response = self.client.post(self.url, {'ajustes': [
+            self.ajuste(self.rodillo, 3), self.ajuste(self.brocha, -9),
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([r['estado'] for r in response.data['resultados']], ['ok', 'error'])
+        self.assertFalse(Inventario.objects.filter(producto=self.rodillo).exists())
+
+    def test_parcial_aplica_los_validos(self):
+        response = self.client.post(self.url, {'parcial': True, 'ajustes': [
+            self.ajuste(self.rodillo, 3), self.ajuste(self.brocha, -9),
+            {'producto': self.brocha.pk, 'bodega': self.bodega.pk + 100, 'delta': 1},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['ajustes_aplicados'], response.data['errores']), (1, 2))
+        self.assertEqual(Inventario.objects.get(producto=self.rodillo).cantidad, 3)
+
+    def test_par_nuevo_se_bloquea_y_acumula(self):
+        # La fila nueva se inserta en cero y se relee bajo bloqueo: el segundo lote parte de lo escrito
+        aplicar_ajustes([self.ajuste(self.rodillo, 4)])
+        ok, resultados = aplicar_ajustes([self.ajuste(self.rodillo, 3)])
+        self.assertTrue(ok)
+        self.assertEqual(resultados[0]['cantidad_anterior'], 4)
+        self.assertEqual(Inventario.objects.get(producto=self.rodillo).cantidad, 7)
+        self.rodillo.refresh_from_db()
+        self.assertEqual(self.rodillo.stock, 7)
+
+
+class UmbralReposicionTests(TestCase):
+    def setUp(self):
+        sucursal = Sucursal.objects.create(nombre_sucursal='Sur', direccion='Gran Avenida 500')
+        self.bodega = Bodega.objects.create(nombre_bodega='Principal', sucursal=sucursal)
+        self.clavo = Producto.objects.create(nombre_producto='Clavo', precio='1.00', codigo_producto='C-1')
+        self.tornillo = Producto.objects.create(nombre_producto='Tornillo', precio='1.00', codigo_producto='T-2')
+        self.inventario = Inventario.objects.create(producto=self.clavo, bodega=self.bodega, cantidad=10)
+        self.umbral = UmbralReposicion.objects.create(producto=self.clavo, bodega=self.bodega, umbral=3)
+
+    def test_alerta_una_vez_por_cruce(self):
+        reservar_stock([(self.clavo.pk, self.bodega.pk, 6)])
+        self.assertEqual(Notificacion.objects.count(), 0)
+        reservar_stock([(self.clavo.pk, self.bodega.pk, 2)])
+        self.assertEqual(Notificacion.objects.count(), 1)
+        self.assertIn('Clavo', Notificacion.objects.get().titulo)
+        # Seguir bajo el umbral no repite la alerta
+        reservar_stock([(self.clavo.pk, self.bodega.pk, 1)])
+        self.assertEqual(Notificacion.objects.count(), 1)
+        # Reponer rearma la alerta y el siguiente cruce vuelve a notificar
+        aplicar_ajustes([{'producto': self.clavo.pk, 'bodega': self.bodega.pk, 'delta': 20}])
+        self.umbral.refresh_from_db()
+        self.assertFalse(self.umbral.alerta_activa)
+        self.inventario.refresh_from_db()
+        self.inventario.cantidad = 0
+        self.inventario.save()
+        self.assertEqual(Notificacion.objects.count(), 2)
+
+    def test_borrar_inventario_alerta_pero_no_borrar_bodega(self):
+        self.inventario.delete()
+        self.assertEqual(Notificacion.objects.count(), 1)
+        otro = Inventario.objects.create(producto=self.clavo, bodega=self.bodega, cantidad=1)
+        self.assertEqual(Notificacion.objects.count(), 1)
+        otro.bodega.delete()
+        self.assertEqual(Notificacion.objects.count(), 1)
+
+    def test_solo_evalua_los_pares_modificados(self):
+        # Cambiar un producto sin umbral no toca las demás filas ni notifica
+        Inventario.objects.create(producto=self.tornillo, bodega=self.bodega, cantidad=0)
+        UmbralReposicion.objects.filter(pk=self.umbral.pk).update(umbral=50)
+        with CaptureQueriesContext(connection) as contexto:
+            aplicar_ajustes([{'producto': self.tornillo.pk, 'bodega': self.bodega.pk, 'delta': 1}])
+        self.assertEqual(Notificacion.objects.count(), 0)
+        consultas = [q['sql'] for q in contexto.captured_queries if 'umbral_reposicion' in q['sql']]
+        self.assertEqual(len(consultas), 1)
+
+    def test_api_evalua_el_umbral_nuevo(self):
+        client = APIClient()
+        client.force_authenticate(Usuario.objects.create_superuser('admin', 'clave-segura'))
+        response = client.patch(f'/api/inventario/umbrales-reposicion/{self.umbral.pk}/', {'umbral': 15},
+                                format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['alerta_activa'])
+        self.assertEqual(Notificacion.objects.count(), 1)
+
+
+class ArchivoHistorialTests(TestCase):
+    url = '/api/inventario/historial-stock/'
+
+    def setUp(self):
+        sucursal = Sucursal.objects.create(nombre_sucursal='Norte', direccion='Independencia 300')
+        self.bodega = Bodega.objects.create(nombre_bodega='Principal', sucursal=sucursal)
+        self.producto = Producto.objects.create(nombre_producto='Yeso', precio='1.00', codigo_producto='Y-1')
+        self.ahora = timezone.now()
+        # Un movimiento a mitad de cada uno de los últimos 10 meses (del más antiguo al más nuevo)
+        self.fechas = [self.ahora - timedelta(days=30 * meses + 15) for meses in range(9, -1, -1)]
+        for indice, fecha in enumerate(self.fechas):
+            historial = HistorialStock.objects.create(producto=self.producto, bodega=self.bodega,
+                                                      cantidad_cambiada=indice + 1)
+            HistorialStock.objects.filter(pk=historial.pk).update(fecha=fecha)
+        self.ids = list(HistorialStock.objects.order_by('fecha').values_list('pk', flat=True))
+        self.client = APIClient()
+        self.client.force_authenticate(Usuario.objects.create_user('auditor', 'clave-segura'))
+
+    def archivar(self, meses_activos=3):
+        for inicio in meses_por_archivar(meses_activos):
+            archivar_mes(inicio, lote=2)
+
+    def listar(self, **parametros):
+        ids, url = [], self.url
+        while url:
+            response = self.client.get(url, {**parametros, 'page_size': 3} if url == self.url else None)
+            self.assertEqual(response.status_code, 200)
+            ids += [fila['id'] for fila in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_mueve_meses_antiguos_conservando_ids(self):
+        self.archivar()
+        archivados = set(HistorialStockArchivado.objects.values_list('pk', flat=True))
+        self.assertTrue(archivados)
+        self.assertFalse(archivados & set(HistorialStock.objects.values_list('pk', flat=True)))
+        self.assertEqual(archivados | set(HistorialStock.objects.values_list('pk', flat=True)), set(self.ids))
+        self.assertTrue(all(ParticionHistorialStock.objects.values_list('completa', flat=True)))
+        # Volver a ejecutar no mueve nada
+        self.assertEqual(meses_por_archivar(3), [])
+
+    def test_listado_por_rango_usa_la_particion_correcta(self):
+        self.archivar()
+        limite = ParticionHistorialStock.objects.order_by('-hasta').first().hasta
+        todos = list(reversed(self.ids))  # orden por -fecha
+        # Sin rango: solo los meses activos
+        self.assertEqual(self.listar(), list(HistorialStock.objects.order_by('-fecha').values_list('pk', flat=True)))
+        # Rango completamente archivado: solo se consulta el archivo
+        self.assertIs(historial_en_rango(hasta=limite - timedelta(days=1)).model, HistorialStockArchivado)
+        antiguos = self.listar(fecha_hasta=(limite - timedelta(days=1)).isoformat())
+        self.assertEqual(antiguos, list(HistorialStockArchivado.objects.order_by('-fecha').values_list('pk', flat=True)))
+        # Rango que cruza el límite: ambas tablas mezcladas en orden y paginadas
+        desde = (self.fechas[0] - timedelta(days=1)).isoformat()
+        self.assertEqual(self.listar(fecha_desde=desde), todos)
+        self.assertEqual(self.client.get(self.url, {'fecha_desde': self.ahora.isoformat(),
+                                                    'fecha_hasta': desde}).status_code, 400)
+
+    def test_stock_en_fecha_incluye_lo_archivado(self):
+        antes, _ = stock_en_fecha(self.ahora)
+        self.archivar()
+        self.assertEqual(stock_en_fecha(self.ahora)[0], antes)
+        self.assertEqual(stock_en_fecha(self.fechas[1])[0], {(self.producto.pk, self.bodega.pk): 3})
+
+
+@skipUnless(numpy, "requiere NumPy")
+class PronosticoDemandaTests(PedidosTestMixin, TestCase):
+    def setUp(self):
+        self.crear_datos_base()
+        self.bodega = self.crear_bodega('Centro', self.comuna_santiago)
+        self.cemento = self.crear_producto('CEM')
+        self.arena = self.crear_producto('ARE')
+        self.hoy = timezone.now().date()
+        Inventario.objects.create(producto=self.cemento, bodega=self.bodega, cantidad=10)
+        # Salidas de cemento: 2 unidades día por medio y 6 el último día
+        self.diarias = [0] * 60
+        for dia in range(0, 59, 2):
+            self.diarias[dia] = 2
+        self.diarias[59] = 6
+        for dia, cantidad in enumerate(self.diarias):
+            if cantidad:
+                self.salida(self.cemento, cantidad, 59 - dia)
+
+    def salida(self, producto, cantidad, hace_dias):
+        historial = HistorialStock.objects.create(producto=producto, bodega=self.bodega, cantidad_cambiada=-cantidad)
+        HistorialStock.objects.filter(pk=historial.pk).update(fecha=timezone.now() - timedelta(days=hace_dias))
+
+    def test_calcula_promedio_desviacion_y_punto_de_reorden(self):
+        from inventario_app.pronostico import pronosticar
+
+        resumen = pronosticar(dias=60, ventana=28, plazo=7, revision=7, nivel_servicio=0.95, hoy=self.hoy)
+        self.assertEqual(resumen['skus'], 1)
+        sugerencia = SugerenciaReposicion.objects.get()
+        demanda, desviacion = mean(self.diarias[-28:]), stdev(self.diarias)
+        self.assertAlmostEqual(sugerencia.demanda_diaria, demanda)
+        self.assertAlmostEqual(sugerencia.desviacion_diaria, desviacion)
+        stock_seguridad = ceil(NormalDist().inv_cdf(0.95) * desviacion * sqrt(7))
+        self.assertEqual(sugerencia.stock_seguridad, stock_seguridad)
+        self.assertEqual(sugerencia.punto_reorden, ceil(demanda * 7 + stock_seguridad))
+        self.assertEqual(sugerencia.stock_actual, 10)
+        # 10 unidades quedan bajo el punto de reorden: se sugiere completar hasta el objetivo
+        self.assertEqual(sugerencia.cantidad_sugerida, sugerencia.punto_reorden + ceil(demanda * 7) - 10)
+
+    def test_pedidos_sin_asignar_cuentan_como_demanda_sin_bodega(self):
+        from inventario_app.pronostico import pronosticar
+
+        self.crear_pedido([(self.arena, 14)])
+        pronosticar(dias=7, ventana=7, hoy=self.hoy)
+        sugerencia = SugerenciaReposicion.objects.get(producto=self.arena)
+        self.assertIsNone(sugerencia.bodega_id)
+        self.assertEqual((sugerencia.demanda_diaria, sugerencia.stock_actual), (2.0, 0))
+        self.assertGreater(sugerencia.cantidad_sugerida, 0)
 
-# Create your tests here.
+        client = APIClient()
+        client.force_authenticate(Usuario.objects.create_user('comprador', 'clave-segura'))
+        response = client.get('/api/inventario/sugerencias-reposicion/', {'solo_reponer': 'true'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['producto'], self.arena.pk)
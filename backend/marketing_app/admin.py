@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Promocion, ProductoPromocion, Notificacion, ClienteNotificacion
+from .models import Promocion, ProductoPromocion, PrecioEfectivo, Notificacion, ClienteNotificacion
 
 @admin.register(Promocion)
 class PromocionAdmin(admin.ModelAdmin):
@@ -18,6 +18,12 @@ class ProductoPromocionAdmin(admin.ModelAdmin):
     search_fields = ('producto__nombre_producto', 'promocion__nombre')
     list_filter = ('promocion',)
 
+@admin.register(PrecioEfectivo)
+class PrecioEfectivoAdmin(admin.ModelAdmin):
+    list_display = ('producto', 'cantidad_minima', 'precio_base', 'precio', 'promocion', 'proximo_cambio')
+    search_fields = ('producto__nombre_producto', 'producto__codigo_producto')
+    list_filter = ('promocion',)
+
 @admin.register(Notificacion)
 class NotificacionAdmin(admin.ModelAdmin):
     list_display = ('titulo', 'fecha_envio')
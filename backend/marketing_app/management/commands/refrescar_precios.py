@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from marketing_app.precios import refrescar_precios_vencidos, refrescar_todos
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula la tabla de precios efectivos. Por defecto procesa solo los productos cuyas "
+        "promociones empezaron o terminaron desde el último cálculo (programar cada pocos minutos). "
+        "Con --todos recalcula el catálogo completo (p. ej. tras la primera instalación)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--todos', action='store_true', help="Recalcula todos los productos")
+
+    def handle(self, *args, **options):
+        refrescados = refrescar_todos() if options['todos'] else refrescar_precios_vencidos()
+        self.stdout.write(self.style.SUCCESS(f"{refrescados} productos recalculados."))
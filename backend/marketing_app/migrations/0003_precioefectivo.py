@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketing_app', '0002_initial'),
+        ('productos_app', '0003_producto_productos_precio_0725e3_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrecioEfectivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad_minima', models.PositiveIntegerField(default=1)),
+                ('precio_base', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('precio', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('porcentaje_descuento', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('proximo_cambio', models.DateTimeField(blank=True, help_text='Inicio o fin de promoción más cercano; el tramo debe recalcularse entonces', null=True)),
+                ('fecha_calculo', models.DateTimeField(auto_now=True)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='precios_efectivos', to='productos_app.producto')),
+                ('promocion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='marketing_app.promocion')),
+            ],
+            options={
+                'verbose_name': 'Precio Efectivo',
+                'verbose_name_plural': 'Precios Efectivos',
+                'db_table': 'precio_efectivo',
+                'indexes': [models.Index(fields=['proximo_cambio'], name='precio_efec_proximo_c0174a_idx')],
+                'unique_together': {('producto', 'cantidad_minima')},
+            },
+        ),
+    ]
@@ -0,0 +1,80 @@
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import migrations
+from django.utils import timezone
+
+# Copia congelada del cálculo de marketing_app.precios a la fecha de esta
+# migración: no se importa el código de la app para que cambios posteriores no
+# rompan la migración desde cero.
+TAMANO_LOTE = 500
+CENTAVO = Decimal('0.01')
+
+
+def _aplicar_descuento(precio_base, porcentaje):
+    precio = precio_base * (Decimal(100) - porcentaje) / Decimal(100)
+    return max(precio, Decimal(0)).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+
+
+def _tramos(precio_base, promociones, ahora):
+    """[(cantidad_minima, precio, promocion_id, porcentaje)] y próximo cambio; promociones: tuplas de values_list."""
+    vigentes = [p for p in promociones if p[3] <= ahora < p[4]]
+    cambios = [p[4] for p in vigentes] + [p[3] for p in promociones if p[3] > ahora]
+    tramos = [(1, precio_base, None, Decimal(0))]
+    mejor = None
+    # p = (promocion_id, porcentaje, cantidad_minima, fecha_inicio, fecha_fin)
+    for promocion_id, porcentaje, cantidad_minima, _, _ in sorted(vigentes, key=lambda p: (max(p[2], 1), -p[1])):
+        if mejor is not None and porcentaje <= mejor:
+            continue
+        mejor = porcentaje
+        tramo = (max(cantidad_minima, 1), _aplicar_descuento(precio_base, porcentaje), promocion_id, porcentaje)
+        if tramo[0] == tramos[-1][0]:
+            tramos[-1] = tramo
+        else:
+            tramos.append(tramo)
+    return tramos, min(cambios, default=None)
+
+
+def poblar_precios(apps, schema_editor):
+    # Igual que refrescar_precios --todos, con los modelos históricos: sin esto
+    # el catálogo no muestra precio a los productos existentes hasta el primer refresco
+    Producto = apps.get_model('productos_app', 'Producto')
+    ProductoPromocion = apps.get_model('marketing_app', 'ProductoPromocion')
+    PrecioEfectivo = apps.get_model('marketing_app', 'PrecioEfectivo')
+    ahora = timezone.now()
+    ids = list(Producto.objects.order_by('pk').values_list('pk', flat=True))
+    for inicio in range(0, len(ids), TAMANO_LOTE):
+        lote = ids[inicio:inicio + TAMANO_LOTE]
+        precios = dict(Producto.objects.filter(pk__in=lote).values_list('pk', 'precio'))
+        promociones = defaultdict(list)
+        for producto_id, *datos in ProductoPromocion.objects.filter(
+            producto_id__in=lote, promocion__activa=True, promocion__fecha_fin__gt=ahora
+        ).values_list(
+            'producto_id', 'promocion_id', 'promocion__porcentaje_descuento',
+            'promocion__cantidad_minima_productos', 'promocion__fecha_inicio', 'promocion__fecha_fin',
+        ):
+            promociones[producto_id].append(tuple(datos))
+        nuevos = []
+        for producto_id, precio_base in precios.items():
+            tramos, proximo_cambio = _tramos(precio_base, promociones[producto_id], ahora)
+            nuevos.extend(
+                PrecioEfectivo(
+                    producto_id=producto_id, cantidad_minima=cantidad_minima, precio_base=precio_base,
+                    precio=precio, promocion_id=promocion_id,
+                    porcentaje_descuento=porcentaje, proximo_cambio=proximo_cambio,
+                )
+                for cantidad_minima, precio, promocion_id, porcentaje in tramos
+            )
+        PrecioEfectivo.objects.filter(producto_id__in=lote).delete()
+        PrecioEfectivo.objects.bulk_create(nuevos)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketing_app', '0003_precioefectivo'),
+    ]
+
+    operations = [
+        migrations.RunPython(poblar_precios, migrations.RunPython.noop),
+    ]
@@ -37,6 +37,36 @@ class ProductoPromocion(models.Model):
     def __str__(self):
         return f"{self.producto.nombre_producto} en promoción ({self.promocion.descripcion[:20]}...)"
 
+class PrecioEfectivo(models.Model):
+    """
+    Precio vigente precalculado por producto y tramo de cantidad.
+
+    Cada producto tiene siempre el tramo cantidad_minima=1; los tramos mayores solo
+    existen si una promoción con cantidad_minima_productos mayor mejora el descuento.
+    El precio para una cantidad n es el del tramo con mayor cantidad_minima <= n.
+    Se mantiene desde marketing_app.precios; no se edita a mano.
+    """
+    producto = models.ForeignKey('productos_app.Producto', on_delete=models.CASCADE, related_name='precios_efectivos')
+    cantidad_minima = models.PositiveIntegerField(default=1)
+    precio_base = models.DecimalField(max_digits=10, decimal_places=2)
+    precio = models.DecimalField(max_digits=10, decimal_places=2)
+    promocion = models.ForeignKey(Promocion, on_delete=models.SET_NULL, null=True, blank=True)
+    porcentaje_descuento = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    proximo_cambio = models.DateTimeField(null=True, blank=True, help_text="Inicio o fin de promoción más cercano; el tramo debe recalcularse entonces")
+    fecha_calculo = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'precio_efectivo'
+        verbose_name = 'Precio Efectivo'
+        verbose_name_plural = 'Precios Efectivos'
+        unique_together = ('producto', 'cantidad_minima')
+        indexes = [
+            models.Index(fields=['proximo_cambio']),
+        ]
+
+    def __str__(self):
+        return f"Producto {self.producto_id} desde {self.cantidad_minima} u.: {self.precio}"
+
 class Notificacion(models.Model):
     # TIPO_NOTIFICACION_CHOICES = [ ('PEDIDO', 'Pedido'), ('STOCK', 'Stock'), ('PROMOCION', 'Promoción'), ('GENERAL', 'General'), ]
     # tipo_notificacion = models.CharField(max_length=20, choices=TIPO_NOTIFICACION_CHOICES, default='GENERAL')
@@ -0,0 +1,165 @@
+from collections import defaultdict, namedtuple
+from decimal import ROUND_HALF_UP, Decimal
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from comun_app.versiones import incrementar_version
+from marketing_app.models import PrecioEfectivo, ProductoPromocion
+from productos_app import cache_catalogo
+from productos_app.models import Producto
+
+# ---------------------------
+# PRECIOS EFECTIVOS (PRECIO + PROMOCIÓN VIGENTE)
+# ---------------------------
+# La tabla precio_efectivo se recalcula por producto cuando cambian su precio,
+# sus promociones o cuando llega el `proximo_cambio` (inicio/fin de una
+# promoción), que procesa periódicamente el comando `refrescar_precios`.
+
+CENTAVO = Decimal('0.01')
+TAMANO_LOTE = 500
+
+PromocionProducto = namedtuple(
+    'PromocionProducto', 'promocion_id porcentaje cantidad_minima fecha_inicio fecha_fin'
+)
+Tramo = namedtuple('Tramo', 'cantidad_minima precio promocion_id porcentaje')
+
+
+def aplicar_descuento(precio_base, porcentaje):
+    precio = precio_base * (Decimal(100) - porcentaje) / Decimal(100)
+    return max(precio, Decimal(0)).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+
+
+def calcular_tramos(precio_base, promociones, ahora):
+    """
+    Calcula los tramos de precio de un producto y el próximo instante en que
+    deben recalcularse. Si varias promociones vigentes aplican a una cantidad,
+    gana la de mayor descuento.
+    """
+    vigentes = [p for p in promociones if p.fecha_inicio <= ahora < p.fecha_fin]
+    cambios = [p.fecha_fin for p in vigentes] + [p.fecha_inicio for p in promociones if p.fecha_inicio > ahora]
+    proximo_cambio = min(cambios, default=None)
+
+    tramos = [Tramo(1, precio_base, None, Decimal(0))]
+    mejor = None
+    for promocion in sorted(vigentes, key=lambda p: (max(p.cantidad_minima, 1), -p.porcentaje)):
+        if mejor is not None and promocion.porcentaje <= mejor.porcentaje:
+            continue
+        mejor = promocion
+        tramo = Tramo(
+            max(promocion.cantidad_minima, 1),
+            aplicar_descuento(precio_base, promocion.porcentaje),
+            promocion.promocion_id,
+            promocion.porcentaje,
+        )
+        if tramo.cantidad_minima == tramos[-1].cantidad_minima:
+            tramos[-1] = tramo
+        else:
+            tramos.append(tramo)
+    return tramos, proximo_cambio
+
+
+def _lotes(ids):
+    ids = list(ids)
+    for inicio in range(0, len(ids), TAMANO_LOTE):
+        yield ids[inicio:inicio + TAMANO_LOTE]
+
+
+def _invalidar_cache(productos_ids):
+    for producto_id in productos_ids:
+        cache_catalogo.invalidar('producto', producto_id)
+
+
+def refrescar_precios(productos_ids, ahora=None):
+    """Recalcula los tramos de los productos indicados (en lotes, una transacción por lote)."""
+    ahora = ahora or timezone.now()
+    refrescados = 0
+    for lote in _lotes(set(productos_ids)):
+        precios = dict(Producto.objects.filter(pk__in=lote).values_list('pk', 'precio'))
+        promociones = defaultdict(list)
+        filas = ProductoPromocion.objects.filter(
+            producto_id__in=lote, promocion__activa=True, promocion__fecha_fin__gt=ahora
+        ).values_list(
+            'producto_id', 'promocion_id', 'promocion__porcentaje_descuento',
+            'promocion__cantidad_minima_productos', 'promocion__fecha_inicio', 'promocion__fecha_fin',
+        )
+        for producto_id, *datos in filas:
+            promociones[producto_id].append(PromocionProducto(*datos))
+
+        nuevos = []
+        for producto_id, precio_base in precios.items():
+            tramos, proximo_cambio = calcular_tramos(precio_base, promociones[producto_id], ahora)
+            nuevos.extend(
+                PrecioEfectivo(
+                    producto_id=producto_id, cantidad_minima=tramo.cantidad_minima, precio_base=precio_base,
+                    precio=tramo.precio, promocion_id=tramo.promocion_id,
+                    porcentaje_descuento=tramo.porcentaje, proximo_cambio=proximo_cambio,
+                )
+                for tramo in tramos
+            )
+        with transaction.atomic():
+            PrecioEfectivo.objects.filter(producto_id__in=lote).delete()
+            PrecioEfectivo.objects.bulk_create(nuevos)
+        transaction.on_commit(partial(_invalidar_cache, list(precios)))
+        refrescados += len(precios)
+    if refrescados:
+        incrementar_version(PrecioEfectivo)
+    return refrescados
+
+
+def refrescar_precios_vencidos(ahora=None):
+    """Recalcula solo los productos cuyo próximo cambio (inicio/fin de promoción) ya llegó."""
+    ahora = ahora or timezone.now()
+    ids = PrecioEfectivo.objects.filter(proximo_cambio__lte=ahora).values_list('producto_id', flat=True).distinct()
+    return refrescar_precios(list(ids), ahora)
+
+
+def refrescar_todos(ahora=None):
+    return refrescar_precios(Producto.objects.values_list('pk', flat=True).iterator(), ahora)
+
+
+# ---------------------------
+# LECTURA
+# ---------------------------
+def precio_efectivo_subquery(producto_ref='pk', cantidad_ref=None):
+    """
+    Subconsulta con el precio efectivo de OuterRef(producto_ref); si se indica
+    cantidad_ref, para esa cantidad. Lee una sola fila por índice (producto, cantidad_minima).
+    """
+    tramos = PrecioEfectivo.objects.filter(producto=OuterRef(producto_ref))
+    if cantidad_ref is None:
+        tramos = tramos.filter(cantidad_minima=1)
+    else:
+        tramos = tramos.filter(cantidad_minima__lte=OuterRef(cantidad_ref))
+    return Subquery(tramos.order_by('-cantidad_minima').values('precio')[:1])
+
+
+def anotar_precio_efectivo(queryset):
+    """Anota `precio_efectivo` en un queryset de Producto (precio de lista si aún no hay tramo)."""
+    return queryset.annotate(precio_efectivo=Coalesce(precio_efectivo_subquery(), F('precio')))
+
+
+def precios_para(cantidades):
+    """
+    Recibe {producto_id: cantidad} y devuelve {producto_id: Tramo} con el precio
+    unitario que corresponde a esa cantidad. Pensado para carrito y checkout.
+    """
+    if not cantidades:
+        return {}
+    resultado = {}
+    tramos = PrecioEfectivo.objects.filter(
+        producto_id__in=cantidades, cantidad_minima__lte=max(cantidades.values())
+    ).order_by('producto_id', 'cantidad_minima').values_list(
+        'producto_id', 'cantidad_minima', 'precio', 'promocion_id', 'porcentaje_descuento'
+    )
+    for producto_id, cantidad_minima, precio, promocion_id, porcentaje in tramos:
+        if cantidad_minima <= cantidades[producto_id]:
+            resultado[producto_id] = Tramo(cantidad_minima, precio, promocion_id, porcentaje)
+    faltantes = set(cantidades) - set(resultado)
+    if faltantes:
+        for producto_id, precio in Producto.objects.filter(pk__in=faltantes).values_list('pk', 'precio'):
+            resultado[producto_id] = Tramo(1, precio, None, Decimal(0))
+    return resultado
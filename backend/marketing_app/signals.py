@@ -0,0 +1,45 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from marketing_app.models import ProductoPromocion, Promocion
+from marketing_app.precios import refrescar_precios
+from productos_app.models import Producto
+from productos_app.signals import productos_modificados_masivo
+
+# ---------------------------
+# MANTENCIÓN DE PRECIOS EFECTIVOS
+# ---------------------------
+@receiver(post_save, sender=Producto)
+def refrescar_precio_producto(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refrescar_precios([instance.pk])
+
+@receiver(productos_modificados_masivo)
+def refrescar_precios_masivo(sender, productos_ids, **kwargs):
+    refrescar_precios(productos_ids)
+
+@receiver(post_save, sender=Promocion)
+def refrescar_precios_promocion(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refrescar_precios(ProductoPromocion.objects.filter(promocion=instance).values_list('producto_id', flat=True))
+
+@receiver(pre_delete, sender=Promocion)
+def recordar_productos_promocion(sender, instance, **kwargs):
+    instance._productos_ids = list(
+        ProductoPromocion.objects.filter(promocion=instance).values_list('producto_id', flat=True)
+    )
+
+@receiver(post_delete, sender=Promocion)
+def refrescar_precios_promocion_eliminada(sender, instance, **kwargs):
+    refrescar_precios(getattr(instance, '_productos_ids', []))
+
+@receiver(post_save, sender=ProductoPromocion)
+def refrescar_precio_producto_promocion(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refrescar_precios([instance.producto_id])
+
+@receiver(post_delete, sender=ProductoPromocion)
+def refrescar_precio_producto_promocion_eliminada(sender, instance, origin=None, **kwargs):
+    # Si el borrado viene en cascada desde la promoción o el producto, ya se refresca allí
+    if not isinstance(origin, (Promocion, Producto)):
+        refrescar_precios([instance.producto_id])
@@ -1,3 +1,63 @@
+from datetime import timedelta
+from decimal import Decimal
+
 from django.test import TestCase
+from django.utils import timezone
+
+from marketing_app.models import PrecioEfectivo, ProductoPromocion, Promocion
+from marketing_app.precios import precios_para, refrescar_precios_vencidos
+from productos_app.models import Producto
+
+
+class PrecioEfectivoTests(TestCase):
+    def setUp(self):
+        self.ahora = timezone.now()
+        self.producto = Producto.objects.create(nombre_producto='Cemento 25kg', precio='5000.00', codigo_producto='CEM-25')
+
+    def promocion(self, porcentaje, cantidad_minima=1, inicio=None, fin=None, activa=True):
+        promocion = Promocion.objects.create(
+            descripcion=f'{porcentaje}% desde {cantidad_minima}', porcentaje_descuento=porcentaje,
+            fecha_inicio=inicio or self.ahora - timedelta(days=1), fecha_fin=fin or self.ahora + timedelta(days=1),
+            cantidad_minima_productos=cantidad_minima, activa=activa,
+        )
+        ProductoPromocion.objects.create(producto=self.producto, promocion=promocion)
+        return promocion
+
+    def tramos(self):
+        return list(PrecioEfectivo.objects.filter(producto=self.producto)
+                    .order_by('cantidad_minima').values_list('cantidad_minima', 'precio'))
+
+    def test_producto_sin_promocion(self):
+        self.assertEqual(self.tramos(), [(1, Decimal('5000.00'))])
+
+    def test_tramos_por_cantidad(self):
+        self.promocion(10)
+        self.promocion(5, cantidad_minima=5)  # No mejora el 10%: no genera tramo
+        self.promocion(20, cantidad_minima=10)
+        self.assertEqual(self.tramos(), [(1, Decimal('4500.00')), (10, Decimal('4000.00'))])
+        precios = precios_para({self.producto.pk: 12})
+        self.assertEqual(precios[self.producto.pk].precio, Decimal('4000.00'))
+
+    def test_cambios_de_promocion_y_precio(self):
+        promocion = self.promocion(10)
+        promocion.activa = False
+        promocion.save()
+        self.assertEqual(self.tramos(), [(1, Decimal('5000.00'))])
+        promocion.activa = True
+        promocion.save()
+        self.producto.precio = '6000.00'
+        self.producto.save()
+        self.assertEqual(self.tramos(), [(1, Decimal('5400.00'))])
+        promocion.delete()
+        self.assertEqual(self.tramos(), [(1, Decimal('6000.00'))])
 
-# Create your tests here.
+    def test_refresco_incremental_al_iniciar_y_terminar(self):
+        inicio = self.ahora + timedelta(hours=1)
+        fin = self.ahora + timedelta(hours=2)
+        self.promocion(50, inicio=inicio, fin=fin)
+        self.assertEqual(self.tramos(), [(1, Decimal('5000.00'))])
+        self.assertEqual(refrescar_precios_vencidos(self.ahora), 0)
+        self.assertEqual(refrescar_precios_vencidos(inicio), 1)
+        self.assertEqual(self.tramos(), [(1, Decimal('2500.00'))])
+        refrescar_precios_vencidos(fin)
+        self.assertEqual(self.tramos(), [(1, Decimal('5000.00'))])
@@ -1,4 +1,5 @@
 from rest_framework import viewsets, permissions
+from comun_app.api.mixins import ConsultaCondicionalMixin, IdempotenciaMixin
 from pagos_app.models import TarjetaCliente, EstadoTransaccion, MetodoPago, TransaccionTarjetaCliente, RegistroContable
 from .serializers import (
     TarjetaClienteSerializer, EstadoTransaccionSerializer, MetodoPagoSerializer, 
@@ -18,12 +19,13 @@ class EstadoTransaccionViewSet(viewsets.ModelViewSet):
     serializer_class = EstadoTransaccionSerializer
     permission_classes = [permissions.IsAdminUser] # Generalmente administrado
 
-class MetodoPagoViewSet(viewsets.ModelViewSet):
+class MetodoPagoViewSet(ConsultaCondicionalMixin, viewsets.ModelViewSet):
     queryset = MetodoPago.objects.all()
+    condicional_modelos = (MetodoPago,)
     serializer_class = MetodoPagoSerializer
     permission_classes = [permissions.IsAdminUser] # Generalmente administrado
 
-class TransaccionTarjetaClienteViewSet(viewsets.ModelViewSet):
+class TransaccionTarjetaClienteViewSet(IdempotenciaMixin, viewsets.ModelViewSet):
     queryset = TransaccionTarjetaCliente.objects.all()
     serializer_class = TransaccionTarjetaClienteSerializer
     permission_classes = [permissions.IsAuthenticated] # El cliente podría ver sus transacciones
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class PagosAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pagos_app'
+
+    def ready(self):
+        from comun_app.versiones import registrar_modelos
+        from .models import MetodoPago
+
+        registrar_modelos(MetodoPago)
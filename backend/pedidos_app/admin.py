@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import EstadoPedido, TipoEntrega, Pedido, DetallePedido, PedidoProcesadoPor
+from .models import EstadoPedido, TipoEntrega, Pedido, DetallePedido, PedidoProcesadoPor, AsignacionDetalle, CargaPersonal
 
 @admin.register(EstadoPedido)
 class EstadoPedidoAdmin(admin.ModelAdmin):
@@ -17,12 +17,14 @@ class PedidoAdmin(admin.ModelAdmin):
     search_fields = ('id', 'cliente__nombre_completo')
     list_filter = ('estado_pedido', 'tipo_entrega', 'fecha')
     date_hierarchy = 'fecha'
+    list_select_related = ('cliente', 'estado_pedido', 'tipo_entrega')
 
 @admin.register(DetallePedido)
 class DetallePedidoAdmin(admin.ModelAdmin):
     list_display = ('pedido', 'producto', 'cantidad', 'precio_unitario', 'subtotal')
     search_fields = ('pedido__id', 'producto__nombre_producto')
     list_filter = ('pedido__estado_pedido',)
+    list_select_related = ('pedido__cliente', 'producto')
 
 @admin.register(PedidoProcesadoPor)
 class PedidoProcesadoPorAdmin(admin.ModelAdmin):
@@ -30,4 +32,16 @@ class PedidoProcesadoPorAdmin(admin.ModelAdmin):
     search_fields = ('pedido__id', 'vendedor__nombre_completo', 'bodeguero__nombre_completo')
     # No hay campos de fecha directa para date_hierarchy o list_filter aquí a menos que los añadas al modelo
     # list_filter = ('accion', 'fecha_accion')
-    # date_hierarchy = 'fecha_accion'
\ No newline at end of file
+    # date_hierarchy = 'fecha_accion'
+
+@admin.register(AsignacionDetalle)
+class AsignacionDetalleAdmin(admin.ModelAdmin):
+    list_display = ('detalle', 'bodega', 'cantidad', 'fecha_asignacion')
+    search_fields = ('detalle__pedido__id',)
+    list_filter = ('bodega',)
+
+@admin.register(CargaPersonal)
+class CargaPersonalAdmin(admin.ModelAdmin):
+    list_display = ('personal', 'pedidos_abiertos', 'fecha_actualizacion')
+    search_fields = ('personal__nombre_completo',)
+    list_select_related = ('personal',)
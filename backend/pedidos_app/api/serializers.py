@@ -1,5 +1,10 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
-from pedidos_app.models import EstadoPedido, TipoEntrega, Pedido, DetallePedido, PedidoProcesadoPor
+from pagos_app.api.serializers import MetodoPagoSerializer
+from pedidos_app.estados import PENDIENTE, TRANSICIONES, puede_transicionar
+from pedidos_app.models import EstadoPedido, TipoEntrega, Pedido, DetallePedido, PedidoProcesadoPor, AsignacionDetalle
+from productos_app.models import Producto
+from usuarios_app.models import Cliente
 
 # ---------------------------
 # PEDIDOS
@@ -24,6 +29,18 @@ class PedidoSerializer(serializers.ModelSerializer):
         model = Pedido
         fields = '__all__'
 
+    def validate_estado_pedido(self, estado):
+        # Los cambios de estado siguen la máquina de pedidos_app.estados
+        if self.instance is None:
+            if estado.nombre_estado != PENDIENTE:
+                raise serializers.ValidationError(f"Un pedido nuevo debe crearse en estado {PENDIENTE}.")
+        elif estado.pk != self.instance.estado_pedido_id and not puede_transicionar(
+                self.instance.estado_pedido.nombre_estado, estado.nombre_estado):
+            raise serializers.ValidationError(
+                f"No se permite pasar de {self.instance.estado_pedido.nombre_estado} a {estado.nombre_estado}."
+            )
+        return estado
+
 class DetallePedidoSerializer(serializers.ModelSerializer):
     # Ejemplo:
     # producto = ProductoSerializer(read_only=True) # Asumiendo que tienes ProductoSerializer importado
@@ -37,4 +54,97 @@ class PedidoProcesadoPorSerializer(serializers.ModelSerializer):
     # personal = PersonalSerializer(read_only=True) # Asumiendo que tienes PersonalSerializer importado
     class Meta:
         model = PedidoProcesadoPor
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+# ---------------------------
+# TRANSICIONES DE ESTADO
+# ---------------------------
+class TransicionSerializer(serializers.Serializer):
+    estado = serializers.ChoiceField(choices=list(TRANSICIONES))
+
+class TransicionMasivaSerializer(TransicionSerializer):
+    pedidos = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=50000)
+
+
+# ---------------------------
+# REPORTES DE VENTAS
+# ---------------------------
+class ReporteVentasSerializer(serializers.Serializer):
+    desde = serializers.DateField()
+    hasta = serializers.DateField()
+    agrupar = serializers.ChoiceField(choices=['dia', 'sucursal', 'producto', 'categoria'], default='dia')
+
+    def validate(self, attrs):
+        if attrs['desde'] > attrs['hasta']:
+            raise serializers.ValidationError("desde no puede ser posterior a hasta")
+        return attrs
+
+class FilaReporteVentasSerializer(serializers.Serializer):
+    # `clave` es la fecha (agrupar=dia) o el id de sucursal, producto o categoría (nulo: sin asignar)
+    clave = serializers.ReadOnlyField()
+    nombre = serializers.ReadOnlyField()
+    pedidos = serializers.IntegerField(required=False)
+    unidades = serializers.IntegerField(required=False)
+    monto = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+class ExportacionPedidosSerializer(serializers.Serializer):
+    # `formato` y no `format`: DRF usa ?format= para elegir el renderer
+    desde = serializers.DateField(required=False)
+    hasta = serializers.DateField(required=False)
+    estado = serializers.CharField(required=False)
+    formato = serializers.ChoiceField(choices=['csv', 'ndjson'], default='csv')
+
+    def validate(self, attrs):
+        if 'desde' in attrs and 'hasta' in attrs and attrs['desde'] > attrs['hasta']:
+            raise serializers.ValidationError("desde no puede ser posterior a hasta")
+        return attrs
+
+
+# ---------------------------
+# PEDIDO EXPANDIDO (LECTURA)
+# ---------------------------
+# Representación con las relaciones anidadas para el frontend. Las vistas deben
+# entregar el queryset de pedidos_expandidos(): todo se carga con un número fijo
+# de consultas, sin importar cuántos pedidos o líneas haya.
+class ProductoResumenSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Producto
+        fields = ['id', 'nombre_producto', 'codigo_producto', 'marca', 'precio']
+
+class ClienteResumenSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Cliente
+        fields = ['usuario', 'nombre_completo', 'email']
+
+class AsignacionDetalleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AsignacionDetalle
+        fields = ['bodega', 'cantidad']
+
+class DetallePedidoExpandidoSerializer(serializers.ModelSerializer):
+    producto = ProductoResumenSerializer(read_only=True)
+    asignaciones = AsignacionDetalleSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = DetallePedido
+        fields = ['id', 'producto', 'cantidad', 'precio_unitario', 'subtotal', 'asignaciones']
+
+class PedidoExpandidoSerializer(serializers.ModelSerializer):
+    cliente = ClienteResumenSerializer(read_only=True)
+    estado_pedido = EstadoPedidoSerializer(read_only=True)
+    tipo_entrega = TipoEntregaSerializer(read_only=True)
+    metodo_pago = MetodoPagoSerializer(read_only=True)
+    detalles = DetallePedidoExpandidoSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Pedido
+        fields = ['id', 'cliente', 'fecha', 'estado_pedido', 'tipo_entrega', 'metodo_pago', 'total', 'detalles']
+
+
+def pedidos_expandidos(queryset=None):
+    """Pedidos con lo que usa PedidoExpandidoSerializer: tres consultas en total."""
+    queryset = Pedido.objects.all() if queryset is None else queryset
+    return queryset.select_related('cliente', 'estado_pedido', 'tipo_entrega', 'metodo_pago').prefetch_related(
+        Prefetch('detalles', queryset=DetallePedido.objects.select_related('producto').order_by('pk')),
+        'detalles__asignaciones',
+    )
@@ -2,7 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     EstadoPedidoViewSet, TipoEntregaViewSet, PedidoViewSet,
-    DetallePedidoViewSet, PedidoProcesadoPorViewSet
+    DetallePedidoViewSet, PedidoProcesadoPorViewSet, ReporteVentasView
 )
 
 # Crear router para ViewSets
@@ -17,4 +17,5 @@ router.register(r'pedidos-procesados', PedidoProcesadoPorViewSet)
 urlpatterns = [
     path('', include(router.urls)),
     # Rutas adicionales específicas no manejadas por el router
+    path('reportes/ventas/', ReporteVentasView.as_view(), name='reporte-ventas'),
 ]
\ No newline at end of file
@@ -1,34 +1,207 @@
-from rest_framework import viewsets, permissions
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, PermissionDenied
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from comun_app.api.serializacion import ListadoRapidoMixin
+from comun_app.api.mixins import ConsultaCondicionalMixin, IdempotenciaMixin
+from pedidos_app.estados import CANCELADO, CARRERA, PENDIENTE, TransicionInvalida, transicionar
+from pedidos_app.exportacion import FORMATOS, exportar, pedidos_del_periodo
 from pedidos_app.models import EstadoPedido, TipoEntrega, Pedido, DetallePedido, PedidoProcesadoPor
+from pedidos_app.resumen_ventas import actualizar_resumen, cambios_en_pedidos, reporte
+from usuarios_app.models import Personal
 from .serializers import (
     EstadoPedidoSerializer, TipoEntregaSerializer, PedidoSerializer, 
-    DetallePedidoSerializer, PedidoProcesadoPorSerializer
+    DetallePedidoSerializer, PedidoProcesadoPorSerializer, PedidoExpandidoSerializer, pedidos_expandidos,
+    TransicionSerializer, TransicionMasivaSerializer, ReporteVentasSerializer, FilaReporteVentasSerializer,
+    ExportacionPedidosSerializer
 )
 
 # ---------------------------
 # PEDIDOS
 # ---------------------------
-class EstadoPedidoViewSet(viewsets.ModelViewSet):
+class TransicionRechazada(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Transición no permitida"
+
+class EstadoPedidoViewSet(ConsultaCondicionalMixin, viewsets.ModelViewSet):
     queryset = EstadoPedido.objects.all()
+    condicional_modelos = (EstadoPedido,)
     serializer_class = EstadoPedidoSerializer
     permission_classes = [permissions.IsAdminUser] # Generalmente administrado
 
-class TipoEntregaViewSet(viewsets.ModelViewSet):
+class TipoEntregaViewSet(ConsultaCondicionalMixin, viewsets.ModelViewSet):
     queryset = TipoEntrega.objects.all()
+    condicional_modelos = (TipoEntrega,)
     serializer_class = TipoEntregaSerializer
     permission_classes = [permissions.IsAdminUser] # Generalmente administrado
 
-class PedidoViewSet(viewsets.ModelViewSet):
+class PedidoViewSet(IdempotenciaMixin, ListadoRapidoMixin, viewsets.ModelViewSet):
+    """
+    Con ?expandir=true el listado y el detalle anidan cliente, estado, tipo de
+    entrega, método de pago y líneas con su producto y asignaciones, cargados
+    con un número fijo de consultas. Los cambios de estado (PATCH de
+    estado_pedido, /transicion/ y /transicion-masiva/) siguen la máquina de
+    pedidos_app.estados y ejecutan sus efectos. La creación acepta Idempotency-Key.
+    /exportar/ entrega los pedidos de un período con sus líneas en streaming.
+    """
     queryset = Pedido.objects.all()
     serializer_class = PedidoSerializer
     permission_classes = [permissions.IsAuthenticated] # Cliente ve sus pedidos, admin ve todos
 
-class DetallePedidoViewSet(viewsets.ModelViewSet):
+    def expandir(self):
+        return self.request.method == 'GET' and self.request.query_params.get('expandir') in ('true', '1')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return pedidos_expandidos(queryset) if self.expandir() else queryset
+
+    def get_serializer_class(self):
+        return PedidoExpandidoSerializer if self.expandir() else super().get_serializer_class()
+
+    def personal_id(self):
+        return Personal.objects.filter(pk=self.request.user.pk).values_list('pk', flat=True).first()
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            actualizar_resumen([serializer.save().pk])
+
+    def autorizar_transicion(self, pedido, destino, personal_id):
+        """Personal y administradores mueven cualquier pedido; un cliente solo cancela los suyos en Pendiente."""
+        if personal_id is not None or self.request.user.is_staff:
+            return
+        if destino == CANCELADO and pedido.cliente_id == self.request.user.pk \
+                and pedido.estado_pedido.nombre_estado == PENDIENTE:
+            return
+        raise PermissionDenied("Solo el personal puede cambiar el estado de este pedido.")
+
+    def mover(self, pedido, destino, personal_id):
+        """Aplica la transición de un pedido; la rechaza con 409 si no está permitida o hubo una carrera."""
+        try:
+            resultado = transicionar([pedido.pk], destino, personal_id)
+        except TransicionInvalida as exc:
+            raise TransicionRechazada(str(exc))
+        if resultado.fallidos:
+            raise TransicionRechazada(CARRERA)
+        if resultado.rechazados:
+            raise TransicionRechazada({'detail': "Transición no permitida", **resultado.rechazados[0]})
+
+    def perform_update(self, serializer):
+        destino = serializer.validated_data.pop('estado_pedido', None)
+        cambia_estado = destino is not None and destino.pk != serializer.instance.estado_pedido_id
+        personal_id = self.personal_id()
+        if cambia_estado:
+            self.autorizar_transicion(serializer.instance, destino.nombre_estado, personal_id)
+        with transaction.atomic():
+            with cambios_en_pedidos([serializer.instance.pk]):
+                pedido = serializer.save()
+            if cambia_estado:
+                self.mover(pedido, destino.nombre_estado, personal_id)
+                pedido.refresh_from_db()
+
+    def perform_destroy(self, instance):
+        with cambios_en_pedidos([instance.pk]):
+            instance.delete()
+
+    @action(detail=True, methods=['post'])
+    def transicion(self, request, pk=None):
+        """
+        Mueve el pedido al estado indicado: {"estado": "Despachado"}. Responde
+        409 si no está permitido y 403 si un cliente intenta algo distinto de
+        cancelar su propio pedido Pendiente.
+        """
+        pedido = self.get_object()
+        serializer = TransicionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        personal_id = self.personal_id()
+        self.autorizar_transicion(pedido, serializer.validated_data['estado'], personal_id)
+        self.mover(pedido, serializer.validated_data['estado'], personal_id)
+        pedido.refresh_from_db()
+        return Response(PedidoSerializer(pedido).data)
+
+    @action(detail=False, methods=['post'], url_path='transicion-masiva', permission_classes=[permissions.IsAdminUser])
+    def transicion_masiva(self, request):
+        """
+        Mueve muchos pedidos a la vez: {"pedidos": [1, 2, ...], "estado": "Despachado"}.
+        Los que no admiten la transición se informan en `rechazados` y no cambian;
+        los de un lote que chocó con otro proceso se revierten y se informan en
+        `fallidos` para reintentarlos (los demás lotes se aplican igual).
+        """
+        serializer = TransicionMasivaSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            resultado = transicionar(
+                serializer.validated_data['pedidos'], serializer.validated_data['estado'], self.personal_id()
+            )
+        except TransicionInvalida as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_409_CONFLICT)
+        return Response({
+            'movidos': len(resultado.movidos),
+            'rechazados': resultado.rechazados,
+            'no_encontrados': resultado.no_encontrados,
+            'fallidos': resultado.fallidos,
+            'duracion_ms': resultado.duracion_ms,
+        })
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def exportar(self, request):
+        """
+        Pedidos y líneas en CSV o NDJSON, escritos a medida que se leen (memoria
+        constante). Uso: /api/pedidos/pedidos/exportar/?desde=2026-01-01&hasta=2026-01-31&formato=ndjson
+        """
+        parametros = ExportacionPedidosSerializer(data=request.query_params)
+        parametros.is_valid(raise_exception=True)
+        formato = parametros.validated_data.pop('formato')
+        response = StreamingHttpResponse(
+            exportar(pedidos_del_periodo(**parametros.validated_data), formato), content_type=FORMATOS[formato]
+        )
+        response['Content-Disposition'] = f'attachment; filename="pedidos.{formato}"'
+        return response
+
+class ResumenVentasMixin:
+    """Mantiene el resumen diario de ventas al editar objetos que cuelgan de un pedido (`pedido_id`)."""
+
+    def _pedidos(self, *objetos):
+        return {objeto.pedido_id for objeto in objetos if objeto is not None}
+
+    def perform_create(self, serializer):
+        with cambios_en_pedidos([serializer.validated_data['pedido'].pk]):
+            serializer.save()
+
+    def perform_update(self, serializer):
+        nuevo = serializer.validated_data.get('pedido')
+        with cambios_en_pedidos(self._pedidos(serializer.instance) | ({nuevo.pk} if nuevo else set())):
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with cambios_en_pedidos(self._pedidos(instance)):
+            instance.delete()
+
+class DetallePedidoViewSet(ResumenVentasMixin, ListadoRapidoMixin, viewsets.ModelViewSet):
     queryset = DetallePedido.objects.all()
     serializer_class = DetallePedidoSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class PedidoProcesadoPorViewSet(viewsets.ModelViewSet):
+class PedidoProcesadoPorViewSet(ResumenVentasMixin, viewsets.ModelViewSet):
     queryset = PedidoProcesadoPor.objects.all()
     serializer_class = PedidoProcesadoPorSerializer
-    permission_classes = [permissions.IsAuthenticated] # Personal autorizado
\ No newline at end of file
+    permission_classes = [permissions.IsAuthenticated] # Personal autorizado
+
+# ---------------------------
+# REPORTES DE VENTAS
+# ---------------------------
+class ReporteVentasView(APIView):
+    """
+    Ventas (sin pedidos cancelados) agrupadas por día, sucursal del vendedor,
+    producto o categoría, leídas solo de las tablas de resumen diario.
+    Uso: /api/pedidos/reportes/ventas/?desde=2026-01-01&hasta=2026-03-31&agrupar=categoria
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        parametros = ReporteVentasSerializer(data=request.query_params)
+        parametros.is_valid(raise_exception=True)
+        filas = reporte(**parametros.validated_data)
+        return Response({**parametros.data, 'filas': FilaReporteVentasSerializer(filas, many=True).data})
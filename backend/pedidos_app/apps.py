@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class PedidosAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pedidos_app'
+
+    def ready(self):
+        from comun_app.versiones import registrar_modelos
+        from .models import EstadoPedido, TipoEntrega
+
+        registrar_modelos(EstadoPedido, TipoEntrega)
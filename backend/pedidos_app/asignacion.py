@@ -0,0 +1,185 @@
+import time
+from collections import defaultdict, namedtuple
+
+from django.db import transaction
+
+from inventario_app.models import Inventario
+from inventario_app.reservas import reservar_stock
+from pedidos_app.carga import programar_asignacion
+from pedidos_app.estados import ESTADOS_ASIGNABLES
+from pedidos_app.models import AsignacionDetalle, DetallePedido
+from sucursales_app.models import Bodega
+
+# ---------------------------
+# ASIGNACIÓN DE BODEGAS A PEDIDOS
+# ---------------------------
+# Para cada pedido se elige desde qué bodega(s) se despacha cada línea:
+#   - se minimizan los despachos separados: en cada paso se elige la bodega que
+#     completa más líneas pendientes (una sola bodega si alguna tiene todo);
+#   - a igual cobertura se prefiere una bodega de la región del cliente
+#     (Cliente.comuna.region vs. Bodega.sucursal.comuna.region);
+#   - solo si ninguna bodega completa una línea, esa línea se reparte.
+# Todo se decide sobre una matriz de stock en memoria cargada una vez por lote,
+# sin consultas por línea. Lo asignado se descuenta de la matriz, así los
+# pedidos siguientes del mismo lote ven el stock restante.
+
+TAMANO_LOTE = 500
+
+Linea = namedtuple('Linea', 'detalle_id producto_id cantidad')
+PedidoPendiente = namedtuple('PedidoPendiente', 'pedido_id region_id lineas')
+ResultadoAsignacion = namedtuple('ResultadoAsignacion', 'pedido_id asignaciones faltantes')
+
+
+class MatrizStock:
+    """Stock disponible {producto_id: {bodega_id: cantidad}} y región de cada bodega."""
+
+    def __init__(self, stock, regiones):
+        self.stock = stock
+        self.regiones = regiones
+
+    @classmethod
+    def cargar(cls, productos_ids, bloquear=False):
+        """Lee el inventario de los productos (por lotes) y bloquea las filas si se indica."""
+        stock = defaultdict(dict)
+        productos_ids = sorted(set(productos_ids))
+        for inicio in range(0, len(productos_ids), TAMANO_LOTE):
+            filas = Inventario.objects.filter(
+                producto_id__in=productos_ids[inicio:inicio + TAMANO_LOTE], cantidad__gt=0
+            ).order_by('producto_id', 'bodega_id')
+            if bloquear:
+                filas = filas.select_for_update()
+            for producto_id, bodega_id, cantidad in filas.values_list('producto_id', 'bodega_id', 'cantidad'):
+                stock[producto_id][bodega_id] = cantidad
+        regiones = dict(Bodega.objects.values_list('pk', 'sucursal__comuna__region_id'))
+        return cls(stock, regiones)
+
+    def total(self, producto_id):
+        return sum(self.stock[producto_id].values())
+
+    def descontar(self, producto_id, bodega_id, cantidad):
+        self.stock[producto_id][bodega_id] -= cantidad
+        if not self.stock[producto_id][bodega_id]:
+            del self.stock[producto_id][bodega_id]
+
+    def asignar(self, pedido):
+        """
+        Decide las bodegas de un PedidoPendiente y descuenta la matriz. Devuelve
+        un ResultadoAsignacion; si algún producto no alcanza, no asigna nada y
+        `faltantes` lista esos productos.
+        """
+        faltantes = [
+            {'producto_id': linea.producto_id, 'solicitado': linea.cantidad, 'disponible': self.total(linea.producto_id)}
+            for linea in pedido.lineas if self.total(linea.producto_id) < linea.cantidad
+        ]
+        if faltantes:
+            return ResultadoAsignacion(pedido.pedido_id, [], faltantes)
+
+        pendientes = {linea.producto_id: linea for linea in pedido.lineas}
+        asignaciones = []
+
+        def tomar(linea, bodega_id, cantidad):
+            self.descontar(linea.producto_id, bodega_id, cantidad)
+            asignaciones.append((linea.detalle_id, linea.producto_id, bodega_id, cantidad))
+
+        while pendientes:
+            candidatas = {bodega_id for producto_id in pendientes for bodega_id in self.stock[producto_id]}
+            cobertura = {
+                bodega_id: [linea for producto_id, linea in pendientes.items()
+                            if self.stock[producto_id].get(bodega_id, 0) >= linea.cantidad]
+                for bodega_id in candidatas
+            }
+            mejor = max(candidatas, key=lambda b: (len(cobertura[b]), self.regiones.get(b) == pedido.region_id, -b))
+            if cobertura[mejor]:
+                for linea in cobertura[mejor]:
+                    tomar(linea, mejor, linea.cantidad)
+                    del pendientes[linea.producto_id]
+                continue
+
+            # Ninguna bodega completa una línea: se reparte la de menor producto_id,
+            # primero desde la región del cliente y desde las bodegas con más stock.
+            linea = pendientes.pop(min(pendientes))
+            restante = linea.cantidad
+            for bodega_id, disponible in sorted(
+                self.stock[linea.producto_id].items(),
+                key=lambda item: (self.regiones.get(item[0]) != pedido.region_id, -item[1], item[0]),
+            ):
+                cantidad = min(restante, disponible)
+                tomar(linea, bodega_id, cantidad)
+                restante -= cantidad
+                if not restante:
+                    break
+        return ResultadoAsignacion(pedido.pedido_id, asignaciones, [])
+
+
+# ---------------------------
+# PEDIDOS PENDIENTES Y PERSISTENCIA
+# ---------------------------
+def pedidos_pendientes(pedidos_ids=None):
+    """
+    Pedidos sin ninguna línea asignada en un estado asignable (no cancelados
+    ni despachados), del más antiguo al más nuevo, con sus líneas y la región
+    del cliente, en una sola consulta.
+    """
+    detalles = DetallePedido.objects.filter(
+        asignaciones__isnull=True, cantidad__gt=0, pedido__estado_pedido__nombre_estado__in=ESTADOS_ASIGNABLES
+    )
+    if pedidos_ids is not None:
+        detalles = detalles.filter(pedido_id__in=pedidos_ids)
+    pedidos = {}
+    for detalle_id, pedido_id, producto_id, cantidad, region_id in detalles.order_by(
+        'pedido__fecha', 'pedido_id', 'producto_id'
+    ).values_list('pk', 'pedido_id', 'producto_id', 'cantidad', 'pedido__cliente__comuna__region_id'):
+        if pedido_id not in pedidos:
+            pedidos[pedido_id] = PedidoPendiente(pedido_id, region_id, [])
+        pedidos[pedido_id].lineas.append(Linea(detalle_id, producto_id, cantidad))
+    return list(pedidos.values())
+
+
+def _guardar(resultados, motivo):
+    asignaciones = [a for resultado in resultados for a in resultado.asignaciones]
+    AsignacionDetalle.objects.bulk_create(
+        (AsignacionDetalle(detalle_id=detalle_id, bodega_id=bodega_id, cantidad=cantidad)
+         for detalle_id, _, bodega_id, cantidad in asignaciones),
+        batch_size=TAMANO_LOTE,
+    )
+    reservar_stock([(producto_id, bodega_id, cantidad) for _, producto_id, bodega_id, cantidad in asignaciones], motivo)
+
+
+def asignar_pedidos(pedidos, motivo='Asignación de pedido'):
+    """
+    Asigna y reserva una lista de PedidoPendiente en una transacción: bloquea el
+    inventario de sus productos, decide todos los pedidos sobre la matriz en
+    memoria y guarda asignaciones y reservas en bloque. Devuelve un
+    ResultadoAsignacion por pedido.
+    """
+    with transaction.atomic():
+        matriz = MatrizStock.cargar(
+            [linea.producto_id for pedido in pedidos for linea in pedido.lineas], bloquear=True
+        )
+        resultados = [matriz.asignar(pedido) for pedido in pedidos]
+        _guardar(resultados, motivo)
+    return resultados
+
+
+def asignar_pendientes(lote=TAMANO_LOTE, pedidos_ids=None):
+    """
+    Procesa el backlog de pedidos sin asignar en lotes de `lote` pedidos (una
+    transacción por lote) y programa la asignación de personal de los que
+    recibieron bodega. Devuelve un resumen con conteos y duración.
+    """
+    inicio = time.perf_counter()
+    pendientes = pedidos_pendientes(pedidos_ids)
+    resumen = {'pedidos': len(pendientes), 'asignados': 0, 'divididos': 0, 'sin_stock': 0, 'sin_stock_ids': []}
+    for desde in range(0, len(pendientes), lote):
+        for resultado in asignar_pedidos(pendientes[desde:desde + lote]):
+            if resultado.faltantes:
+                resumen['sin_stock'] += 1
+                resumen['sin_stock_ids'].append(resultado.pedido_id)
+                continue
+            resumen['asignados'] += 1
+            if len({bodega_id for _, _, bodega_id, _ in resultado.asignaciones}) > 1:
+                resumen['divididos'] += 1
+    if resumen['asignados']:
+        programar_asignacion()
+    resumen['duracion_ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+    return resumen
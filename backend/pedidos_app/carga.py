@@ -0,0 +1,251 @@
+import heapq
+import time
+from collections import Counter, defaultdict
+
+from django.db import transaction
+
+from comun_app.cola import encolar_unica
+from django.db.models import Case, Count, F, IntegerField, Sum, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from pedidos_app.estados import ESTADOS_ASIGNABLES
+from pedidos_app.models import AsignacionDetalle, CargaPersonal, Pedido, PedidoProcesadoPor
+from pedidos_app.resumen_ventas import actualizar_resumen, contribucion
+from usuarios_app.models import Personal
+
+# ---------------------------
+# CARGA DE TRABAJO Y ASIGNACIÓN DE PERSONAL
+# ---------------------------
+# Los pedidos abiertos (Pendiente o En preparación) ya asignados a bodegas
+# reciben un vendedor y un bodeguero de la sucursal que los despacha (la de la
+# bodega que aporta más unidades), elegidos entre el Personal de ese tipo
+# (TipoPersonal "Vendedor" / "Bodeguero") con menos pedidos abiertos:
+#   - CargaPersonal guarda los pedidos abiertos de cada persona y se mantiene
+#     por diferencias (ajustar_carga: UPDATE con F() por lote, sin COUNT por
+#     pedido); máquina de estados y planificador la actualizan al cambiar algo;
+#   - el Planificador carga una vez por lote esas cargas (bloqueando sus filas,
+#     así los planificadores concurrentes se serializan) en colas de prioridad
+#     (heapq) por (sucursal, rol); cada asignación toma a la persona con menor
+#     carga y la reinserta con +1: O(log n) por pedido;
+#   - las asignaciones se guardan en bloque (PedidoProcesadoPor) junto con las
+#     cargas nuevas y el resumen de ventas (cambia la sucursal del vendedor);
+#   - checkout y asignar_pendientes no asignan en línea: programar_asignacion()
+#     deja una sola tarea pedidos.asignar_personal pendiente (con un retraso
+#     corto) que atiende en un lote todos los pedidos llegados entre medio.
+# Los cambios que no pasen por estas funciones (admin, API de
+# pedidos-procesados) se corrigen con asignar_personal --recalcular.
+
+TAMANO_LOTE = 1000
+RETRASO_ASIGNACION = 5  # segundos que espera la tarea para juntar pedidos
+ESTADOS_ABIERTOS = ESTADOS_ASIGNABLES
+# rol (campo de PedidoProcesadoPor) -> TipoPersonal.nombre_tipo (sin distinguir mayúsculas)
+TIPOS_PERSONAL = {'vendedor': 'Vendedor', 'bodeguero': 'Bodeguero'}
+
+
+def ajustar_carga(deltas):
+    """
+    Suma {personal_id: delta} a CargaPersonal.pedidos_abiertos con un UPDATE
+    por lote (creando las filas que falten). Debe llamarse dentro de la
+    transacción del cambio que la origina.
+    """
+    deltas = {personal_id: delta for personal_id, delta in deltas.items() if delta and personal_id is not None}
+    if not deltas:
+        return
+    ids = sorted(deltas)
+    ahora = timezone.now()
+    for inicio in range(0, len(ids), TAMANO_LOTE):
+        lote = ids[inicio:inicio + TAMANO_LOTE]
+        CargaPersonal.objects.bulk_create(
+            [CargaPersonal(personal_id=personal_id, fecha_actualizacion=ahora) for personal_id in lote],
+            ignore_conflicts=True,
+        )
+        delta = Case(
+            *[When(pk=personal_id, then=Value(deltas[personal_id])) for personal_id in lote],
+            default=Value(0), output_field=IntegerField(),
+        )
+        CargaPersonal.objects.filter(pk__in=lote).update(
+            pedidos_abiertos=Greatest(F('pedidos_abiertos') + delta, Value(0)), fecha_actualizacion=ahora
+        )
+
+
+def _responsables(pedidos_ids, campo):
+    """Counter {personal_id: pedidos} de quienes figuran en `campo` para esos pedidos."""
+    return Counter(dict(
+        PedidoProcesadoPor.objects.filter(pedido_id__in=pedidos_ids, **{f'{campo}__isnull': False}).order_by()
+        .values(f'{campo}_id').annotate(pedidos=Count('pk')).values_list(f'{campo}_id', 'pedidos')
+    ))
+
+
+def liberar_carga(pedidos_ids):
+    """Descuenta de la carga de vendedor y bodeguero los pedidos que dejan de estar abiertos."""
+    deltas = Counter()
+    for campo in TIPOS_PERSONAL:
+        deltas.update(_responsables(pedidos_ids, campo))
+    ajustar_carga({personal_id: -pedidos for personal_id, pedidos in deltas.items()})
+
+
+def cambiar_responsable(pedidos_ids, campo, personal_id):
+    """Traspasa la carga de pedidos abiertos cuyo `campo` pasa a ser `personal_id`."""
+    deltas = Counter({personal_id: len(pedidos_ids)})
+    deltas.subtract(_responsables(pedidos_ids, campo))
+    ajustar_carga(deltas)
+
+
+def recalcular_carga():
+    """Recalcula CargaPersonal desde los pedidos abiertos (dos consultas agrupadas). Devuelve cuántas filas escribió."""
+    abiertos = PedidoProcesadoPor.objects.filter(pedido__estado_pedido__nombre_estado__in=ESTADOS_ABIERTOS)
+    cargas = Counter()
+    for campo in TIPOS_PERSONAL:
+        cargas.update(_responsables(abiertos.values('pedido_id'), campo))
+    ahora = timezone.now()
+    with transaction.atomic():
+        CargaPersonal.objects.all().delete()
+        CargaPersonal.objects.bulk_create(
+            (CargaPersonal(personal_id=personal_id, pedidos_abiertos=cargas[personal_id], fecha_actualizacion=ahora)
+             for personal_id in Personal.objects.order_by('pk').values_list('pk', flat=True).iterator()),
+            batch_size=TAMANO_LOTE,
+        )
+    return Personal.objects.count()
+
+
+# ---------------------------
+# PLANIFICADOR (COLAS DE PRIORIDAD)
+# ---------------------------
+class Planificador:
+    """Una cola de prioridad [(carga, personal_id)] por (sucursal_id, rol)."""
+
+    def __init__(self, colas):
+        self.colas = colas
+        self.deltas = Counter()
+
+    @classmethod
+    def cargar(cls, sucursales_ids):
+        """
+        Lee el personal asignable (con tipo) de `sucursales_ids` y bloquea su
+        fila de CargaPersonal (creando las que falten) antes de leer la carga:
+        dos planificadores concurrentes sobre la misma sucursal no parten de la
+        misma carga, y los de otras sucursales no se esperan. Debe llamarse
+        dentro de una transacción.
+        """
+        roles = {nombre.lower(): rol for rol, nombre in TIPOS_PERSONAL.items()}
+        personal = {}
+        for personal_id, sucursal_id, tipo in Personal.objects.filter(
+            sucursal_id__in=sorted(set(sucursales_ids)), tipo__isnull=False, usuario__is_active=True
+        ).values_list('pk', 'sucursal_id', 'tipo__nombre_tipo'):
+            rol = roles.get(tipo.lower())
+            if rol is not None:
+                personal[personal_id] = (sucursal_id, rol)
+        ids = sorted(personal)
+        ahora = timezone.now()
+        cargas = {}
+        for inicio in range(0, len(ids), TAMANO_LOTE):
+            lote = ids[inicio:inicio + TAMANO_LOTE]
+            CargaPersonal.objects.bulk_create(
+                [CargaPersonal(personal_id=personal_id, fecha_actualizacion=ahora) for personal_id in lote],
+                ignore_conflicts=True,
+            )
+            cargas.update(CargaPersonal.objects.select_for_update().filter(personal_id__in=lote).order_by(
+                'personal_id'
+            ).values_list('personal_id', 'pedidos_abiertos'))
+        colas = defaultdict(list)
+        for personal_id, (sucursal_id, rol) in personal.items():
+            colas[sucursal_id, rol].append((cargas.get(personal_id, 0), personal_id))
+        for cola in colas.values():
+            heapq.heapify(cola)
+        return cls(dict(colas))
+
+    def elegir(self, sucursal_id, rol):
+        """Persona de `rol` con menos carga en la sucursal (suma 1 a su carga), o None si no hay."""
+        cola = self.colas.get((sucursal_id, rol))
+        if not cola:
+            return None
+        carga, personal_id = cola[0]
+        heapq.heapreplace(cola, (carga + 1, personal_id))
+        self.deltas[personal_id] += 1
+        return personal_id
+
+
+def pedidos_sin_personal(pedidos_ids=None):
+    """
+    [(pedido_id, vendedor_id, bodeguero_id)] de pedidos abiertos con bodegas
+    asignadas a los que les falta vendedor o bodeguero, del más antiguo al más nuevo.
+    """
+    pedidos = Pedido.objects.filter(
+        estado_pedido__nombre_estado__in=ESTADOS_ABIERTOS, detalles__asignaciones__isnull=False,
+    ).exclude(
+        pedidoprocesadopor__vendedor__isnull=False, pedidoprocesadopor__bodeguero__isnull=False,
+    )
+    if pedidos_ids is not None:
+        pedidos = pedidos.filter(pk__in=pedidos_ids)
+    return list(pedidos.distinct().order_by('fecha', 'pk').values_list(
+        'pk', 'pedidoprocesadopor__vendedor_id', 'pedidoprocesadopor__bodeguero_id'
+    ))
+
+
+def sucursales_de_despacho(pedidos_ids):
+    """{pedido_id: sucursal_id} de la bodega que aporta más unidades a cada pedido (una consulta)."""
+    sucursales = {}
+    for pedido_id, sucursal_id, _ in AsignacionDetalle.objects.filter(
+        detalle__pedido_id__in=pedidos_ids, bodega__sucursal__isnull=False,
+    ).order_by().values('detalle__pedido_id', 'bodega__sucursal_id').annotate(
+        unidades=Sum('cantidad')
+    ).order_by('detalle__pedido_id', '-unidades', 'bodega__sucursal_id').values_list(
+        'detalle__pedido_id', 'bodega__sucursal_id', 'unidades'
+    ):
+        sucursales.setdefault(pedido_id, sucursal_id)
+    return sucursales
+
+
+def _asignar_lote(pedidos_ids):
+    resumen = {'asignados': 0, 'sin_personal': []}
+    with transaction.atomic():
+        # Se releen bajo bloqueo: otro planificador pudo asignarlos entre tanto
+        list(Pedido.objects.select_for_update().filter(pk__in=pedidos_ids).values_list('pk', flat=True))
+        pendientes = pedidos_sin_personal(pedidos_ids)
+        sucursales = sucursales_de_despacho([pedido_id for pedido_id, _, _ in pendientes])
+        planificador = Planificador.cargar(sucursales.values())
+        filas, con_vendedor_nuevo = [], []
+        for pedido_id, vendedor_id, bodeguero_id in pendientes:
+            sucursal_id = sucursales.get(pedido_id)
+            if vendedor_id is None:
+                vendedor_id = planificador.elegir(sucursal_id, 'vendedor')
+                if vendedor_id is not None:
+                    con_vendedor_nuevo.append(pedido_id)
+            if bodeguero_id is None:
+                bodeguero_id = planificador.elegir(sucursal_id, 'bodeguero')
+            if vendedor_id is None or bodeguero_id is None:
+                resumen['sin_personal'].append(pedido_id)
+            filas.append(PedidoProcesadoPor(pedido_id=pedido_id, vendedor_id=vendedor_id, bodeguero_id=bodeguero_id))
+        anterior = contribucion(con_vendedor_nuevo)
+        PedidoProcesadoPor.objects.bulk_create(
+            filas, batch_size=TAMANO_LOTE,
+            update_conflicts=True, unique_fields=['pedido'], update_fields=['vendedor', 'bodeguero'],
+        )
+        ajustar_carga(planificador.deltas)
+        actualizar_resumen(con_vendedor_nuevo, anterior)
+    resumen['asignados'] = len(filas) - len(resumen['sin_personal'])
+    return resumen
+
+
+def programar_asignacion():
+    """Encola (si no lo está ya) una asignación de personal para todos los pedidos que la esperan."""
+    return encolar_unica('pedidos.asignar_personal', retraso=RETRASO_ASIGNACION)
+
+
+def asignar_personal(pedidos_ids=None, lote=TAMANO_LOTE):
+    """
+    Asigna vendedor y bodeguero a los pedidos abiertos que no los tienen, por
+    lotes de `lote` pedidos (una transacción por lote). Devuelve un resumen con
+    conteos y duración.
+    """
+    inicio = time.perf_counter()
+    ids = [pedido_id for pedido_id, _, _ in pedidos_sin_personal(pedidos_ids)]
+    resumen = {'pedidos': len(ids), 'asignados': 0, 'sin_personal': 0, 'sin_personal_ids': []}
+    for desde in range(0, len(ids), lote):
+        parcial = _asignar_lote(ids[desde:desde + lote])
+        resumen['asignados'] += parcial['asignados']
+        resumen['sin_personal'] += len(parcial['sin_personal'])
+        resumen['sin_personal_ids'] += parcial['sin_personal']
+    resumen['duracion_ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+    return resumen
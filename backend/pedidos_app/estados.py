@@ -0,0 +1,180 @@
+import time
+from collections import namedtuple
+
+from django.db import transaction
+
+from comun_app.cola import encolar
+from inventario_app.reservas import liberar_stock
+from pedidos_app.models import AsignacionDetalle, EstadoPedido, Pedido, PedidoProcesadoPor
+
+# ---------------------------
+# MÁQUINA DE ESTADOS DE PEDIDOS
+# ---------------------------
+# Los estados son filas de EstadoPedido (creadas por la migración 0004) y solo
+# se permiten las transiciones de TRANSICIONES. Cada cambio de estado pasa por
+# transicionar(), que trabaja por conjuntos: un UPDATE por lote de pedidos
+# (condicionado al estado de origen leído, así un pedido movido por otro
+# proceso entre la lectura y el UPDATE no se mueve dos veces) y efectos
+# secundarios en bloque para todo el lote:
+#   - Cancelado: devuelve al inventario el stock reservado por las asignaciones;
+#   - Despachado: encola la notificación al cliente (tarea pedidos.notificar_despacho);
+#   - En preparación / Despachado: registra en PedidoProcesadoPor al vendedor
+#     que aprobó o al bodeguero que despachó, si se indica quién;
+#   - la carga de trabajo del personal (pedidos_app.carga) se descuenta cuando
+#     el pedido deja de estar abierto y se traspasa si cambia el responsable;
+#   - los cambios que afectan ventas (cancelar, asignar vendedor) actualizan el
+#     resumen diario de pedidos_app.resumen_ventas.
+# Los pedidos en estados fuera de la máquina (datos antiguos) no se pueden mover.
+
+PENDIENTE = 'Pendiente'
+EN_PREPARACION = 'En preparación'
+DESPACHADO = 'Despachado'
+ENTREGADO = 'Entregado'
+CANCELADO = 'Cancelado'
+
+TRANSICIONES = {
+    PENDIENTE: (EN_PREPARACION, CANCELADO),
+    EN_PREPARACION: (DESPACHADO, CANCELADO),
+    DESPACHADO: (ENTREGADO,),
+    ENTREGADO: (),
+    CANCELADO: (),
+}
+# Estados en los que un pedido todavía puede recibir asignación de bodegas
+ESTADOS_ASIGNABLES = (PENDIENTE, EN_PREPARACION)
+# Campo de PedidoProcesadoPor que registra quién hizo la transición
+RESPONSABLE = {EN_PREPARACION: 'vendedor', DESPACHADO: 'bodeguero'}
+
+TAMANO_LOTE = 500
+
+ResultadoTransicion = namedtuple('ResultadoTransicion', 'movidos rechazados no_encontrados fallidos duracion_ms')
+CARRERA = "Otro proceso cambió el estado de los pedidos; reintente la transición"
+
+
+class TransicionInvalida(Exception):
+    pass
+
+
+def origenes(destino):
+    """Estados desde los que se puede llegar a `destino`."""
+    return [origen for origen, destinos in TRANSICIONES.items() if destino in destinos]
+
+
+def puede_transicionar(origen, destino):
+    return destino in TRANSICIONES.get(origen, ())
+
+
+def estados_por_nombre(nombres):
+    """{nombre_estado: pk} de los estados pedidos; los que falten se crean."""
+    estados = dict(EstadoPedido.objects.filter(nombre_estado__in=nombres).values_list('nombre_estado', 'pk'))
+    for nombre in nombres:
+        if nombre not in estados:
+            estados[nombre] = EstadoPedido.objects.get_or_create(nombre_estado=nombre)[0].pk
+    return estados
+
+
+# ---------------------------
+# EFECTOS SECUNDARIOS (POR LOTE)
+# ---------------------------
+def _liberar_reservas(pedidos_ids):
+    lineas = AsignacionDetalle.objects.filter(detalle__pedido_id__in=pedidos_ids).values_list(
+        'detalle__producto_id', 'bodega_id', 'cantidad'
+    )
+    liberar_stock(list(lineas), motivo='Cancelación de pedido')
+
+
+def _notificar_despacho(pedidos_ids):
+    # La creación de notificaciones se difiere a la cola de tareas (pedidos_app.tareas)
+    encolar('pedidos.notificar_despacho', pedidos_ids=list(pedidos_ids))
+
+
+def _registrar_responsable(pedidos_ids, campo, personal_id):
+    PedidoProcesadoPor.objects.bulk_create(
+        (PedidoProcesadoPor(pedido_id=pedido_id, **{f'{campo}_id': personal_id}) for pedido_id in pedidos_ids),
+        update_conflicts=True, unique_fields=['pedido'], update_fields=[campo],
+    )
+
+
+def _efectos(pedidos_ids, destino, personal_id):
+    # Import local: pedidos_app.carga depende de los estados definidos aquí
+    from pedidos_app.carga import ESTADOS_ABIERTOS, cambiar_responsable, liberar_carga
+    if destino == CANCELADO:
+        _liberar_reservas(pedidos_ids)
+    elif destino == DESPACHADO:
+        _notificar_despacho(pedidos_ids)
+    if destino not in ESTADOS_ABIERTOS:
+        # Antes de registrar al responsable: la carga es de quien lo tenía abierto
+        liberar_carga(pedidos_ids)
+    elif personal_id is not None and destino in RESPONSABLE:
+        cambiar_responsable(pedidos_ids, RESPONSABLE[destino], personal_id)
+    if personal_id is not None and destino in RESPONSABLE:
+        _registrar_responsable(pedidos_ids, RESPONSABLE[destino], personal_id)
+
+
+# ---------------------------
+# TRANSICIONES
+# ---------------------------
+def _transicionar_lote(pedidos_ids, destino, estados, personal_id):
+    """Mueve un lote en una transacción. Devuelve (movidos, rechazados)."""
+    with transaction.atomic():
+        actuales = list(
+            Pedido.objects.select_for_update().filter(pk__in=pedidos_ids).order_by('pk').values_list(
+                'pk', 'estado_pedido__nombre_estado'
+            )
+        )
+        validos = [pk for pk, estado in actuales if puede_transicionar(estado, destino)]
+        rechazados = [{'pedido_id': pk, 'estado_actual': estado}
+                      for pk, estado in actuales if not puede_transicionar(estado, destino)]
+        if validos:
+            # Import local: resumen_ventas depende de los estados definidos aquí
+            from pedidos_app.resumen_ventas import actualizar_resumen, contribucion
+            # Solo cancelar o asignar vendedor (sucursal) cambia las ventas resumidas
+            cambia_resumen = destino == CANCELADO or (
+                personal_id is not None and RESPONSABLE.get(destino) == 'vendedor'
+            )
+            anterior = contribucion(validos) if cambia_resumen else None
+            movidos = Pedido.objects.filter(
+                pk__in=validos, estado_pedido_id__in=[estados[origen] for origen in origenes(destino)]
+            ).update(estado_pedido_id=estados[destino])
+            if movidos != len(validos):
+                raise TransicionInvalida(CARRERA)
+            _efectos(validos, destino, personal_id)
+            if cambia_resumen:
+                actualizar_resumen(validos, anterior)
+    return validos, rechazados, {pk for pk, _ in actuales}
+
+
+def transicionar(pedidos_ids, destino, personal_id=None, lote=TAMANO_LOTE):
+    """
+    Mueve los pedidos al estado `destino` con UPDATE por lote y efectos en
+    bloque (una transacción por lote). Los pedidos cuyo estado actual no
+    permite la transición se informan en `rechazados` y no se modifican. Si
+    otro proceso mueve pedidos de un lote a medias, ese lote se revierte
+    entero, sus pedidos se informan en `fallidos` y se sigue con los demás:
+    los lotes anteriores ya confirmados quedan en `movidos`.
+    """
+    if destino not in TRANSICIONES:
+        raise TransicionInvalida(f"Estado desconocido: {destino}")
+    inicio = time.perf_counter()
+    pedidos_ids = sorted(set(pedidos_ids))
+    estados = estados_por_nombre([destino, *origenes(destino)])
+    movidos, rechazados, fallidos, encontrados = [], [], [], set()
+    for desde in range(0, len(pedidos_ids), lote):
+        try:
+            validos, invalidos, existentes = _transicionar_lote(
+                pedidos_ids[desde:desde + lote], destino, estados, personal_id
+            )
+        except TransicionInvalida:
+            # Sin distinguir si existen: el lote entero queda para reintentar
+            fallidos += pedidos_ids[desde:desde + lote]
+            encontrados.update(pedidos_ids[desde:desde + lote])
+            continue
+        movidos += validos
+        rechazados += invalidos
+        encontrados |= existentes
+    return ResultadoTransicion(
+        movidos=movidos,
+        rechazados=rechazados,
+        no_encontrados=[pk for pk in pedidos_ids if pk not in encontrados],
+        fallidos=fallidos,
+        duracion_ms=round((time.perf_counter() - inicio) * 1000, 1),
+    )
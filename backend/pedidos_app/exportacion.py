@@ -0,0 +1,130 @@
+import csv
+import json
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from itertools import groupby
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from pagos_app.models import MetodoPago
+from pedidos_app.models import EstadoPedido, Pedido, TipoEntrega
+
+# ---------------------------
+# EXPORTACIÓN DE PEDIDOS EN STREAMING
+# ---------------------------
+# Para contabilidad: todos los pedidos de un período con sus líneas, sin
+# cargarlos en memoria. Una sola consulta (Pedido LEFT JOIN detalle_pedido,
+# cliente, producto y sucursal del vendedor) ordenada por pedido y línea, leída
+# con .iterator(chunk_size) (cursor del servidor en PostgreSQL, fetchmany en
+# SQLite); los catálogos pequeños (estado, tipo de entrega, método de pago) se
+# resuelven con diccionarios en vez de JOIN. Las filas se escriben por bloques
+# de texto a medida que llegan, así la memoria no crece con el período; la
+# primera fila (el encabezado, en csv) sale sola para que el primer byte no
+# espere al bloque completo.
+#   - csv: una fila por línea de pedido (los pedidos sin líneas, una fila con
+#     las columnas de línea vacías); los textos que una planilla interpretaría
+#     como fórmula (=, +, -, @ al inicio) se escriben con un apóstrofo delante;
+#   - ndjson: un objeto JSON por pedido con sus líneas en "detalles".
+
+TAMANO_LOTE = 2000
+FILAS_POR_BLOQUE = 500
+FORMATOS = {'csv': 'text/csv; charset=utf-8', 'ndjson': 'application/x-ndjson'}
+INICIOS_DE_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+COLUMNAS_PEDIDO = [
+    'pedido_id', 'fecha', 'cliente_id', 'cliente', 'email', 'estado', 'tipo_entrega', 'metodo_pago',
+    'sucursal_id', 'sucursal', 'total',
+]
+COLUMNAS_DETALLE = ['producto_id', 'codigo_producto', 'producto', 'cantidad', 'precio_unitario', 'subtotal']
+_CAMPOS = (
+    'pk', 'fecha', 'cliente_id', 'cliente__nombre_completo', 'cliente__email', 'estado_pedido_id',
+    'tipo_entrega_id', 'metodo_pago_id', 'pedidoprocesadopor__vendedor__sucursal_id',
+    'pedidoprocesadopor__vendedor__sucursal__nombre_sucursal', 'total',
+    'detalles__producto_id', 'detalles__producto__codigo_producto', 'detalles__producto__nombre_producto',
+    'detalles__cantidad', 'detalles__precio_unitario', 'detalles__subtotal',
+)
+
+
+def _inicio_dia(fecha):
+    return datetime.combine(fecha, time.min, tzinfo=dt_timezone.utc)
+
+
+def pedidos_del_periodo(desde=None, hasta=None, estado=None):
+    """Pedidos con fecha (UTC) entre `desde` y `hasta` inclusive, opcionalmente de un estado."""
+    pedidos = Pedido.objects.all()
+    if desde is not None:
+        pedidos = pedidos.filter(fecha__gte=_inicio_dia(desde))
+    if hasta is not None:
+        pedidos = pedidos.filter(fecha__lt=_inicio_dia(hasta + timedelta(days=1)))
+    if estado is not None:
+        pedidos = pedidos.filter(estado_pedido__nombre_estado=estado)
+    return pedidos
+
+
+def filas_de_lineas(pedidos, lote=TAMANO_LOTE):
+    """Itera tuplas COLUMNAS_PEDIDO + COLUMNAS_DETALLE, una por línea, en orden de pedido."""
+    estados = dict(EstadoPedido.objects.values_list('pk', 'nombre_estado'))
+    tipos = dict(TipoEntrega.objects.values_list('pk', 'descripcion_entrega'))
+    metodos = dict(MetodoPago.objects.values_list('pk', 'descripcion_pago'))
+    filas = pedidos.order_by('pk', 'detalles__pk').values_list(*_CAMPOS).iterator(chunk_size=lote)
+    for fila in filas:
+        yield fila[:5] + (estados.get(fila[5]), tipos.get(fila[6]), metodos.get(fila[7])) + fila[8:]
+
+
+class _Linea:
+    """Destino de csv.writer que devuelve la línea escrita en vez de guardarla."""
+
+    def write(self, texto):
+        return texto
+
+
+def _en_bloques(lineas):
+    # La primera fila sale sola (primer byte inmediato); luego un fragmento por
+    # cada FILAS_POR_BLOQUE filas: menos escrituras al socket
+    lineas = iter(lineas)
+    for linea in lineas:
+        yield linea
+        break
+    bloque = []
+    for linea in lineas:
+        bloque.append(linea)
+        if len(bloque) >= FILAS_POR_BLOQUE:
+            yield ''.join(bloque)
+            bloque = []
+    if bloque:
+        yield ''.join(bloque)
+
+
+def _celda(valor):
+    # Evita la inyección de fórmulas al abrir el CSV en una planilla
+    if isinstance(valor, str) and valor.startswith(INICIOS_DE_FORMULA):
+        return "'" + valor
+    return valor
+
+
+def exportar_csv(pedidos, lote=TAMANO_LOTE):
+    escritor = csv.writer(_Linea())
+    yield escritor.writerow(COLUMNAS_PEDIDO + COLUMNAS_DETALLE)
+    yield from _en_bloques(
+        escritor.writerow([_celda(valor) for valor in fila]) for fila in filas_de_lineas(pedidos, lote)
+    )
+
+
+def exportar_ndjson(pedidos, lote=TAMANO_LOTE):
+    separador = len(COLUMNAS_PEDIDO)
+
+    def objetos():
+        for cabecera, lineas in groupby(filas_de_lineas(pedidos, lote), key=lambda fila: fila[:separador]):
+            pedido = dict(zip(COLUMNAS_PEDIDO, cabecera))
+            pedido['detalles'] = [
+                dict(zip(COLUMNAS_DETALLE, linea[separador:])) for linea in lineas if linea[separador] is not None
+            ]
+            yield json.dumps(pedido, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+    yield from _en_bloques(objetos())
+
+
+def exportar(pedidos, formato='csv', lote=TAMANO_LOTE):
+    """Generador de fragmentos de texto con la exportación en `formato` (csv o ndjson)."""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido: {formato}")
+    return exportar_csv(pedidos, lote) if formato == 'csv' else exportar_ndjson(pedidos, lote)
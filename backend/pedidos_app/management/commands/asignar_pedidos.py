@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from pedidos_app.asignacion import TAMANO_LOTE, asignar_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        "Asigna bodegas y reserva stock para los pedidos pendientes de asignación, del más "
+        "antiguo al más nuevo. Cada lote se decide sobre una matriz de stock cargada en memoria."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE,
+                            help=f"Pedidos por transacción (default: {TAMANO_LOTE})")
+        parser.add_argument('--pedido', type=int, action='append', dest='pedidos',
+                            help="Limita la asignación a este pedido (se puede repetir)")
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que 0")
+        resumen = asignar_pendientes(options['lote'], options['pedidos'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{resumen['pedidos']} pedidos procesados en {resumen['duracion_ms']:.0f} ms: "
+            f"{resumen['asignados']} asignados ({resumen['divididos']} en varias bodegas), "
+            f"{resumen['sin_stock']} sin stock suficiente."
+        ))
+        if resumen['sin_stock_ids']:
+            self.stdout.write(f"Pedidos sin stock: {', '.join(map(str, resumen['sin_stock_ids']))}")
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from pedidos_app.carga import TAMANO_LOTE, asignar_personal, recalcular_carga
+
+
+class Command(BaseCommand):
+    help = (
+        "Asigna vendedor y bodeguero de la sucursal de despacho a los pedidos abiertos que no los tienen, "
+        "eligiendo a quien tenga menos pedidos abiertos (colas de prioridad en memoria por sucursal y "
+        "tipo de personal). Con --recalcular primero rehace la tabla carga_personal desde los pedidos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE,
+                            help=f"Pedidos por transacción (default: {TAMANO_LOTE})")
+        parser.add_argument('--pedido', type=int, action='append', dest='pedidos',
+                            help="Limita la asignación a este pedido (se puede repetir)")
+        parser.add_argument('--recalcular', action='store_true',
+                            help="Recalcula la carga de todo el personal antes de asignar")
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que 0")
+        if options['recalcular']:
+            self.stdout.write(f"Carga recalculada para {recalcular_carga()} personas.")
+        resumen = asignar_personal(options['pedidos'], options['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{resumen['pedidos']} pedidos procesados en {resumen['duracion_ms']:.0f} ms: "
+            f"{resumen['asignados']} con vendedor y bodeguero, {resumen['sin_personal']} sin personal disponible."
+        ))
+        if resumen['sin_personal_ids']:
+            self.stdout.write(f"Pedidos sin personal: {', '.join(map(str, resumen['sin_personal_ids']))}")
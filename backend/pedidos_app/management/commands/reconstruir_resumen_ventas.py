@@ -0,0 +1,35 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pedidos_app.resumen_ventas import rango_de_pedidos, reconstruir_dia
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula las tablas de resumen diario de ventas (venta_diaria y venta_diaria_producto) desde "
+        "pedidos y detalles, un día por transacción. Sin fechas recorre todos los días con pedidos. "
+        "Úsese para la carga inicial o tras modificar pedidos fuera de la API."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=date.fromisoformat, help="Primer día (AAAA-MM-DD, UTC)")
+        parser.add_argument('--hasta', type=date.fromisoformat, help="Último día (AAAA-MM-DD, UTC)")
+
+    def handle(self, *args, **options):
+        primero, ultimo = rango_de_pedidos()
+        desde = options['desde'] or primero
+        hasta = options['hasta'] or ultimo
+        if desde is None or hasta is None:
+            self.stdout.write("No hay pedidos para resumir.")
+            return
+        if desde > hasta:
+            raise CommandError("--desde no puede ser posterior a --hasta")
+        dias = filas = 0
+        dia = desde
+        while dia <= hasta:
+            diarias, productos = reconstruir_dia(dia)
+            filas += diarias + productos
+            dias += 1
+            dia += timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f"{dias} día(s) recalculado(s): {filas} filas de resumen."))
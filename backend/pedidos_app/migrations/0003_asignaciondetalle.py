@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos_app', '0002_initial'),
+        ('sucursales_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AsignacionDetalle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.PositiveIntegerField()),
+                ('fecha_asignacion', models.DateTimeField(auto_now_add=True)),
+                ('bodega', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='sucursales_app.bodega')),
+                ('detalle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='asignaciones', to='pedidos_app.detallepedido')),
+            ],
+            options={
+                'verbose_name': 'Asignación de Detalle',
+                'verbose_name_plural': 'Asignaciones de Detalles',
+                'db_table': 'asignacion_detalle',
+                'unique_together': {('detalle', 'bodega')},
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+# Estados de la máquina de pedidos_app.estados
+ESTADOS = ['Pendiente', 'En preparación', 'Despachado', 'Entregado', 'Cancelado']
+
+
+def crear_estados(apps, schema_editor):
+    EstadoPedido = apps.get_model('pedidos_app', 'EstadoPedido')
+    for nombre in ESTADOS:
+        EstadoPedido.objects.get_or_create(nombre_estado=nombre)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos_app', '0003_asignaciondetalle'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_estados, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:00
+
+import django.db.models.deletion
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos_app', '0004_estados_pedido'),
+        ('productos_app', '0003_producto_productos_precio_0725e3_idx'),
+        ('sucursales_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('pedidos', models.IntegerField(default=0)),
+                ('monto', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('sucursal', models.ForeignKey(blank=True, help_text='Nulo: pedido sin vendedor asignado', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='sucursales_app.sucursal')),
+            ],
+            options={
+                'verbose_name': 'Venta Diaria',
+                'verbose_name_plural': 'Ventas Diarias',
+                'db_table': 'venta_diaria',
+                'constraints': [models.UniqueConstraint(models.F('fecha'), django.db.models.functions.comparison.Coalesce('sucursal', 0), name='venta_diaria_unica')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VentaDiariaProducto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('unidades', models.IntegerField(default=0)),
+                ('monto', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='productos_app.producto')),
+                ('sucursal', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='sucursales_app.sucursal')),
+            ],
+            options={
+                'verbose_name': 'Venta Diaria por Producto',
+                'verbose_name_plural': 'Ventas Diarias por Producto',
+                'db_table': 'venta_diaria_producto',
+                'indexes': [models.Index(fields=['producto', 'fecha'], name='venta_diari_product_247190_idx')],
+                'constraints': [models.UniqueConstraint(models.F('fecha'), models.F('producto'), django.db.models.functions.comparison.Coalesce('sucursal', 0), name='venta_diaria_producto_unica')],
+            },
+        ),
+    ]
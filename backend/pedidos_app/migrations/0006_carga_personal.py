@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos_app', '0005_resumen_ventas'),
+        ('usuarios_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CargaPersonal',
+            fields=[
+                ('personal', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='carga', serialize=False, to='usuarios_app.personal')),
+                ('pedidos_abiertos', models.IntegerField(default=0)),
+                ('fecha_actualizacion', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Carga de Personal',
+                'verbose_name_plural': 'Cargas de Personal',
+                'db_table': 'carga_personal',
+            },
+        ),
+    ]
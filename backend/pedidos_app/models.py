@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 class EstadoPedido(models.Model):
     nombre_estado = models.CharField(max_length=50, unique=True)
@@ -45,7 +47,7 @@ class Pedido(models.Model):
         ]
 
     def __str__(self):
-        return f"Pedido {self.pk} - {self.cliente.nombre_completo} - {self.fecha.strftime('%Y-%m-%d')}"
+        return f"Pedido {self.pk} - cliente {self.cliente_id} - {self.fecha.strftime('%Y-%m-%d')}"
 
 class DetallePedido(models.Model):
     pedido = models.ForeignKey(Pedido, related_name='detalles', on_delete=models.CASCADE)
@@ -68,7 +70,7 @@ class DetallePedido(models.Model):
         # Considerar una señal o método en el modelo Pedido para recalcular el total del pedido
 
     def __str__(self):
-        return f"{self.cantidad} x {self.producto.nombre_producto} para Pedido {self.pedido.pk}"
+        return f"{self.cantidad} x producto {self.producto_id} para Pedido {self.pedido_id}"
 
 class PedidoProcesadoPor(models.Model):
     pedido = models.OneToOneField(Pedido, on_delete=models.CASCADE, primary_key=True)
@@ -83,4 +85,87 @@ class PedidoProcesadoPor(models.Model):
         verbose_name_plural = 'Pedidos Procesados Por'
 
     def __str__(self):
-        return f"Procesamiento Pedido {self.pedido.pk}"
\ No newline at end of file
+        return f"Procesamiento Pedido {self.pedido_id}"
+
+class AsignacionDetalle(models.Model):
+    """
+    Bodega (y cantidad) desde la que se despacha una línea de pedido. Una línea
+    puede repartirse entre varias bodegas. La crea pedidos_app.asignacion, que
+    además reserva el stock asignado.
+    """
+    detalle = models.ForeignKey(DetallePedido, related_name='asignaciones', on_delete=models.CASCADE)
+    bodega = models.ForeignKey('sucursales_app.Bodega', on_delete=models.PROTECT)
+    cantidad = models.PositiveIntegerField()
+    fecha_asignacion = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'asignacion_detalle'
+        verbose_name = 'Asignación de Detalle'
+        verbose_name_plural = 'Asignaciones de Detalles'
+        unique_together = ('detalle', 'bodega')
+
+    def __str__(self):
+        return f"{self.cantidad} u. de detalle {self.detalle_id} desde bodega {self.bodega_id}"
+
+class VentaDiaria(models.Model):
+    """
+    Resumen de ventas por día (UTC) y sucursal del vendedor: pedidos y suma de
+    Pedido.total, sin contar pedidos cancelados. Lo mantiene
+    pedidos_app.resumen_ventas; no debe editarse a mano.
+    """
+    fecha = models.DateField()
+    sucursal = models.ForeignKey('sucursales_app.Sucursal', on_delete=models.SET_NULL, null=True, blank=True, related_name='+', help_text="Nulo: pedido sin vendedor asignado")
+    pedidos = models.IntegerField(default=0)
+    monto = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'venta_diaria'
+        verbose_name = 'Venta Diaria'
+        verbose_name_plural = 'Ventas Diarias'
+        constraints = [
+            # COALESCE: una sola fila "sin sucursal" por día (NULL no choca en un índice único)
+            models.UniqueConstraint('fecha', Coalesce('sucursal', 0), name='venta_diaria_unica'),
+        ]
+
+    def __str__(self):
+        return f"Ventas {self.fecha} sucursal {self.sucursal_id}: {self.monto}"
+
+class VentaDiariaProducto(models.Model):
+    """Resumen de ventas por día (UTC), sucursal del vendedor y producto: unidades y suma de subtotales."""
+    fecha = models.DateField()
+    sucursal = models.ForeignKey('sucursales_app.Sucursal', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    producto = models.ForeignKey('productos_app.Producto', on_delete=models.CASCADE, related_name='+')
+    unidades = models.IntegerField(default=0)
+    monto = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'venta_diaria_producto'
+        verbose_name = 'Venta Diaria por Producto'
+        verbose_name_plural = 'Ventas Diarias por Producto'
+        constraints = [
+            models.UniqueConstraint('fecha', 'producto', Coalesce('sucursal', 0), name='venta_diaria_producto_unica'),
+        ]
+        indexes = [
+            models.Index(fields=['producto', 'fecha']),
+        ]
+
+    def __str__(self):
+        return f"Ventas {self.fecha} producto {self.producto_id}: {self.unidades} u."
+
+class CargaPersonal(models.Model):
+    """
+    Pedidos abiertos (Pendiente o En preparación) que cada persona tiene
+    asignados como vendedor o bodeguero. La mantiene pedidos_app.carga y la usa
+    el planificador para repartir pedidos nuevos; no debe editarse a mano.
+    """
+    personal = models.OneToOneField('usuarios_app.Personal', on_delete=models.CASCADE, primary_key=True, related_name='carga')
+    pedidos_abiertos = models.IntegerField(default=0)
+    fecha_actualizacion = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'carga_personal'
+        verbose_name = 'Carga de Personal'
+        verbose_name_plural = 'Cargas de Personal'
+
+    def __str__(self):
+        return f"{self.personal_id}: {self.pedidos_abiertos} pedidos abiertos"
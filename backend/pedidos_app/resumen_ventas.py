@@ -0,0 +1,226 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, DateField, Max, Min, Sum
+from django.db.models.functions import Cast
+
+from pedidos_app.estados import CANCELADO
+from pedidos_app.models import DetallePedido, Pedido, VentaDiaria, VentaDiariaProducto
+
+# ---------------------------
+# RESUMEN DIARIO DE VENTAS
+# ---------------------------
+# VentaDiaria (día, sucursal) y VentaDiariaProducto (día, sucursal, producto)
+# guardan las ventas ya sumadas; los reportes leen solo estas tablas. La
+# sucursal es la del vendedor (PedidoProcesadoPor.vendedor.sucursal) y el día es
+# el día UTC de Pedido.fecha. Los pedidos cancelados no cuentan.
+# Se mantienen por diferencias: quien cambie pedidos toma la contribución de
+# esos pedidos antes del cambio (contribucion()) y después llama a
+# actualizar_resumen(ids, anterior), que suma la diferencia con
+# INSERT ... ON CONFLICT DO UPDATE (una sentencia por lote; los incrementos son
+# atómicos frente a checkouts concurrentes). Los pedidos se bloquean antes de
+# leer su contribución (bloquear_pedidos), así dos cambios concurrentes sobre el
+# mismo pedido no restan dos veces la misma contribución. Crear un pedido es el caso con
+# contribución anterior vacía. Los cambios que no pasen por estas funciones
+# (admin, SQL) se corrigen con el comando reconstruir_resumen_ventas.
+
+TAMANO_LOTE = 500
+CERO = Decimal('0')
+
+
+class Contribucion:
+    """Ventas de un conjunto de pedidos, indexadas por la clave de cada resumen."""
+
+    def __init__(self):
+        self.diaria = defaultdict(lambda: [0, CERO])  # (fecha, sucursal_id) -> [pedidos, monto]
+        self.productos = defaultdict(lambda: [0, CERO])  # (fecha, sucursal_id, producto_id) -> [unidades, monto]
+
+    def restar(self, otra):
+        diferencia = Contribucion()
+        for destino, actual, anterior in (
+            (diferencia.diaria, self.diaria, otra.diaria),
+            (diferencia.productos, self.productos, otra.productos),
+        ):
+            for clave in actual.keys() | anterior.keys():
+                cantidad = actual.get(clave, (0, CERO))[0] - anterior.get(clave, (0, CERO))[0]
+                monto = actual.get(clave, (0, CERO))[1] - anterior.get(clave, (0, CERO))[1]
+                if cantidad or monto:
+                    destino[clave] = [cantidad, monto]
+        return diferencia
+
+
+def _dia():
+    return Cast('fecha', DateField())
+
+
+def bloquear_pedidos(pedidos_ids):
+    """SELECT ... FOR UPDATE de los pedidos, por lotes y en orden de pk. Debe llamarse dentro de una transacción."""
+    pedidos_ids = sorted(set(pedidos_ids))
+    for inicio in range(0, len(pedidos_ids), TAMANO_LOTE):
+        list(Pedido.objects.select_for_update().filter(
+            pk__in=pedidos_ids[inicio:inicio + TAMANO_LOTE]
+        ).order_by('pk').values_list('pk', flat=True))
+
+
+def contribucion(pedidos_ids):
+    """Contribución actual de los pedidos a los resúmenes (dos consultas por lote)."""
+    resultado = Contribucion()
+    pedidos_ids = sorted(set(pedidos_ids))
+    for inicio in range(0, len(pedidos_ids), TAMANO_LOTE):
+        pedidos = Pedido.objects.filter(pk__in=pedidos_ids[inicio:inicio + TAMANO_LOTE]).exclude(
+            estado_pedido__nombre_estado=CANCELADO
+        )
+        for fecha, sucursal_id, total in pedidos.annotate(dia=_dia()).values_list(
+            'dia', 'pedidoprocesadopor__vendedor__sucursal_id', 'total'
+        ):
+            fila = resultado.diaria[fecha, sucursal_id]
+            fila[0] += 1
+            fila[1] += total
+        for fecha, sucursal_id, producto_id, unidades, monto in DetallePedido.objects.filter(
+            pedido__in=pedidos
+        ).annotate(dia=Cast('pedido__fecha', DateField())).order_by().values(
+            'dia', 'pedido__pedidoprocesadopor__vendedor__sucursal_id', 'producto_id'
+        ).annotate(unidades=Sum('cantidad'), monto=Sum('subtotal')).values_list(
+            'dia', 'pedido__pedidoprocesadopor__vendedor__sucursal_id', 'producto_id', 'unidades', 'monto'
+        ):
+            fila = resultado.productos[fecha, sucursal_id, producto_id]
+            fila[0] += unidades
+            fila[1] += monto
+    return resultado
+
+
+def _sumar(modelo, columnas_clave, columnas_valor, filas):
+    """INSERT ... ON CONFLICT DO UPDATE que suma `columnas_valor` a las filas existentes."""
+    tabla = connection.ops.quote_name(modelo._meta.db_table)
+    columnas = [connection.ops.quote_name(columna) for columna in columnas_clave + columnas_valor]
+    # Debe coincidir con el índice único del modelo (COALESCE de la sucursal)
+    conflicto = ', '.join(
+        'COALESCE(%s, 0)' % connection.ops.quote_name(columna) if columna == 'sucursal_id'
+        else connection.ops.quote_name(columna) for columna in columnas_clave
+    )
+    sumas = ', '.join(
+        f'{columna} = {tabla}.{columna} + excluded.{columna}' for columna in columnas[len(columnas_clave):]
+    )
+    marcadores = '(%s)' % ', '.join(['%s'] * len(columnas))
+    with connection.cursor() as cursor:
+        for inicio in range(0, len(filas), TAMANO_LOTE):
+            lote = filas[inicio:inicio + TAMANO_LOTE]
+            cursor.execute(
+                f'INSERT INTO {tabla} ({", ".join(columnas)}) VALUES {", ".join([marcadores] * len(lote))} '
+                f'ON CONFLICT ({conflicto}) DO UPDATE SET {sumas}',
+                [valor for fila in lote for valor in fila],
+            )
+
+
+def actualizar_resumen(pedidos_ids, anterior=None):
+    """
+    Suma a los resúmenes la diferencia entre la contribución actual de los
+    pedidos y `anterior`. Quien pase `anterior` debe haberla tomado con los
+    pedidos ya bloqueados, en la misma transacción.
+    """
+    with transaction.atomic():
+        bloquear_pedidos(pedidos_ids)
+        diferencia = contribucion(pedidos_ids).restar(anterior or Contribucion())
+        _sumar(VentaDiaria, ['fecha', 'sucursal_id'], ['pedidos', 'monto'], [
+            (fecha, sucursal_id, pedidos, monto)
+            for (fecha, sucursal_id), (pedidos, monto) in diferencia.diaria.items()
+        ])
+        _sumar(VentaDiariaProducto, ['fecha', 'producto_id', 'sucursal_id'], ['unidades', 'monto'], [
+            (fecha, producto_id, sucursal_id, unidades, monto)
+            for (fecha, sucursal_id, producto_id), (unidades, monto) in diferencia.productos.items()
+        ])
+    return diferencia
+
+
+@contextmanager
+def cambios_en_pedidos(pedidos_ids):
+    """Para cambios puntuales (vistas): toma la contribución antes y suma la diferencia al salir."""
+    with transaction.atomic():
+        bloquear_pedidos(pedidos_ids)
+        anterior = contribucion(pedidos_ids)
+        yield
+        actualizar_resumen(pedidos_ids, anterior)
+
+
+# ---------------------------
+# REPORTES
+# ---------------------------
+# agrupar -> (tabla de resumen, columna clave, columna nombre, columna de cantidad)
+AGRUPACIONES = {
+    'dia': (VentaDiaria, 'fecha', None, 'pedidos'),
+    'sucursal': (VentaDiaria, 'sucursal_id', 'sucursal__nombre_sucursal', 'pedidos'),
+    'producto': (VentaDiariaProducto, 'producto_id', 'producto__nombre_producto', 'unidades'),
+    'categoria': (VentaDiariaProducto, 'producto__categoria_id', 'producto__categoria__nombre_categoria', 'unidades'),
+}
+
+
+def reporte(desde, hasta, agrupar='dia'):
+    """
+    Ventas entre `desde` y `hasta` (fechas UTC, inclusive) leídas solo de los
+    resúmenes: filas {clave, nombre, pedidos|unidades, monto}.
+    """
+    modelo, clave, nombre, cantidad = AGRUPACIONES[agrupar]
+    columnas = [clave] + ([nombre] if nombre else [])
+    filas = modelo.objects.filter(fecha__gte=desde, fecha__lte=hasta).order_by().values(*columnas).annotate(
+        cantidad=Sum(cantidad), total=Sum('monto')
+    ).order_by(clave if agrupar == 'dia' else '-total')
+    return [
+        {'clave': fila[clave], 'nombre': fila[nombre] if nombre else None, cantidad: fila['cantidad'],
+         'monto': fila['total']}
+        for fila in filas if fila['cantidad'] or fila['total']
+    ]
+
+
+# ---------------------------
+# RECONSTRUCCIÓN
+# ---------------------------
+def _inicio_dia(fecha):
+    return datetime.combine(fecha, time.min, tzinfo=dt_timezone.utc)
+
+
+def reconstruir_dia(fecha):
+    """Recalcula desde pedidos y detalles las filas de un día. Devuelve (filas diarias, filas por producto)."""
+    # Lectura y escritura en la misma transacción, con los pedidos del día
+    # bloqueados: un cambio incremental concurrente espera a que termine en vez
+    # de perderse al reemplazar las filas del día
+    with transaction.atomic():
+        del_dia = Pedido.objects.filter(
+            fecha__gte=_inicio_dia(fecha), fecha__lt=_inicio_dia(fecha + timedelta(days=1))
+        )
+        list(del_dia.select_for_update().order_by('pk').values_list('pk', flat=True))
+        pedidos = del_dia.exclude(estado_pedido__nombre_estado=CANCELADO)
+        diaria = [
+            VentaDiaria(fecha=fecha, sucursal_id=sucursal_id, pedidos=cantidad, monto=monto)
+            for sucursal_id, cantidad, monto in pedidos.order_by().values(
+                'pedidoprocesadopor__vendedor__sucursal_id'
+            ).annotate(cantidad=Count('pk'), monto=Sum('total')).values_list(
+                'pedidoprocesadopor__vendedor__sucursal_id', 'cantidad', 'monto'
+            )
+        ]
+        productos = [
+            VentaDiariaProducto(fecha=fecha, sucursal_id=sucursal_id, producto_id=producto_id, unidades=unidades,
+                                monto=monto)
+            for sucursal_id, producto_id, unidades, monto in DetallePedido.objects.filter(
+                pedido__in=pedidos
+            ).order_by().values(
+                'pedido__pedidoprocesadopor__vendedor__sucursal_id', 'producto_id'
+            ).annotate(unidades=Sum('cantidad'), monto=Sum('subtotal')).values_list(
+                'pedido__pedidoprocesadopor__vendedor__sucursal_id', 'producto_id', 'unidades', 'monto'
+            )
+        ]
+        VentaDiaria.objects.filter(fecha=fecha).delete()
+        VentaDiariaProducto.objects.filter(fecha=fecha).delete()
+        VentaDiaria.objects.bulk_create(diaria, batch_size=TAMANO_LOTE)
+        VentaDiariaProducto.objects.bulk_create(productos, batch_size=TAMANO_LOTE)
+    return len(diaria), len(productos)
+
+
+def rango_de_pedidos():
+    """(primer día, último día) UTC con pedidos, o (None, None)."""
+    fechas = Pedido.objects.aggregate(primera=Min('fecha'), ultima=Max('fecha'))
+    if fechas['primera'] is None:
+        return None, None
+    return fechas['primera'].astimezone(dt_timezone.utc).date(), fechas['ultima'].astimezone(dt_timezone.utc).date()
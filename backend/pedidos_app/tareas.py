@@ -0,0 +1,52 @@
+from datetime import date, timedelta
+
+from comun_app.cola import tarea
+from marketing_app.models import ClienteNotificacion, Notificacion
+from pedidos_app.carga import asignar_personal as asignar_personal_pendiente
+from pedidos_app.models import Pedido
+from pedidos_app.resumen_ventas import reconstruir_dia
+
+# ---------------------------
+# TAREAS DIFERIDAS DE PEDIDOS (comun_app.cola)
+# ---------------------------
+def _titulo(pedido_id):
+    return f"Pedido {pedido_id} despachado"
+
+
+@tarea('pedidos.notificar_despacho')
+def notificar_despacho(pedidos_ids):
+    """Crea una Notificacion y su ClienteNotificacion por pedido despachado. Devuelve cuántas creó."""
+    pedidos = list(Pedido.objects.filter(pk__in=pedidos_ids).order_by('pk').values_list('pk', 'cliente_id'))
+    # Idempotente: un reintento no repite las notificaciones ya creadas
+    ya_notificados = set(ClienteNotificacion.objects.filter(
+        notificacion__titulo__in=[_titulo(pedido_id) for pedido_id, _ in pedidos]
+    ).values_list('notificacion__titulo', flat=True))
+    pedidos = [(pedido_id, cliente_id) for pedido_id, cliente_id in pedidos if _titulo(pedido_id) not in ya_notificados]
+    notificaciones = Notificacion.objects.bulk_create(
+        Notificacion(titulo=_titulo(pedido_id),
+                     contenido=f"Tu pedido {pedido_id} fue despachado y va en camino.")
+        for pedido_id, _ in pedidos
+    )
+    ClienteNotificacion.objects.bulk_create(
+        ClienteNotificacion(cliente_id=cliente_id, notificacion=notificacion)
+        for (_, cliente_id), notificacion in zip(pedidos, notificaciones)
+    )
+    return len(notificaciones)
+
+
+@tarea('pedidos.reconstruir_resumen_ventas')
+def reconstruir_resumen_ventas(desde, hasta):
+    """Recalcula el resumen diario de ventas entre dos fechas ISO (inclusive)."""
+    dia, ultimo = date.fromisoformat(desde), date.fromisoformat(hasta)
+    dias = 0
+    while dia <= ultimo:
+        reconstruir_dia(dia)
+        dias += 1
+        dia += timedelta(days=1)
+    return {'dias': dias}
+
+
+@tarea('pedidos.asignar_personal')
+def asignar_personal(pedidos_ids=None):
+    """Asigna vendedor y bodeguero por carga de trabajo a los pedidos abiertos que no los tienen."""
+    return asignar_personal_pendiente(pedidos_ids)
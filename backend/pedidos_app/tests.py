@@ -1,3 +1,535 @@
+import csv
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from comun_app.cola import Trabajador, descubrir_tareas
+from comun_app.models import Tarea
+from geografia_app.models import Comuna, Region
+from inventario_app.models import Inventario
+from pagos_app.models import MetodoPago
+from pedidos_app.asignacion import asignar_pendientes
+from pedidos_app.carga import asignar_personal, programar_asignacion
+from marketing_app.models import ClienteNotificacion
+from pedidos_app.estados import (
+    CANCELADO, DESPACHADO, EN_PREPARACION, PENDIENTE, TransicionInvalida, _transicionar_lote, transicionar,
+)
+from pedidos_app.models import (
+    AsignacionDetalle, CargaPersonal, DetallePedido, EstadoPedido, Pedido, PedidoProcesadoPor, TipoEntrega, VentaDiaria,
+    VentaDiariaProducto,
+)
+from productos_app.models import Categoria, Producto
+from sucursales_app.models import Bodega, Sucursal
+from usuarios_app.models import Cliente, Personal, TipoPersonal, Usuario
+
+
+class PedidosTestMixin:
+    """Datos mínimos para crear pedidos: cliente, estado, tipo de entrega y método de pago."""
+
+    def crear_datos_base(self):
+        self.santiago = Region.objects.create(nombre_region='Metropolitana')
+        self.valparaiso = Region.objects.create(nombre_region='Valparaíso')
+        self.comuna_santiago = Comuna.objects.create(nombre_comuna='Santiago', region=self.santiago)
+        self.comuna_vina = Comuna.objects.create(nombre_comuna='Viña del Mar', region=self.valparaiso)
+        self.cliente = self.crear_cliente('cliente', self.comuna_santiago)
+        self.estado = EstadoPedido.objects.get(nombre_estado=PENDIENTE)
+        self.tipo_entrega = TipoEntrega.objects.create(descripcion_entrega='Despacho')
+        self.metodo_pago = MetodoPago.objects.create(descripcion_pago='Tarjeta')
+
+    def crear_cliente(self, nombre, comuna):
+        usuario = Usuario.objects.create_user(nombre, 'clave-segura')
+        return Cliente.objects.create(usuario=usuario, nombre_completo=nombre.title(), email=f'{nombre}@ferremas.cl',
+                                      direccion_detallada='Calle 1', comuna=comuna)
+
+    def crear_bodega(self, nombre, comuna):
+        sucursal = Sucursal.objects.create(nombre_sucursal=nombre, direccion='-', comuna=comuna)
+        return Bodega.objects.create(nombre_bodega='Principal', sucursal=sucursal)
+
+    def crear_producto(self, codigo, precio='1000.00'):
+        return Producto.objects.create(nombre_producto=codigo, precio=precio, codigo_producto=codigo)
+
+    def crear_pedido(self, lineas, cliente=None):
+        pedido = Pedido.objects.create(cliente=cliente or self.cliente, estado_pedido=self.estado,
+                                       tipo_entrega=self.tipo_entrega, metodo_pago=self.metodo_pago)
+        for producto, cantidad in lineas:
+            DetallePedido.objects.create(pedido=pedido, producto=producto, cantidad=cantidad,
+                                         precio_unitario=Decimal(producto.precio))
+        return pedido
+
+
+class AsignacionPedidosTests(PedidosTestMixin, TestCase):
+    def setUp(self):
+        self.crear_datos_base()
+        self.local = self.crear_bodega('Santiago Centro', self.comuna_santiago)
+        self.remota = self.crear_bodega('Viña', self.comuna_vina)
+        self.martillo = self.crear_producto('MAR')
+        self.serrucho = self.crear_producto('SER')
+
+    def stock(self, bodega, producto, cantidad):
+        Inventario.objects.create(producto=producto, bodega=bodega, cantidad=cantidad)
+
+    def asignaciones(self, pedido):
+        return sorted(AsignacionDetalle.objects.filter(detalle__pedido=pedido).values_list(
+            'detalle__producto_id', 'bodega_id', 'cantidad'))
+
+    def test_prefiere_la_region_del_cliente(self):
+        self.stock(self.local, self.martillo, 5)
+        self.stock(self.remota, self.martillo, 5)
+        pedido = self.crear_pedido([(self.martillo, 2)])
+        asignar_pendientes()
+        self.assertEqual(self.asignaciones(pedido), [(self.martillo.pk, self.local.pk, 2)])
+        self.assertEqual(Inventario.objects.get(bodega=self.local).cantidad, 3)
+
+    def test_evita_dividir_el_despacho(self):
+        # La bodega local solo tiene uno de los productos; la remota tiene ambos
+        self.stock(self.local, self.martillo, 5)
+        self.stock(self.remota, self.martillo, 5)
+        self.stock(self.remota, self.serrucho, 5)
+        pedido = self.crear_pedido([(self.martillo, 1), (self.serrucho, 1)])
+        asignar_pendientes()
+        self.assertEqual({bodega for _, bodega, _ in self.asignaciones(pedido)}, {self.remota.pk})
+
+    def test_reparte_una_linea_si_ninguna_bodega_alcanza(self):
+        self.stock(self.local, self.martillo, 3)
+        self.stock(self.remota, self.martillo, 4)
+        pedido = self.crear_pedido([(self.martillo, 6)])
+        resumen = asignar_pendientes()
+        self.assertEqual(resumen['divididos'], 1)
+        self.assertEqual(self.asignaciones(pedido), [
+            (self.martillo.pk, self.local.pk, 3), (self.martillo.pk, self.remota.pk, 3),
+        ])
+
+    def test_lote_descuenta_stock_entre_pedidos(self):
+        self.stock(self.local, self.martillo, 5)
+        primero = self.crear_pedido([(self.martillo, 4)])
+        segundo = self.crear_pedido([(self.martillo, 4)], self.crear_cliente('otro', self.comuna_vina))
+        resumen = asignar_pendientes()
+        self.assertEqual((resumen['asignados'], resumen['sin_stock_ids']), (1, [segundo.pk]))
+        self.assertEqual(len(self.asignaciones(primero)), 1)
+        self.assertEqual(self.asignaciones(segundo), [])
+        # Al llegar stock, el pedido pendiente se asigna en la siguiente pasada
+        self.stock(self.remota, self.martillo, 10)
+        self.assertEqual(asignar_pendientes()['asignados'], 1)
+
+    def test_consultas_no_dependen_de_la_cantidad_de_pedidos(self):
+        self.stock(self.local, self.martillo, 1000)
+        self.stock(self.remota, self.serrucho, 1000)
+        programar_asignacion()  # ambas mediciones reutilizan la tarea pendiente
+
+        def consultas(pedidos):
+            ids = [self.crear_pedido([(self.martillo, 1), (self.serrucho, 2)]).pk for _ in range(pedidos)]
+            with CaptureQueriesContext(connection) as contexto:
+                self.assertEqual(asignar_pendientes(pedidos_ids=ids)['asignados'], pedidos)
+            return len(contexto.captured_queries)
+
+        self.assertEqual(consultas(2), consultas(40))
+
+    def test_no_asigna_pedidos_cerrados(self):
+        self.stock(self.local, self.martillo, 10)
+        cancelado = self.crear_pedido([(self.martillo, 1)])
+        despachado = self.crear_pedido([(self.martillo, 1)])
+        Pedido.objects.filter(pk=cancelado.pk).update(estado_pedido=EstadoPedido.objects.get(nombre_estado=CANCELADO))
+        Pedido.objects.filter(pk=despachado.pk).update(estado_pedido=EstadoPedido.objects.get(nombre_estado=DESPACHADO))
+        self.assertEqual(asignar_pendientes()['asignados'], 0)
+        self.assertEqual(Inventario.objects.get(bodega=self.local).cantidad, 10)
+
+
+class PedidoExpandidoTests(PedidosTestMixin, TestCase):
+    def setUp(self):
+        self.crear_datos_base()
+        self.bodega = self.crear_bodega('Santiago Centro', self.comuna_santiago)
+        self.client = APIClient()
+        self.client.force_authenticate(self.cliente.usuario)
+
+    def crear_pedidos(self, pedidos, lineas):
+        productos = [self.crear_producto(f'P{pedidos}-{lineas}-{indice}') for indice in range(lineas)]
+        for producto in productos:
+            Inventario.objects.create(producto=producto, bodega=self.bodega, cantidad=1000)
+        ids = [self.crear_pedido([(producto, 2) for producto in productos]).pk for _ in range(pedidos)]
+        asignar_pendientes(pedidos_ids=ids)
+        return ids
+
+    def test_anida_relaciones(self):
+        pedido_id, = self.crear_pedidos(1, 2)
+        data = self.client.get(f'/api/pedidos/pedidos/{pedido_id}/?expandir=true').data
+        self.assertEqual(data['cliente']['nombre_completo'], 'Cliente')
+        self.assertEqual(data['estado_pedido']['nombre_estado'], 'Pendiente')
+        self.assertEqual(data['metodo_pago']['descripcion_pago'], 'Tarjeta')
+        self.assertEqual([detalle['producto']['codigo_producto'] for detalle in data['detalles']], ['P1-2-0', 'P1-2-1'])
+        self.assertEqual(data['detalles'][0]['asignaciones'], [{'bodega': self.bodega.pk, 'cantidad': 2}])
+        # Sin el parámetro se mantiene la representación plana
+        plano = self.client.get(f'/api/pedidos/pedidos/{pedido_id}/').data
+        self.assertEqual(plano['cliente'], self.cliente.pk)
+
+    def test_consultas_no_dependen_del_tamano(self):
+        def consultas(url):
+            with CaptureQueriesContext(connection) as contexto:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            return len(contexto.captured_queries)
+
+        pequeno, = self.crear_pedidos(1, 1)
+        grande, = self.crear_pedidos(1, 30)
+        self.assertEqual(consultas(f'/api/pedidos/pedidos/{pequeno}/?expandir=true'),
+                         consultas(f'/api/pedidos/pedidos/{grande}/?expandir=true'))
+
+        listado = consultas('/api/pedidos/pedidos/?expandir=true')
+        self.crear_pedidos(20, 10)
+        self.assertEqual(consultas('/api/pedidos/pedidos/?expandir=true'), listado)
+
+    def test_str_no_consulta_relaciones(self):
+        pedido_id, = self.crear_pedidos(1, 2)
+        pedido = Pedido.objects.get(pk=pedido_id)
+        detalle = DetallePedido.objects.filter(pedido_id=pedido_id).first()
+        with self.assertNumQueries(0):
+            str(pedido), str(detalle)
+
+
+class EstadosPedidoTests(PedidosTestMixin, TestCase):
+    def setUp(self):
+        self.crear_datos_base()
+        self.bodega = self.crear_bodega('Santiago Centro', self.comuna_santiago)
+        self.martillo = self.crear_producto('MAR')
+        Inventario.objects.create(producto=self.martillo, bodega=self.bodega, cantidad=100)
+        usuario = Usuario.objects.create_user('bodeguero', 'clave-segura', is_staff=True)
+        self.personal = Personal.objects.create(usuario=usuario, rut='1-9', nombre_completo='Bodeguero',
+                                                email='bodeguero@ferremas.cl')
+        self.client = APIClient()
+        self.client.force_authenticate(usuario)
+
+    def crear_pedidos(self, cantidad):
+        ids = [self.crear_pedido([(self.martillo, 2)]).pk for _ in range(cantidad)]
+        asignar_pendientes(pedidos_ids=ids)
+        return ids
+
+    def estados(self, ids):
+        return set(Pedido.objects.filter(pk__in=ids).values_list('estado_pedido__nombre_estado', flat=True))
+
+    def test_solo_transiciones_permitidas(self):
+        ids = self.crear_pedidos(2)
+        resultado = transicionar(ids[:1], EN_PREPARACION, self.personal.pk)
+        self.assertEqual(resultado.movidos, ids[:1])
+        self.assertEqual(PedidoProcesadoPor.objects.get(pedido_id=ids[0]).vendedor, self.personal)
+
+        resultado = transicionar(ids, DESPACHADO)
+        self.assertEqual(resultado.movidos, ids[:1])
+        self.assertEqual(resultado.rechazados, [{'pedido_id': ids[1], 'estado_actual': PENDIENTE}])
+
+        response = self.client.patch(f'/api/pedidos/pedidos/{ids[1]}/', {
+            'estado_pedido': EstadoPedido.objects.get(nombre_estado=DESPACHADO).pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.estados(ids[1:]), {PENDIENTE})
+
+    def test_cancelar_libera_stock(self):
+        ids = self.crear_pedidos(3)
+        self.assertEqual(Inventario.objects.get().cantidad, 94)
+        response = self.client.post(f'/api/pedidos/pedidos/{ids[0]}/transicion/', {'estado': CANCELADO},
+                                    format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Inventario.objects.get().cantidad, 96)
+        # Un pedido cancelado no vuelve a reservar ni se puede reactivar
+        self.assertEqual(asignar_pendientes()['pedidos'], 0)
+        self.assertEqual(self.client.post(f'/api/pedidos/pedidos/{ids[0]}/transicion/', {'estado': EN_PREPARACION},
+                                          format='json').status_code, 409)
+
+    def test_clientes_solo_cancelan_sus_pedidos_pendientes(self):
+        ids = self.crear_pedidos(2)
+        url = f'/api/pedidos/pedidos/{ids[0]}/transicion/'
+        intruso = self.crear_cliente('intruso', self.comuna_santiago)
+        self.client.force_authenticate(intruso.usuario)
+        self.assertEqual(self.client.post(url, {'estado': CANCELADO}, format='json').status_code, 403)
+        self.assertEqual(self.client.patch(f'/api/pedidos/pedidos/{ids[0]}/', {
+            'estado_pedido': EstadoPedido.objects.get(nombre_estado=CANCELADO).pk,
+        }, format='json').status_code, 403)
+
+        self.client.force_authenticate(self.cliente.usuario)
+        self.assertEqual(self.client.post(url, {'estado': EN_PREPARACION}, format='json').status_code, 403)
+        self.assertEqual(self.client.post(url, {'estado': CANCELADO}, format='json').status_code, 200)
+        transicionar(ids[1:], EN_PREPARACION)
+        self.assertEqual(self.client.post(f'/api/pedidos/pedidos/{ids[1]}/transicion/', {'estado': CANCELADO},
+                                          format='json').status_code, 403)
+        self.assertEqual(self.estados(ids), {CANCELADO, EN_PREPARACION})
+
+    def test_patch_con_carrera_responde_409(self):
+        ids = self.crear_pedidos(1)
+        with mock.patch('pedidos_app.api.views.transicionar', side_effect=TransicionInvalida("Otro proceso")):
+            response = self.client.patch(f'/api/pedidos/pedidos/{ids[0]}/', {
+                'estado_pedido': EstadoPedido.objects.get(nombre_estado=EN_PREPARACION).pk, 'total': '1.00',
+            }, format='json')
+        self.assertEqual(response.status_code, 409)
+        # El resto del PATCH se revierte con la transición
+        self.assertNotEqual(Pedido.objects.get(pk=ids[0]).total, Decimal('1.00'))
+
+    def test_transicion_masiva(self):
+        ids = self.crear_pedidos(30)
+        transicionar(ids[:20], EN_PREPARACION)
+
+        def mover(pedidos):
+            with CaptureQueriesContext(connection) as contexto:
+                response = self.client.post('/api/pedidos/pedidos/transicion-masiva/', {
+                    'pedidos': pedidos, 'estado': DESPACHADO,
+                }, format='json')
+            self.assertEqual(response.status_code, 200)
+            return response.data, len(contexto.captured_queries)
+
+        data, pocas = mover(ids[:2] + [999999])
+        self.assertEqual((data['movidos'], data['no_encontrados']), (2, [999999]))
+        data, muchas = mover(ids[2:])
+        self.assertEqual((data['movidos'], len(data['rechazados'])), (18, 10))
+        self.assertEqual(pocas, muchas)
+        self.assertEqual(self.estados(ids[:20]), {DESPACHADO})
+        # Las notificaciones se crean en el trabajador de la cola, no en la solicitud
+        self.assertEqual(ClienteNotificacion.objects.filter(cliente=self.cliente).count(), 0)
+        descubrir_tareas()
+        Trabajador().ciclo(una_vez=True)
+        self.assertEqual(ClienteNotificacion.objects.filter(cliente=self.cliente).count(), 20)
+        self.assertEqual(PedidoProcesadoPor.objects.filter(bodeguero=self.personal).count(), 20)
+
+    def test_lote_con_carrera_se_revierte_sin_perder_los_demas(self):
+        ids = self.crear_pedidos(5)
+        llamadas = []
+
+        def lote_con_carrera(pedidos_ids, *args):
+            llamadas.append(pedidos_ids)
+            if len(llamadas) == 2:
+                # Otro proceso movió uno de los pedidos entre la lectura y el UPDATE
+                Pedido.objects.filter(pk=pedidos_ids[0]).update(
+                    estado_pedido=EstadoPedido.objects.get(nombre_estado=CANCELADO)
+                )
+            return _transicionar_lote(pedidos_ids, *args)
+
+        with mock.patch('pedidos_app.estados._transicionar_lote', side_effect=lote_con_carrera):
+            with mock.patch('pedidos_app.estados.puede_transicionar', return_value=True):
+                resultado = transicionar(ids, EN_PREPARACION, lote=2)
+        self.assertEqual((resultado.movidos, resultado.fallidos), (ids[:2] + ids[4:], ids[2:4]))
+        self.assertEqual(resultado.no_encontrados, [])
+        self.assertEqual(self.estados(ids[:2] + ids[4:]), {EN_PREPARACION})
+        # El lote que chocó no quedó a medias: su otro pedido sigue Pendiente
+        self.assertEqual(self.estados(ids[3:4]), {PENDIENTE})
+
+
+class ResumenVentasTests(PedidosTestMixin, TestCase):
+    def setUp(self):
+        self.crear_datos_base()
+        self.bodega = self.crear_bodega('Santiago Centro', self.comuna_santiago)
+        usuario = Usuario.objects.create_user('vendedor', 'clave-segura', is_staff=True)
+        self.vendedor = Personal.objects.create(usuario=usuario, rut='2-7', nombre_completo='Vendedor',
+                                                email='vendedor@ferremas.cl', sucursal=self.bodega.sucursal)
+        herramientas = Categoria.objects.create(nombre_categoria='Herramientas')
+        self.martillo = self.crear_producto('MAR', precio='5000.00')
+        self.martillo.categoria = herramientas
+        self.martillo.save()
+        self.clavo = self.crear_producto('CLA', precio='100.00')
+        self.client = APIClient()
+        self.client.force_authenticate(usuario)
+
+    def crear_por_api(self, lineas):
+        total = sum(Decimal(producto.precio) * cantidad for producto, cantidad in lineas)
+        pedido_id = self.client.post('/api/pedidos/pedidos/', {
+            'cliente': self.cliente.pk, 'estado_pedido': self.estado.pk, 'tipo_entrega': self.tipo_entrega.pk,
+            'metodo_pago': self.metodo_pago.pk, 'total': str(total),
+        }, format='json').data['id']
+        for producto, cantidad in lineas:
+            self.assertEqual(self.client.post('/api/pedidos/detalles-pedido/', {
+                'pedido': pedido_id, 'producto': producto.pk, 'cantidad': cantidad,
+                'precio_unitario': producto.precio, 'subtotal': '0',
+            }, format='json').status_code, 201)
+        return pedido_id
+
+    def resumenes(self):
+        return (
+            list(VentaDiaria.objects.exclude(pedidos=0).order_by('fecha', 'sucursal_id').values_list(
+                'fecha', 'sucursal_id', 'pedidos', 'monto')),
+            list(VentaDiariaProducto.objects.exclude(unidades=0).order_by('fecha', 'sucursal_id', 'producto_id').values_list(
+                'fecha', 'sucursal_id', 'producto_id', 'unidades', 'monto')),
+        )
+
+    def reporte(self, agrupar):
+        hoy = timezone.now().date().isoformat()
+        response = self.client.get('/api/pedidos/reportes/ventas/', {'desde': hoy, 'hasta': hoy, 'agrupar': agrupar})
+        self.assertEqual(response.status_code, 200)
+        return [(fila['clave'], fila.get('pedidos', fila.get('unidades')), fila['monto']) for fila in response.data['filas']]
+
+    def test_mantiene_resumen_igual_a_la_reconstruccion(self):
+        primero = self.crear_por_api([(self.martillo, 2), (self.clavo, 10)])
+        segundo = self.crear_por_api([(self.martillo, 1)])
+        cancelado = self.crear_por_api([(self.clavo, 5)])
+        self.assertEqual(self.reporte('dia'), [(timezone.now().date(), 3, '16500.00')])
+
+        transicionar([primero], EN_PREPARACION, self.vendedor.pk)
+        transicionar([cancelado], CANCELADO)
+        self.assertEqual(self.reporte('sucursal'), [
+            (self.vendedor.sucursal_id, 1, '11000.00'), (None, 1, '5000.00'),
+        ])
+        self.assertEqual(self.reporte('categoria'), [
+            (self.martillo.categoria_id, 3, '15000.00'), (None, 10, '1000.00'),
+        ])
+        self.assertEqual(self.reporte('producto')[0], (self.martillo.pk, 3, '15000.00'))
+
+        incremental = self.resumenes()
+        call_command('reconstruir_resumen_ventas', stdout=StringIO())
+        self.assertEqual(self.resumenes(), incremental)
+        self.assertEqual(Pedido.objects.filter(pk=segundo).count(), 1)
+
+    def test_reporte_lee_solo_los_resumenes(self):
+        self.crear_por_api([(self.martillo, 2)])
+        with CaptureQueriesContext(connection) as contexto:
+            self.reporte('categoria')
+        self.assertEqual(len(contexto.captured_queries), 1)
+        self.assertIn('venta_diaria_producto', contexto.captured_queries[0]['sql'])
+        self.assertNotIn('detalle_pedido', contexto.captured_queries[0]['sql'])
+
+
+class ExportacionPedidosTests(PedidosTestMixin, TestCase):
+    def setUp(self):
+        self.crear_datos_base()
+        self.martillo = self.crear_producto('MAR', precio='5000.00')
+        self.clavo = self.crear_producto('CLA', precio='100.00')
+        self.primero = self.crear_pedido([(self.martillo, 1), (self.clavo, 10)])
+        self.vacio = self.crear_pedido([])
+        self.anterior = self.crear_pedido([(self.clavo, 1)])
+        Pedido.objects.filter(pk=self.anterior.pk).update(fecha=timezone.now() - timedelta(days=40))
+        self.client = APIClient()
+        self.client.force_authenticate(Usuario.objects.create_user('contador', 'clave-segura', is_staff=True))
+
+    def exportar(self, **parametros):
+        response = self.client.get('/api/pedidos/pedidos/exportar/', parametros)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv_una_fila_por_linea(self):
+        hoy = timezone.now().date()
+        response, contenido = self.exportar(desde=hoy.isoformat(), hasta=hoy.isoformat())
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        filas = list(csv.DictReader(StringIO(contenido)))
+        self.assertEqual([(int(fila['pedido_id']), fila['codigo_producto']) for fila in filas], [
+            (self.primero.pk, 'MAR'), (self.primero.pk, 'CLA'), (self.vacio.pk, ''),
+        ])
+        self.assertEqual((filas[1]['estado'], filas[1]['cantidad'], filas[1]['subtotal']),
+                         (PENDIENTE, '10', '1000.00'))
+
+    def test_csv_neutraliza_formulas(self):
+        Producto.objects.filter(pk=self.martillo.pk).update(nombre_producto='=HYPERLINK("http://x")')
+        Producto.objects.filter(pk=self.clavo.pk).update(nombre_producto='-Clavo')
+        _, contenido = self.exportar(formato='csv')
+        nombres = {fila['codigo_producto']: fila['producto'] for fila in csv.DictReader(StringIO(contenido))}
+        self.assertEqual((nombres['MAR'], nombres['CLA']), ('\'=HYPERLINK("http://x")', "'-Clavo"))
+
+    def test_ndjson_un_objeto_por_pedido(self):
+        response, contenido = self.exportar(formato='ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        pedidos = [json.loads(linea) for linea in contenido.splitlines()]
+        self.assertEqual([pedido['pedido_id'] for pedido in pedidos],
+                         [self.primero.pk, self.vacio.pk, self.anterior.pk])
+        self.assertEqual([linea['producto'] for linea in pedidos[0]['detalles']], ['MAR', 'CLA'])
+        self.assertEqual(pedidos[1]['detalles'], [])
+        self.assertEqual(pedidos[0]['metodo_pago'], self.metodo_pago.descripcion_pago)
+
+    def test_solo_administradores_y_parametros_validos(self):
+        self.assertEqual(self.client.get('/api/pedidos/pedidos/exportar/', {'formato': 'xml'}).status_code, 400)
+        self.client.force_authenticate(self.cliente.usuario)
+        self.assertEqual(self.client.get('/api/pedidos/pedidos/exportar/').status_code, 403)
+
+    def test_comando_lee_por_lotes(self):
+        salida = StringIO()
+        # Lotes de una fila: el resultado no depende del tamaño de lote
+        call_command('exportar_pedidos', '--estado', PENDIENTE, '--lote', '1', stdout=salida)
+        self.assertEqual(len(salida.getvalue().splitlines()), 1 + 4)
+        self.assertEqual(salida.getvalue().splitlines()[0].split(',')[:2], ['pedido_id', 'fecha'])
+
+
+class PlanificadorPersonalTests(PedidosTestMixin, TestCase):
+    def setUp(self):
+        self.crear_datos_base()
+        self.bodega = self.crear_bodega('Santiago Centro', self.comuna_santiago)
+        self.otra_bodega = self.crear_bodega('Viña', self.comuna_vina)
+        self.martillo = self.crear_producto('MAR')
+        Inventario.objects.create(producto=self.martillo, bodega=self.bodega, cantidad=10000)
+        vendedor = TipoPersonal.objects.create(nombre_tipo='Vendedor')
+        bodeguero = TipoPersonal.objects.create(nombre_tipo='Bodeguero')
+        self.vendedores = [self.crear_personal(f'vendedor{i}', vendedor, self.bodega) for i in range(3)]
+        self.bodegueros = [self.crear_personal(f'bodeguero{i}', bodeguero, self.bodega) for i in range(2)]
+        # De otra sucursal: nunca recibe pedidos despachados desde Santiago Centro
+        self.crear_personal('vendedorvina', vendedor, self.otra_bodega)
+
+    def crear_personal(self, nombre, tipo, bodega):
+        usuario = Usuario.objects.create_user(nombre, 'clave-segura', is_staff=True)
+        return Personal.objects.create(usuario=usuario, rut=nombre, nombre_completo=nombre.title(),
+                                       email=f'{nombre}@ferremas.cl', sucursal=bodega.sucursal, tipo=tipo)
+
+    def crear_pedidos(self, cantidad):
+        ids = [self.crear_pedido([(self.martillo, 1)]).pk for _ in range(cantidad)]
+        asignar_pendientes(pedidos_ids=ids)
+        return ids
+
+    def cargas(self, personas):
+        cargas = dict(CargaPersonal.objects.values_list('personal_id', 'pedidos_abiertos'))
+        return [cargas.get(persona.pk, 0) for persona in personas]
+
+    def test_reparte_por_carga_sin_consultas_por_pedido(self):
+        CargaPersonal.objects.create(personal=self.vendedores[0], pedidos_abiertos=4)
+        ids = self.crear_pedidos(10)
+        primeros = self.crear_pedidos(2)
+        with CaptureQueriesContext(connection) as pocos:
+            asignar_personal(primeros)
+        with CaptureQueriesContext(connection) as muchos:
+            resumen = asignar_personal(ids)
+        self.assertEqual((resumen['asignados'], resumen['sin_personal']), (10, 0))
+        # Quien ya tenía 4 pedidos abiertos recibe menos: 4+2, 0+5, 0+5 (los dos primeros eran del lote anterior)
+        self.assertEqual(sorted(self.cargas(self.vendedores)), [5, 5, 6])
+        self.assertEqual(self.cargas(self.bodegueros), [6, 6])
+        self.assertEqual(len(pocos.captured_queries), len(muchos.captured_queries))
+        self.assertFalse(PedidoProcesadoPor.objects.filter(vendedor__sucursal=self.otra_bodega.sucursal).exists())
+        # Solo se cargan (y bloquean) las cargas de la sucursal que despacha
+        self.assertFalse(CargaPersonal.objects.filter(personal__sucursal=self.otra_bodega.sucursal).exists())
+        # La sucursal del vendedor pasa al resumen de ventas
+        self.assertEqual(VentaDiaria.objects.get(pedidos__gt=0).sucursal, self.bodega.sucursal)
+
+    def test_transiciones_descuentan_la_carga(self):
+        ids = self.crear_pedidos(4)
+        asignar_personal(ids)
+        self.assertEqual(sum(self.cargas(self.bodegueros)), 4)
+        transicionar(ids[:2], EN_PREPARACION, self.vendedores[0].pk)
+        transicionar(ids[:1], DESPACHADO)
+        transicionar(ids[3:], CANCELADO)
+        self.assertEqual(sum(self.cargas(self.bodegueros)), 2)
+        self.assertEqual(sum(self.cargas(self.vendedores)), 2)
+        self.assertEqual(self.cargas(self.vendedores)[0], 1)
+
+        incremental = sorted(CargaPersonal.objects.values_list('personal_id', 'pedidos_abiertos'))
+        call_command('asignar_personal', '--recalcular', stdout=StringIO())
+        self.assertEqual(sorted(CargaPersonal.objects.exclude(pedidos_abiertos=0).values_list(
+            'personal_id', 'pedidos_abiertos')), [fila for fila in incremental if fila[1]])
+
+    def test_sin_personal_en_la_sucursal(self):
+        Inventario.objects.filter(bodega=self.bodega).delete()
+        Inventario.objects.create(producto=self.martillo, bodega=self.otra_bodega, cantidad=10)
+        ids = self.crear_pedidos(1)
+        salida = StringIO()
+        call_command('asignar_personal', stdout=salida)
+        self.assertIn(f'Pedidos sin personal: {ids[0]}', salida.getvalue())
+        # El vendedor de Viña se asigna; falta bodeguero
+        procesado = PedidoProcesadoPor.objects.get(pedido_id=ids[0])
+        self.assertEqual((procesado.vendedor.sucursal, procesado.bodeguero), (self.otra_bodega.sucursal, None))
 
-# Create your tests here.
+    def test_asignar_pendientes_encola_la_asignacion_de_personal(self):
+        ids = self.crear_pedidos(3)
+        self.assertFalse(PedidoProcesadoPor.objects.exists())
+        self.assertEqual(Tarea.objects.filter(nombre='pedidos.asignar_personal').count(), 1)
+        Tarea.objects.update(ejecutar_desde=timezone.now())
+        descubrir_tareas()
+        Trabajador().ciclo(una_vez=True)
+        self.assertEqual(PedidoProcesadoPor.objects.filter(
+            pedido_id__in=ids, vendedor__isnull=False, bodeguero__isnull=False
+        ).count(), 3)
+        self.assertEqual(sum(self.cargas(self.vendedores)), 3)
@@ -0,0 +1,34 @@
+from rest_framework.response import Response
+
+from productos_app import cache_catalogo
+
+# ---------------------------
+# CACHÉ DE RESPUESTAS DEL CATÁLOGO
+# ---------------------------
+class CacheCatalogoMixin:
+    """
+    Sirve list/retrieve desde la caché del catálogo.
+
+    Se guarda `response.data` (antes de renderizar), por lo que la misma entrada
+    sirve para JSON y para la API navegable. Los permisos ya fueron verificados
+    en initial(), antes de llegar aquí.
+    """
+    cache_recurso = None
+
+    def list(self, request, *args, **kwargs):
+        clave = cache_catalogo.clave_lista(self.cache_recurso, request)
+        return self._responder_desde_cache(clave, super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        clave = cache_catalogo.clave_detalle(self.cache_recurso, pk, request)
+        return self._responder_desde_cache(clave, super().retrieve, request, *args, **kwargs)
+
+    def _responder_desde_cache(self, clave, generar, request, *args, **kwargs):
+        datos = cache_catalogo.leer(clave)
+        if datos is not None:
+            return Response(datos)
+        response = generar(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache_catalogo.guardar(clave, response.data)
+        return response
@@ -0,0 +1,10 @@
+from rest_framework.pagination import PageNumberPagination
+
+# ---------------------------
+# PAGINACIÓN DE BÚSQUEDA
+# ---------------------------
+class BusquedaPagination(PageNumberPagination):
+    """Los resultados de búsqueda se ordenan por relevancia, por lo que se paginan por número de página."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from comun_app.api.campos import ListaSeparadaPorComasField
 from productos_app.models import Categoria, Producto
 
 # ---------------------------
@@ -10,6 +11,30 @@ class CategoriaSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class ProductoSerializer(serializers.ModelSerializer):
+    # Precio con la mejor promoción vigente para una unidad (tabla precio_efectivo).
+    # Viene anotado en el queryset (ver marketing_app.precios.anotar_precio_efectivo)
+    precio_efectivo = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+
     class Meta:
         model = Producto
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+        # El stock total se deriva del inventario por bodega (ver inventario_app/stock.py)
+        read_only_fields = ['stock']
+
+class ProductoBusquedaSerializer(ProductoSerializer):
+    relevancia = serializers.FloatField(read_only=True)
+
+# ---------------------------
+# FILTROS DEL CATÁLOGO
+# ---------------------------
+class FiltroProductosSerializer(serializers.Serializer):
+    categoria = ListaSeparadaPorComasField(child=serializers.IntegerField(), required=False)
+    marca = ListaSeparadaPorComasField(required=False)
+    precio_min = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    precio_max = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    en_stock = serializers.BooleanField(required=False, allow_null=True, default=None)
+
+    def validate(self, attrs):
+        if attrs.get('en_stock') is None:
+            attrs.pop('en_stock', None)
+        return {filtro: valor for filtro, valor in attrs.items() if valor != []}
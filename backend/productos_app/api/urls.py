@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoriaViewSet, ProductoViewSet
+from .views import CategoriaViewSet, ProductoViewSet, CacheCatalogoEstadisticasView, AutocompletarProductosView
 
 # Crear router para ViewSets
 router = DefaultRouter()
@@ -11,4 +11,6 @@ router.register(r'productos', ProductoViewSet)
 urlpatterns = [
     path('', include(router.urls)),
     # Rutas adicionales específicas no manejadas por el router
+    path('autocompletar/', AutocompletarProductosView.as_view(), name='productos-autocompletar'),
+    path('cache/estadisticas/', CacheCatalogoEstadisticasView.as_view(), name='cache-catalogo-estadisticas'),
 ]
\ No newline at end of file
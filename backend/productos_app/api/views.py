@@ -1,36 +1,131 @@
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from comun_app.api.mixins import ConsultaCondicionalMixin
+from comun_app.api.serializacion import ListadoRapidoMixin
+from inventario_app.stock import CONTADOR_STOCK
+from productos_app import cache_catalogo
+from productos_app.autocompletar import indice as indice_autocompletar
+from productos_app.busqueda import obtener_backend
+from productos_app.facetas import calcular_facetas, filtrar_productos
+from marketing_app.models import PrecioEfectivo
+from marketing_app.precios import anotar_precio_efectivo, precios_para
 from productos_app.models import Categoria as Category, Producto as Product
-from .serializers import CategoriaSerializer, ProductoSerializer
+from .mixins import CacheCatalogoMixin
+from .pagination import BusquedaPagination
+from .serializers import (
+    CategoriaSerializer, ProductoSerializer, ProductoBusquedaSerializer, FiltroProductosSerializer
+)
 
-class ProductoViewSet(viewsets.ModelViewSet):
+class ProductoViewSet(ConsultaCondicionalMixin, CacheCatalogoMixin, ListadoRapidoMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows products to be viewed or edited.
+    List and detail responses are served from the catalog cache and support
+    conditional GET (ETag / If-None-Match); cache misses on the list use the
+    fast values()-based serialization path.
     """
+    cache_recurso = 'producto'
+    # El stock tiene su propio contador: una venta no cambia la versión de Producto
+    condicional_modelos = (Product, Category, PrecioEfectivo, CONTADOR_STOCK)
     queryset = Product.objects.all() # Uses the imported Product model
     serializer_class = ProductoSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-    def get_queryset(self):
+    def get_filtros(self):
+        """
+        Filtros del listado, validados desde los query params:
+        ?categoria=1,2&marca=Bosch,Stanley&precio_min=1000&precio_max=50000&en_stock=true
         """
-        Optionally restricts the returned products based on a query parameter.
-        If your Product model has an 'owner' field linked to your custom Usuario model
-        (which uses 'nombre_usuario' as USERNAME_FIELD), you might filter by that.
+        if not hasattr(self, '_filtros'):
+            serializer = FiltroProductosSerializer(data=self.request.query_params)
+            serializer.is_valid(raise_exception=True)
+            self._filtros = serializer.validated_data
+        return self._filtros
 
-        Example: If Product has an 'owner' (ForeignKey to Usuario) and you want to filter
-        by the owner's 'nombre_usuario' using a 'owner_username' query parameter:
+    def get_queryset(self):
         """
-        queryset = self.queryset
-        owner_username = self.request.query_params.get('owner_username', None)
-        if owner_username is not None:
-            # This assumes your Product model has an 'owner' field (ForeignKey to your User model)
-            # and your User model's USERNAME_FIELD is 'nombre_usuario'.
-            queryset = queryset.filter(owner__nombre_usuario=owner_username)
+        Restricts the listed products with the catalog filters. Detail and write
+        actions always see the whole catalog.
+        """
+        queryset = anotar_precio_efectivo(self.queryset)
+        if self.action == 'list':
+            queryset = filtrar_productos(queryset, self.get_filtros())
         return queryset
 
-class CategoriaViewSet(viewsets.ModelViewSet):
+    def perform_create(self, serializer):
+        serializer.save()
+        self._anotar_precio_efectivo(serializer.instance)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        self._anotar_precio_efectivo(serializer.instance)
+
+    def _anotar_precio_efectivo(self, producto):
+        # Las respuestas de escritura no salen del queryset anotado
+        producto.precio_efectivo = precios_para({producto.pk: 1})[producto.pk].precio
+
+    def get_paginated_response(self, data):
+        # Las facetas viajan junto a la página de resultados (y se guardan con ella en caché)
+        response = super().get_paginated_response(data)
+        if self.action == 'list':
+            response.data['facetas'] = calcular_facetas(self.queryset, self.get_filtros())
+        return response
+
+    @action(detail=False, methods=['get'], pagination_class=BusquedaPagination,
+            serializer_class=ProductoBusquedaSerializer)
+    def buscar(self, request):
+        """
+        Búsqueda de texto completo sobre nombre, descripción, marca y categoría.
+        Uso: /api/productos/productos/buscar/?q=martillo+stanley
+        Los resultados vienen ordenados por relevancia y paginados.
+        """
+        resultados = obtener_backend().buscar(request.query_params.get('q', ''), self.get_queryset())
+        page = self.paginate_queryset(resultados)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+class CategoriaViewSet(ConsultaCondicionalMixin, CacheCatalogoMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows categories to be viewed or edited.
     """
+    cache_recurso = 'categoria'
+    condicional_modelos = (Category,)
     queryset = Category.objects.all()
     serializer_class = CategoriaSerializer
-    permission_classes = [permissions.IsAuthenticated] # O ajusta los permisos según necesites
\ No newline at end of file
+    permission_classes = [permissions.IsAuthenticated] # O ajusta los permisos según necesites
+
+class CacheCatalogoEstadisticasView(APIView):
+    """
+    Contadores de aciertos/fallos de la caché del catálogo.
+    DELETE reinicia los contadores.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_catalogo.estadisticas())
+
+    def delete(self, request):
+        cache_catalogo.reiniciar_estadisticas()
+        return Response(status=204)
+
+class AutocompletarProductosView(APIView):
+    """
+    Sugerencias por prefijo sobre nombre y código de producto.
+    Uso: /api/productos/autocompletar/?q=marti&limite=10
+
+    Se responde desde el índice en memoria, sin consultas a la base salvo la
+    verificación periódica de versión (ver productos_app.autocompletar).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    LIMITE_MAXIMO = 50
+
+    def get(self, request):
+        try:
+            limite = int(request.query_params.get('limite', 10))
+        except ValueError:
+            limite = -1
+        if limite < 1:
+            return Response({'limite': ["Debe ser un entero mayor que 0."]}, status=status.HTTP_400_BAD_REQUEST)
+        texto = request.query_params.get('q', '')
+        return Response(indice_autocompletar.sugerir(texto, min(limite, self.LIMITE_MAXIMO)))
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ProductosAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'productos_app'
+
+    def ready(self):
+        from comun_app.versiones import registrar_modelos
+        from . import signals  # noqa: F401
+        from .models import Categoria, Producto
+
+        registrar_modelos(Categoria, Producto)
@@ -0,0 +1,219 @@
+import logging
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from comun_app.versiones import incrementar_contador, obtener_versiones
+from productos_app.models import Producto
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# ÍNDICE DE PREFIJOS PARA AUTOCOMPLETAR
+# ---------------------------
+# Arreglo ordenado de (clave normalizada, producto_id) consultado con bisect.
+# Cada producto aporta una clave por código y una por cada palabra de su nombre
+# (el nombre desde esa palabra hasta el final), así "marti" encuentra tanto
+# "Martillo carpintero" como "Set de martillos".
+#
+# El índice vive en memoria de cada proceso y se construye al arrancar el
+# servidor (precargar(), llamado desde backend/wsgi.py y asgi.py). Los cambios
+# locales se aplican al instante por señales; los de otros procesos se detectan
+# con un contador propio en VersionTabla (CONTADOR, comun_app.versiones) que solo
+# sube cuando cambia el nombre o el código de un producto (no con el stock ni el
+# precio). Se consulta a lo más cada AUTOCOMPLETAR_VERIFICAR_SEGUNDOS y, si otro
+# proceso lo movió, se reconstruye en segundo plano mientras se siguen
+# atendiendo consultas con el índice anterior. Cada cambio local trae la versión
+# que produjo: si es la siguiente a la del índice, la adopta y no reconstruye.
+# Los cambios incrementales que llegan durante una reconstrucción se vuelven a
+# aplicar sobre el índice nuevo antes de publicarlo.
+
+CONTADOR = 'productos_app.producto.autocompletar'
+
+
+def normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.lower().split())
+
+
+def _claves(nombre, codigo):
+    palabras = normalizar(nombre).split()
+    claves = {' '.join(palabras[i:]) for i in range(len(palabras))}
+    if codigo:
+        claves.add(normalizar(codigo))
+    return claves
+
+
+class IndicePrefijos:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entradas = []      # [(clave, producto_id)] ordenado
+        self._productos = {}     # producto_id -> (nombre_producto, codigo_producto)
+        self._cargado = False
+        self._version = None
+        self._verificado = 0.0
+        self._reconstruyendo = False
+        self._durante_construccion = None
+
+    # ---------------------------
+    # CONSTRUCCIÓN
+    # ---------------------------
+    def _version_actual(self):
+        return obtener_versiones([CONTADOR])[CONTADOR][0]
+
+    def _avanzar(self, version):
+        # Un cambio local con la versión siguiente deja el índice vigente; si no
+        # es la siguiente, otro proceso cambió algo entre medio y se reconstruirá
+        if version is not None and self._version is not None and version == self._version + 1:
+            self._version = version
+
+    def construir(self):
+        with self._lock:
+            # Registro de cambios incrementales mientras se lee la tabla
+            self._durante_construccion = []
+        try:
+            version = self._version_actual()
+            productos = {}
+            entradas = []
+            for pk, nombre, codigo in Producto.objects.values_list(
+                'pk', 'nombre_producto', 'codigo_producto'
+            ).iterator(chunk_size=5000):
+                productos[pk] = (nombre, codigo)
+                entradas.extend((clave, pk) for clave in _claves(nombre, codigo))
+            entradas.sort()
+            with self._lock:
+                self._entradas, self._productos = entradas, productos
+                self._version = version
+                for pk, nombre, codigo, version_cambio in self._durante_construccion:
+                    self._aplicar(pk, nombre, codigo)
+                    self._avanzar(version_cambio)
+                self._verificado = time.monotonic()
+                self._cargado = True
+        finally:
+            with self._lock:
+                self._durante_construccion = None
+
+    def precargar(self):
+        """Construye el índice al arrancar el servidor; si la base no está disponible se construirá al consultar."""
+        try:
+            self.construir()
+        except DatabaseError:
+            logger.warning("No se pudo precargar el índice de autocompletar", exc_info=True)
+
+    def _reconstruir_en_segundo_plano(self):
+        with self._lock:
+            if self._reconstruyendo:
+                return
+            self._reconstruyendo = True
+
+        def reconstruir():
+            from django.db import connection
+            try:
+                self.construir()
+            finally:
+                self._reconstruyendo = False
+                connection.close()
+
+        threading.Thread(target=reconstruir, name='autocompletar-productos', daemon=True).start()
+
+    def _asegurar_vigente(self):
+        if not self._cargado:
+            # Sin precarga (p. ej. fuera del servidor): se construye de forma síncrona
+            with self._lock:
+                if not self._cargado:
+                    self.construir()
+            return
+        intervalo = getattr(settings, 'AUTOCOMPLETAR_VERIFICAR_SEGUNDOS', 5)
+        if time.monotonic() - self._verificado < intervalo:
+            return
+        self._verificado = time.monotonic()
+        if self._version_actual() != self._version:
+            self._reconstruir_en_segundo_plano()
+
+    # ---------------------------
+    # ACTUALIZACIÓN INCREMENTAL
+    # ---------------------------
+    def _quitar(self, pk):
+        anterior = self._productos.pop(pk, None)
+        if anterior is None:
+            return
+        for clave in _claves(*anterior):
+            posicion = bisect_left(self._entradas, (clave, pk))
+            if posicion < len(self._entradas) and self._entradas[posicion] == (clave, pk):
+                del self._entradas[posicion]
+
+    def _aplicar(self, pk, nombre, codigo):
+        """Quita las claves anteriores de `pk` y, si nombre no es None, agrega las nuevas."""
+        self._quitar(pk)
+        if nombre is None:
+            return
+        self._productos[pk] = (nombre, codigo)
+        for clave in _claves(nombre, codigo):
+            insort(self._entradas, (clave, pk))
+
+    def _cambiar(self, pk, nombre=None, codigo=None, version=None):
+        # Debe llamarse con el lock tomado. `version` es la que dejó el cambio en
+        # CONTADOR (registrar_cambio); los demás procesos se reconstruyen con ella.
+        self._aplicar(pk, nombre, codigo)
+        self._avanzar(version)
+        if self._durante_construccion is not None:
+            self._durante_construccion.append((pk, nombre, codigo, version))
+
+    def actualizar(self, pk, nombre, codigo, version=None):
+        with self._lock:
+            if self._cargado or self._durante_construccion is not None:
+                self._cambiar(pk, nombre, codigo, version)
+
+    def actualizar_varios(self, productos_ids, version=None):
+        if not self._cargado and self._durante_construccion is None:
+            return
+        filas = list(
+            Producto.objects.filter(pk__in=productos_ids).values_list('pk', 'nombre_producto', 'codigo_producto')
+        )
+        with self._lock:
+            # La versión del lote se adopta con su última fila (todas salen del mismo incremento)
+            for posicion, (pk, nombre, codigo) in enumerate(filas, 1):
+                self._cambiar(pk, nombre, codigo, version if posicion == len(filas) else None)
+
+    def eliminar(self, pk, version=None):
+        with self._lock:
+            if self._cargado or self._durante_construccion is not None:
+                self._cambiar(pk, version=version)
+
+    # ---------------------------
+    # CONSULTA
+    # ---------------------------
+    def sugerir(self, texto, limite=10):
+        """Productos cuyo código o alguna palabra del nombre empieza con `texto`. No consulta la base."""
+        prefijo = normalizar(texto)
+        if not prefijo:
+            return []
+        self._asegurar_vigente()
+        with self._lock:
+            entradas, productos = self._entradas, self._productos
+            resultado = []
+            vistos = set()
+            posicion = bisect_left(entradas, (prefijo,))
+            while posicion < len(entradas) and len(resultado) < limite:
+                clave, pk = entradas[posicion]
+                if not clave.startswith(prefijo):
+                    break
+                if pk not in vistos:
+                    vistos.add(pk)
+                    nombre, codigo = productos[pk]
+                    resultado.append({'id': pk, 'nombre_producto': nombre, 'codigo_producto': codigo})
+                posicion += 1
+        return resultado
+
+
+indice = IndicePrefijos()
+
+
+def registrar_cambio():
+    """Incrementa CONTADOR dentro de la transacción del cambio y devuelve la versión nueva."""
+    return incrementar_contador(CONTADOR)
@@ -0,0 +1,230 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from productos_app.models import Producto
+
+# ---------------------------
+# BÚSQUEDA DE TEXTO COMPLETO DEL CATÁLOGO
+# ---------------------------
+# El índice cubre nombre_producto, descripcion, marca y Categoria.nombre_categoria.
+# Cada backend mantiene su propia estructura (tabla FTS5 en SQLite, tsvector en
+# PostgreSQL) creada por la migración 0002 de productos_app.
+
+PALABRA_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _palabras(texto):
+    return PALABRA_RE.findall(texto or '')
+
+
+def _filas_indexables(productos_ids):
+    return Producto.objects.filter(pk__in=productos_ids).values_list(
+        'id', 'nombre_producto', 'descripcion', 'marca', 'categoria__nombre_categoria'
+    )
+
+
+class ResultadosBusqueda:
+    """
+    Resultado perezoso de una búsqueda, ordenado por relevancia.
+
+    Implementa count() y slicing para poder pasarse directamente al Paginator
+    de Django (y por lo tanto a la paginación de DRF).
+    """
+    def __init__(self, backend, consulta, queryset=None):
+        self.backend = backend
+        self.consulta = consulta
+        self.queryset = queryset if queryset is not None else Producto.objects.all()
+        self._total = None
+
+    def count(self):
+        if self._total is None:
+            self._total = self.backend.contar(self.consulta) if self.consulta else 0
+        return self._total
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        inicio = item.start or 0
+        fin = item.stop if item.stop is not None else self.count()
+        if not self.consulta or fin <= inicio:
+            return []
+        ranking = self.backend.rankear(self.consulta, fin - inicio, inicio)
+        productos = self.queryset.in_bulk([pk for pk, _ in ranking])
+        resultado = []
+        for pk, relevancia in ranking:
+            producto = productos.get(pk)
+            if producto is not None:
+                producto.relevancia = relevancia
+                resultado.append(producto)
+        return resultado
+
+
+class BusquedaBackend:
+    """Interfaz común de los backends de búsqueda."""
+
+    def preparar_consulta(self, texto):
+        return ' '.join(_palabras(texto))
+
+    def buscar(self, texto, queryset=None):
+        """`queryset` permite cargar los productos encontrados con anotaciones o select_related."""
+        return ResultadosBusqueda(self, self.preparar_consulta(texto), queryset)
+
+    def indexar(self, productos_ids):
+        pass
+
+    def eliminar(self, productos_ids):
+        pass
+
+    def reconstruir(self):
+        self.indexar(Producto.objects.values_list('pk', flat=True))
+
+    def contar(self, consulta):
+        raise NotImplementedError
+
+    def rankear(self, consulta, limite, desplazamiento):
+        """Devuelve una lista de (producto_id, relevancia) de mayor a menor relevancia."""
+        raise NotImplementedError
+
+
+class SQLiteFTS5Backend(BusquedaBackend):
+    """Usa la tabla virtual FTS5 'productos_fts' (rowid = id del producto)."""
+    # Pesos bm25 por columna: nombre, descripción, marca, categoría
+    PESOS = (10.0, 1.0, 5.0, 3.0)
+
+    def preparar_consulta(self, texto):
+        # Cada palabra se busca como prefijo; las comillas evitan que la sintaxis
+        # de FTS5 (AND, NEAR, *, etc.) escrita por el usuario se interprete.
+        return ' '.join('"%s"*' % palabra for palabra in _palabras(texto))
+
+    def indexar(self, productos_ids):
+        filas = list(_filas_indexables(productos_ids))
+        with connection.cursor() as cursor:
+            cursor.executemany('DELETE FROM productos_fts WHERE rowid = %s', [(pk,) for pk in productos_ids])
+            cursor.executemany(
+                'INSERT INTO productos_fts (rowid, nombre_producto, descripcion, marca, nombre_categoria) '
+                'VALUES (%s, %s, %s, %s, %s)',
+                [(pk, nombre, descripcion or '', marca or '', categoria or '')
+                 for pk, nombre, descripcion, marca, categoria in filas],
+            )
+
+    def eliminar(self, productos_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany('DELETE FROM productos_fts WHERE rowid = %s', [(pk,) for pk in productos_ids])
+
+    def reconstruir(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM productos_fts')
+        super().reconstruir()
+
+    def contar(self, consulta):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM productos_fts WHERE productos_fts MATCH %s', [consulta])
+            return cursor.fetchone()[0]
+
+    def rankear(self, consulta, limite, desplazamiento):
+        # bm25() devuelve valores negativos: más bajo = más relevante
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT rowid, bm25(productos_fts, %s, %s, %s, %s) AS puntaje FROM productos_fts '
+                'WHERE productos_fts MATCH %s ORDER BY puntaje, rowid LIMIT %s OFFSET %s',
+                [*self.PESOS, consulta, limite, desplazamiento],
+            )
+            return [(pk, -puntaje) for pk, puntaje in cursor.fetchall()]
+
+
+class PostgresBackend(BusquedaBackend):
+    """Usa la tabla 'productos_busqueda' con un tsvector ponderado e índice GIN."""
+    CONFIGURACION = 'spanish'
+
+    def indexar(self, productos_ids):
+        filas = list(_filas_indexables(productos_ids))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                'INSERT INTO productos_busqueda (producto_id, documento) VALUES (%s, '
+                "setweight(to_tsvector(%s::regconfig, %s), 'A') || "
+                "setweight(to_tsvector(%s::regconfig, %s), 'B') || "
+                "setweight(to_tsvector(%s::regconfig, %s), 'C') || "
+                "setweight(to_tsvector(%s::regconfig, %s), 'D')) "
+                'ON CONFLICT (producto_id) DO UPDATE SET documento = EXCLUDED.documento',
+                [(pk,
+                  self.CONFIGURACION, nombre,
+                  self.CONFIGURACION, marca or '',
+                  self.CONFIGURACION, categoria or '',
+                  self.CONFIGURACION, descripcion or '')
+                 for pk, nombre, descripcion, marca, categoria in filas],
+            )
+
+    def eliminar(self, productos_ids):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM productos_busqueda WHERE producto_id = ANY(%s)', [list(productos_ids)])
+
+    def reconstruir(self):
+        with connection.cursor() as cursor:
+            cursor.execute('TRUNCATE productos_busqueda')
+        super().reconstruir()
+
+    def contar(self, consulta):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT count(*) FROM productos_busqueda '
+                'WHERE documento @@ websearch_to_tsquery(%s::regconfig, %s)',
+                [self.CONFIGURACION, consulta],
+            )
+            return cursor.fetchone()[0]
+
+    def rankear(self, consulta, limite, desplazamiento):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT producto_id, ts_rank(documento, q) AS puntaje '
+                'FROM productos_busqueda, websearch_to_tsquery(%s::regconfig, %s) q '
+                'WHERE documento @@ q ORDER BY puntaje DESC, producto_id LIMIT %s OFFSET %s',
+                [self.CONFIGURACION, consulta, limite, desplazamiento],
+            )
+            return cursor.fetchall()
+
+
+class BusquedaSimpleBackend(BusquedaBackend):
+    """
+    Respaldo para motores sin soporte de texto completo: filtra con icontains
+    y ordena por nombre. No mantiene estructura propia.
+    """
+    def _queryset(self, consulta):
+        from django.db.models import Q
+
+        queryset = Producto.objects.all()
+        for palabra in consulta.split():
+            queryset = queryset.filter(
+                Q(nombre_producto__icontains=palabra) | Q(descripcion__icontains=palabra)
+                | Q(marca__icontains=palabra) | Q(categoria__nombre_categoria__icontains=palabra)
+            )
+        return queryset
+
+    def contar(self, consulta):
+        return self._queryset(consulta).count()
+
+    def rankear(self, consulta, limite, desplazamiento):
+        ids = self._queryset(consulta).order_by('nombre_producto', 'pk').values_list('pk', flat=True)
+        return [(pk, 0.0) for pk in ids[desplazamiento:desplazamiento + limite]]
+
+
+BACKENDS_POR_MOTOR = {
+    'sqlite': SQLiteFTS5Backend,
+    'postgresql': PostgresBackend,
+}
+
+
+def obtener_backend():
+    """
+    Backend configurado en PRODUCTOS_BUSQUEDA_BACKEND (ruta de la clase) o,
+    por defecto, el que corresponde al motor de la base de datos.
+    """
+    ruta = getattr(settings, 'PRODUCTOS_BUSQUEDA_BACKEND', None)
+    if ruta:
+        return import_string(ruta)()
+    return BACKENDS_POR_MOTOR.get(connection.vendor, BusquedaSimpleBackend)()
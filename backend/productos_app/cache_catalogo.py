@@ -0,0 +1,111 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+
+# ---------------------------
+# CACHÉ DE LECTURA DEL CATÁLOGO
+# ---------------------------
+# Las respuestas de listado y detalle se guardan bajo claves versionadas:
+#   catalogo:<recurso>:lista:v<version>:<hash de la URL>
+#   catalogo:<recurso>:<pk>:v<version>:<hash de la URL>
+# Invalidar consiste en incrementar la versión correspondiente; las entradas
+# antiguas quedan inalcanzables y las expulsa el propio backend (TTL/LRU).
+
+PREFIJO = 'catalogo'
+CLAVE_ACIERTOS = f'{PREFIJO}:estadisticas:aciertos'
+CLAVE_FALLOS = f'{PREFIJO}:estadisticas:fallos'
+
+
+def obtener_cache():
+    try:
+        return caches[getattr(settings, 'CATALOGO_CACHE_ALIAS', 'catalogo')]
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+def _nueva_version():
+    # Si una clave de versión es expulsada no debe reiniciarse en 1: podría
+    # coincidir con una versión antigua cuyas respuestas siguen en caché.
+    return time.time_ns()
+
+
+def _version(cache, clave):
+    version = cache.get(clave)
+    if version is None:
+        version = _nueva_version()
+        if not cache.add(clave, version, timeout=None):
+            version = cache.get(clave, version)
+    return version
+
+
+def _incrementar(cache, clave):
+    try:
+        cache.incr(clave)
+    except ValueError:
+        cache.set(clave, _nueva_version(), timeout=None)
+
+
+def _hash_ruta(request):
+    return hashlib.sha1(request.get_full_path().encode('utf-8')).hexdigest()
+
+
+def clave_lista(recurso, request):
+    cache = obtener_cache()
+    version = _version(cache, f'{PREFIJO}:{recurso}:lista:version')
+    return f'{PREFIJO}:{recurso}:lista:v{version}:{_hash_ruta(request)}'
+
+
+def clave_detalle(recurso, pk, request):
+    cache = obtener_cache()
+    version = _version(cache, f'{PREFIJO}:{recurso}:{pk}:version')
+    return f'{PREFIJO}:{recurso}:{pk}:v{version}:{_hash_ruta(request)}'
+
+
+def invalidar(recurso, pk=None):
+    """Invalida los listados del recurso y, si se indica, el detalle de un objeto."""
+    cache = obtener_cache()
+    _incrementar(cache, f'{PREFIJO}:{recurso}:lista:version')
+    if pk is not None:
+        _incrementar(cache, f'{PREFIJO}:{recurso}:{pk}:version')
+
+
+def invalidar_detalle(recurso, pk):
+    """Invalida solo el detalle de un objeto; los listados siguen vigentes hasta su TTL."""
+    _incrementar(obtener_cache(), f'{PREFIJO}:{recurso}:{pk}:version')
+
+
+def leer(clave):
+    cache = obtener_cache()
+    datos = cache.get(clave)
+    _incrementar_contador(cache, CLAVE_FALLOS if datos is None else CLAVE_ACIERTOS)
+    return datos
+
+
+def guardar(clave, datos):
+    obtener_cache().set(clave, datos, timeout=getattr(settings, 'CATALOGO_CACHE_TIMEOUT', 300))
+
+
+def _incrementar_contador(cache, clave):
+    try:
+        cache.incr(clave)
+    except ValueError:
+        if not cache.add(clave, 1, timeout=None):
+            cache.incr(clave)
+
+
+def estadisticas():
+    cache = obtener_cache()
+    aciertos = cache.get(CLAVE_ACIERTOS, 0)
+    fallos = cache.get(CLAVE_FALLOS, 0)
+    total = aciertos + fallos
+    return {
+        'aciertos': aciertos,
+        'fallos': fallos,
+        'tasa_aciertos': round(aciertos / total, 4) if total else None,
+    }
+
+
+def reiniciar_estadisticas():
+    obtener_cache().delete_many([CLAVE_ACIERTOS, CLAVE_FALLOS])
@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+from django.db.models import Count, Max, Min, Q
+
+# ---------------------------
+# FILTROS Y FACETAS DEL CATÁLOGO
+# ---------------------------
+# Cada faceta se cuenta sobre el catálogo filtrado por todos los demás filtros
+# excepto el suyo (así el usuario ve cuántos productos obtendría al cambiarlo).
+# Cada dimensión es una única consulta agrupada, sin importar cuántos valores tenga.
+
+def _condicion(filtro, valor):
+    if filtro == 'categoria':
+        return Q(categoria_id__in=valor)
+    if filtro == 'marca':
+        return Q(marca__in=valor)
+    if filtro == 'precio_min':
+        return Q(precio__gte=valor)
+    if filtro == 'precio_max':
+        return Q(precio__lte=valor)
+    if filtro == 'en_stock':
+        return Q(stock__gt=0) if valor else Q(stock=0)
+    raise ValueError(f"Filtro desconocido: {filtro}")
+
+
+def filtrar_productos(queryset, filtros, excluir=()):
+    """Aplica los filtros ya validados (ver FiltroProductosSerializer), salvo los de `excluir`."""
+    condicion = Q()
+    for filtro, valor in filtros.items():
+        if filtro not in excluir:
+            condicion &= _condicion(filtro, valor)
+    return queryset.filter(condicion)
+
+
+def _formatear_precio(valor):
+    # Mismo formato que ProductoSerializer.precio (cadena con 2 decimales)
+    return None if valor is None else f"{Decimal(valor).quantize(Decimal('0.01')):f}"
+
+
+def calcular_facetas(queryset, filtros):
+    categorias = (
+        filtrar_productos(queryset, filtros, excluir=('categoria',))
+        .values('categoria_id', 'categoria__nombre_categoria')
+        .annotate(cantidad=Count('pk'))
+        .order_by('-cantidad', 'categoria__nombre_categoria')
+    )
+    marcas = (
+        filtrar_productos(queryset, filtros, excluir=('marca',))
+        .exclude(marca__isnull=True).exclude(marca='')
+        .values('marca')
+        .annotate(cantidad=Count('pk'))
+        .order_by('-cantidad', 'marca')
+    )
+    precios = filtrar_productos(queryset, filtros, excluir=('precio_min', 'precio_max')).aggregate(
+        minimo=Min('precio'), maximo=Max('precio')
+    )
+    stock = filtrar_productos(queryset, filtros, excluir=('en_stock',)).aggregate(
+        con_stock=Count('pk', filter=Q(stock__gt=0)), sin_stock=Count('pk', filter=Q(stock=0))
+    )
+    return {
+        'categorias': [
+            {'id': fila['categoria_id'], 'nombre': fila['categoria__nombre_categoria'], 'cantidad': fila['cantidad']}
+            for fila in categorias
+        ],
+        'marcas': [{'marca': fila['marca'], 'cantidad': fila['cantidad']} for fila in marcas],
+        'precio': {clave: _formatear_precio(valor) for clave, valor in precios.items()},
+        'en_stock': stock,
+    }
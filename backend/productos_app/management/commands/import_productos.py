@@ -0,0 +1,197 @@
+import csv
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from productos_app.models import Categoria, Producto
+from productos_app.signals import sincronizar_productos_masivo
+
+CAMPOS_ACTUALIZABLES = ('nombre_producto', 'descripcion', 'precio', 'marca', 'categoria_id')
+# Límites de las columnas: un valor que no cabe invalida la fila en vez de
+# truncarse (un código truncado puede pisar a otro producto en el upsert)
+LARGO_CODIGO = Producto._meta.get_field('codigo_producto').max_length
+LARGO_NOMBRE = Producto._meta.get_field('nombre_producto').max_length
+_campo_precio = Producto._meta.get_field('precio')
+DIGITOS_ENTEROS_PRECIO = _campo_precio.max_digits - _campo_precio.decimal_places
+
+
+class FilaInvalida(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa productos desde un archivo CSV o NDJSON haciendo upsert por codigo_producto. "
+        "Columnas: codigo_producto, nombre_producto, precio, descripcion, marca, categoria (nombre). "
+        "El archivo se lee en streaming y se procesa por lotes con bulk_create."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del archivo a importar")
+        parser.add_argument('--formato', choices=['csv', 'ndjson'], help="Por defecto se deduce de la extensión")
+        parser.add_argument('--lote', type=int, default=1000, help="Filas por lote (default: 1000)")
+        parser.add_argument('--delimitador', default=',', help="Delimitador CSV (default: ',')")
+        parser.add_argument('--crear-categorias', action='store_true',
+                            help="Crea las categorías que no existan en lugar de rechazar la fila")
+
+    def handle(self, *args, **options):
+        formato = options['formato'] or ('ndjson' if options['archivo'].endswith(('.ndjson', '.jsonl')) else 'csv')
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que 0")
+        self.crear_categorias = options['crear_categorias']
+        # Mapa nombre -> id; las categorías son pocas comparadas con los productos
+        self.categorias = dict(Categoria.objects.values_list('nombre_categoria', 'id'))
+        self.totales = {'leidas': 0, 'creadas': 0, 'actualizadas': 0, 'sin_cambios': 0, 'errores': 0}
+
+        inicio = time.monotonic()
+        try:
+            with open(options['archivo'], encoding='utf-8-sig', newline='') as archivo:
+                filas = self._leer_csv(archivo, options['delimitador']) if formato == 'csv' else self._leer_ndjson(archivo)
+                while True:
+                    lote = list(islice(filas, options['lote']))
+                    if not lote:
+                        break
+                    self._procesar_lote(lote)
+                    transcurrido = time.monotonic() - inicio
+                    self.stdout.write(
+                        f"{self.totales['leidas']} filas procesadas "
+                        f"({self.totales['leidas'] / transcurrido:.0f} filas/s)"
+                    )
+        except OSError as exc:
+            raise CommandError(f"No se pudo leer el archivo: {exc}")
+
+        transcurrido = time.monotonic() - inicio
+        velocidad = self.totales['leidas'] / transcurrido if transcurrido else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Importación terminada en {transcurrido:.1f}s ({velocidad:.0f} filas/s): "
+            f"{self.totales['creadas']} creados, {self.totales['actualizadas']} actualizados, "
+            f"{self.totales['sin_cambios']} sin cambios, {self.totales['errores']} con errores."
+        ))
+
+    # ---------------------------
+    # LECTURA
+    # ---------------------------
+    def _leer_csv(self, archivo, delimitador):
+        for linea, fila in enumerate(csv.DictReader(archivo, delimiter=delimitador), start=2):
+            yield linea, fila
+
+    def _leer_ndjson(self, archivo):
+        for linea, texto in enumerate(archivo, start=1):
+            if not texto.strip():
+                continue
+            try:
+                yield linea, json.loads(texto)
+            except json.JSONDecodeError as exc:
+                yield linea, exc
+
+    # ---------------------------
+    # PROCESAMIENTO POR LOTES
+    # ---------------------------
+    def _procesar_lote(self, lote):
+        datos = {}
+        for linea, fila in lote:
+            self.totales['leidas'] += 1
+            try:
+                if isinstance(fila, Exception):
+                    raise FilaInvalida(f"JSON inválido: {fila}")
+                valores = self._limpiar(fila)
+            except FilaInvalida as exc:
+                self.totales['errores'] += 1
+                self.stderr.write(f"Línea {linea}: {exc}")
+                continue
+            # Si un código se repite dentro del lote, gana la última fila
+            datos[valores.pop('codigo_producto')] = valores
+
+        if not datos:
+            return
+        categorias_creadas = self._crear_categorias_pendientes(datos.values())
+
+        with transaction.atomic():
+            # Sin only(): bulk_create necesita todos los campos y los diferidos se cargarían fila a fila
+            existentes = Producto.objects.filter(codigo_producto__in=datos.keys())
+            por_actualizar = []
+            for producto in existentes:
+                valores = datos.pop(producto.codigo_producto)
+                if all(getattr(producto, campo) == valor for campo, valor in valores.items()):
+                    self.totales['sin_cambios'] += 1
+                    continue
+                for campo, valor in valores.items():
+                    setattr(producto, campo, valor)
+                por_actualizar.append(producto)
+            # INSERT ... ON CONFLICT (codigo_producto) DO UPDATE: una sola sentencia por
+            # lote, mucho más barata que el CASE WHEN por fila que genera bulk_update()
+            Producto.objects.bulk_create(
+                por_actualizar, update_conflicts=True,
+                unique_fields=['codigo_producto'], update_fields=CAMPOS_ACTUALIZABLES,
+            )
+
+            nuevos = Producto.objects.bulk_create(
+                Producto(codigo_producto=codigo, **valores) for codigo, valores in datos.items()
+            )
+            if nuevos and nuevos[0].pk is None:
+                # Motores que no devuelven las claves generadas en bulk_create
+                creados_ids = Producto.objects.filter(codigo_producto__in=datos.keys()).values_list('pk', flat=True)
+            else:
+                creados_ids = [producto.pk for producto in nuevos]
+            sincronizar_productos_masivo(
+                creados_ids, [producto.pk for producto in por_actualizar], categorias_creadas
+            )
+
+        self.totales['actualizadas'] += len(por_actualizar)
+        self.totales['creadas'] += len(nuevos)
+
+    def _limpiar(self, fila):
+        if not isinstance(fila, dict):
+            raise FilaInvalida(f"se esperaba un objeto, no {type(fila).__name__}")
+        codigo = str(fila.get('codigo_producto') or '').strip()
+        nombre = str(fila.get('nombre_producto') or '').strip()
+        if not codigo or not nombre:
+            raise FilaInvalida("codigo_producto y nombre_producto son obligatorios")
+        if len(codigo) > LARGO_CODIGO:
+            raise FilaInvalida(f"codigo_producto supera los {LARGO_CODIGO} caracteres")
+        if len(nombre) > LARGO_NOMBRE:
+            raise FilaInvalida(f"nombre_producto supera los {LARGO_NOMBRE} caracteres")
+        try:
+            precio = Decimal(str(fila.get('precio'))).quantize(Decimal('0.01'))
+        except (InvalidOperation, ValueError):
+            raise FilaInvalida(f"precio inválido: {fila.get('precio')!r}")
+        if not precio.is_finite():
+            raise FilaInvalida(f"precio inválido: {fila.get('precio')!r}")
+        if precio < 0:
+            raise FilaInvalida("el precio no puede ser negativo")
+        if precio and precio.adjusted() >= DIGITOS_ENTEROS_PRECIO:
+            raise FilaInvalida(f"precio fuera de rango: {fila.get('precio')!r}")
+
+        categoria = str(fila.get('categoria') or '').strip()
+        categoria_id = None
+        if categoria:
+            categoria_id = self.categorias.get(categoria)
+            if categoria_id is None and not self.crear_categorias:
+                raise FilaInvalida(f"la categoría {categoria!r} no existe (use --crear-categorias)")
+        return {
+            'codigo_producto': codigo,
+            'nombre_producto': nombre,
+            'descripcion': fila.get('descripcion') or None,
+            'precio': precio,
+            'marca': (str(fila.get('marca') or '').strip() or None),
+            # Se resuelve en _crear_categorias_pendientes si aún no existe
+            'categoria_id': categoria_id if categoria_id is not None else (categoria or None),
+        }
+
+    def _crear_categorias_pendientes(self, filas):
+        pendientes = {f['categoria_id'] for f in filas if isinstance(f['categoria_id'], str)}
+        if pendientes:
+            Categoria.objects.bulk_create(
+                [Categoria(nombre_categoria=nombre) for nombre in pendientes], ignore_conflicts=True
+            )
+            self.categorias.update(
+                Categoria.objects.filter(nombre_categoria__in=pendientes).values_list('nombre_categoria', 'id')
+            )
+        for fila in filas:
+            if isinstance(fila['categoria_id'], str):
+                fila['categoria_id'] = self.categorias[fila['categoria_id']]
+        return bool(pendientes)
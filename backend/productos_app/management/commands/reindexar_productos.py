@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from productos_app.busqueda import obtener_backend
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de texto completo de productos."
+
+    def handle(self, *args, **options):
+        backend = obtener_backend()
+        backend.reconstruir()
+        self.stdout.write(self.style.SUCCESS(f"Índice reconstruido con {type(backend).__name__}."))
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:00
+
+from django.db import migrations
+
+
+SQLITE_CREAR = [
+    "CREATE VIRTUAL TABLE productos_fts USING fts5("
+    "nombre_producto, descripcion, marca, nombre_categoria, "
+    "tokenize = 'unicode61 remove_diacritics 2')",
+    "INSERT INTO productos_fts (rowid, nombre_producto, descripcion, marca, nombre_categoria) "
+    "SELECT p.id, p.nombre_producto, coalesce(p.descripcion, ''), coalesce(p.marca, ''), "
+    "coalesce(c.nombre_categoria, '') FROM productos p LEFT JOIN categorias c ON c.id = p.categoria_id",
+]
+
+POSTGRES_CREAR = [
+    "CREATE TABLE productos_busqueda ("
+    "producto_id bigint PRIMARY KEY REFERENCES productos (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+    "documento tsvector NOT NULL)",
+    "CREATE INDEX productos_busqueda_documento_gin ON productos_busqueda USING gin (documento)",
+    "INSERT INTO productos_busqueda (producto_id, documento) "
+    "SELECT p.id, "
+    "setweight(to_tsvector('spanish', p.nombre_producto), 'A') || "
+    "setweight(to_tsvector('spanish', coalesce(p.marca, '')), 'B') || "
+    "setweight(to_tsvector('spanish', coalesce(c.nombre_categoria, '')), 'C') || "
+    "setweight(to_tsvector('spanish', coalesce(p.descripcion, '')), 'D') "
+    "FROM productos p LEFT JOIN categorias c ON c.id = p.categoria_id",
+]
+
+
+def crear_indice(apps, schema_editor):
+    sentencias = {'sqlite': SQLITE_CREAR, 'postgresql': POSTGRES_CREAR}.get(schema_editor.connection.vendor, [])
+    for sql in sentencias:
+        schema_editor.execute(sql)
+
+
+def eliminar_indice(apps, schema_editor):
+    tabla = {'sqlite': 'productos_fts', 'postgresql': 'productos_busqueda'}.get(schema_editor.connection.vendor)
+    if tabla:
+        schema_editor.execute(f"DROP TABLE IF EXISTS {tabla}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
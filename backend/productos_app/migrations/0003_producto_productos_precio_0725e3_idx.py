@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos_app', '0002_producto_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['precio'], name='productos_precio_0725e3_idx'),
+        ),
+    ]
@@ -36,6 +36,7 @@ class Producto(models.Model):
             models.Index(fields=['nombre_producto']),
             models.Index(fields=['marca']),
             models.Index(fields=['codigo_producto']),
+            models.Index(fields=['precio']),
             # models.Index(fields=['slug']),
         ]
 
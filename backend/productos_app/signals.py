@@ -0,0 +1,115 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from comun_app.versiones import incrementar_version
+from productos_app import cache_catalogo
+from productos_app.autocompletar import indice as indice_autocompletar
+from productos_app.autocompletar import registrar_cambio as registrar_cambio_autocompletar
+from productos_app.busqueda import obtener_backend
+from productos_app.models import Categoria, Producto
+
+# Se emite tras cambios masivos de productos (bulk_create/bulk_update) con
+# el argumento `productos_ids`, para que otras apps mantengan sus datos derivados.
+productos_modificados_masivo = Signal()
+
+# ---------------------------
+# SINCRONIZACIÓN DEL ÍNDICE DE BÚSQUEDA
+# ---------------------------
+@receiver(post_save, sender=Producto)
+def indexar_producto(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    obtener_backend().indexar([instance.pk])
+
+@receiver(post_delete, sender=Producto)
+def desindexar_producto(sender, instance, **kwargs):
+    obtener_backend().eliminar([instance.pk])
+
+@receiver(post_save, sender=Categoria)
+def reindexar_categoria(sender, instance, created=False, raw=False, **kwargs):
+    # El nombre de la categoría forma parte del documento de cada producto
+    if raw or created:
+        return
+    productos_ids = list(Producto.objects.filter(categoria=instance).values_list('pk', flat=True))
+    if productos_ids:
+        obtener_backend().indexar(productos_ids)
+
+# ---------------------------
+# ÍNDICE DE AUTOCOMPLETAR
+# ---------------------------
+# El índice está en memoria: solo se actualiza si la transacción se confirma.
+# Solo los cambios de nombre o código lo afectan; el resto de los guardados no
+# mueve su contador y no provoca reconstrucciones en los demás procesos.
+@receiver(pre_save, sender=Producto)
+def detectar_cambio_autocompletar(sender, instance, raw=False, **kwargs):
+    anterior = None
+    if not instance._state.adding and instance.pk is not None:
+        anterior = Producto.objects.filter(pk=instance.pk).values_list('nombre_producto', 'codigo_producto').first()
+    instance._cambia_autocompletar = anterior != (instance.nombre_producto, instance.codigo_producto)
+
+@receiver(post_save, sender=Producto)
+def actualizar_autocompletar(sender, instance, **kwargs):
+    if not getattr(instance, '_cambia_autocompletar', True):
+        return
+    version = registrar_cambio_autocompletar()
+    transaction.on_commit(partial(
+        indice_autocompletar.actualizar, instance.pk, instance.nombre_producto, instance.codigo_producto, version
+    ))
+
+@receiver(post_delete, sender=Producto)
+def quitar_autocompletar(sender, instance, **kwargs):
+    version = registrar_cambio_autocompletar()
+    transaction.on_commit(partial(indice_autocompletar.eliminar, instance.pk, version))
+
+@receiver(productos_modificados_masivo)
+def actualizar_autocompletar_masivo(sender, productos_ids, **kwargs):
+    version = registrar_cambio_autocompletar()
+    transaction.on_commit(partial(indice_autocompletar.actualizar_varios, list(productos_ids), version))
+
+# ---------------------------
+# INVALIDACIÓN DE LA CACHÉ DEL CATÁLOGO
+# ---------------------------
+# Al confirmar la transacción: invalidar antes dejaría que otra solicitud
+# vuelva a guardar en caché los datos anteriores mientras el cambio no se ve.
+@receiver([post_save, post_delete], sender=Producto)
+def invalidar_cache_producto(sender, instance, **kwargs):
+    transaction.on_commit(partial(cache_catalogo.invalidar, 'producto', instance.pk))
+
+def _invalidar_categoria(pk):
+    cache_catalogo.invalidar('categoria', pk)
+    # Los listados de productos se filtran y agrupan por categoría
+    cache_catalogo.invalidar('producto')
+
+@receiver([post_save, post_delete], sender=Categoria)
+def invalidar_cache_categoria(sender, instance, **kwargs):
+    transaction.on_commit(partial(_invalidar_categoria, instance.pk))
+
+@receiver([post_save, post_delete], sender='marketing_app.ProductoPromocion')
+def invalidar_cache_producto_promocion(sender, instance, **kwargs):
+    transaction.on_commit(partial(cache_catalogo.invalidar, 'producto', instance.producto_id))
+
+
+def _invalidar_productos(productos_ids):
+    for pk in productos_ids:
+        cache_catalogo.invalidar('producto', pk)
+    cache_catalogo.invalidar('producto')
+
+
+def sincronizar_productos_masivo(creados_ids, actualizados_ids, categorias_creadas=False):
+    """
+    Equivalente de las señales anteriores para cambios hechos con
+    bulk_create/bulk_update, que no emiten post_save.
+    """
+    productos_ids = [*creados_ids, *actualizados_ids]
+    if productos_ids:
+        obtener_backend().indexar(productos_ids)
+        # Los productos recién creados no pueden tener un detalle en caché
+        transaction.on_commit(partial(_invalidar_productos, list(actualizados_ids)))
+        incrementar_version(Producto)
+        productos_modificados_masivo.send(sender=Producto, productos_ids=productos_ids)
+    if categorias_creadas:
+        transaction.on_commit(partial(cache_catalogo.invalidar, 'categoria'))
+        incrementar_version(Categoria)
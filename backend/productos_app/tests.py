@@ -1,3 +1,300 @@
-from django.test import TestCase
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from comun_app.versiones import incrementar_version
+from inventario_app.models import Inventario
+from productos_app import cache_catalogo
+from productos_app.autocompletar import CONTADOR as CONTADOR_AUTOCOMPLETAR, indice as indice_autocompletar
+from productos_app.busqueda import obtener_backend
+from productos_app.models import Categoria, Producto
+from sucursales_app.models import Bodega, Sucursal
+from usuarios_app.models import Usuario
+
+
+class BusquedaProductosTests(TestCase):
+    def setUp(self):
+        self.herramientas = Categoria.objects.create(nombre_categoria='Herramientas')
+        self.martillo = Producto.objects.create(
+            nombre_producto='Martillo de carpintero', descripcion='Mango de fibra de vidrio',
+            precio='12990.00', marca='Stanley', codigo_producto='HER-001', categoria=self.herramientas,
+        )
+        self.taladro = Producto.objects.create(
+            nombre_producto='Taladro percutor', descripcion='Incluye martillo neumático',
+            precio='59990.00', marca='Bosch', codigo_producto='HER-002', categoria=self.herramientas,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(Usuario.objects.create_user('vendedor', 'clave-segura'))
+
+    def buscar(self, texto):
+        return [p.pk for p in obtener_backend().buscar(texto)[0:20]]
+
+    def test_resultados_ordenados_por_relevancia(self):
+        # El nombre pesa más que la descripción
+        self.assertEqual(self.buscar('martillo'), [self.martillo.pk, self.taladro.pk])
+
+    def test_prefijos_y_acentos(self):
+        self.assertEqual(self.buscar('neumatico'), [self.taladro.pk])
+        self.assertEqual(self.buscar('stan'), [self.martillo.pk])
+
+    def test_sintaxis_del_usuario_no_rompe_la_consulta(self):
+        self.assertEqual(self.buscar('martillo* ("'), [self.martillo.pk, self.taladro.pk])
+        self.assertEqual(self.buscar('   '), [])
+
+    def test_indice_sincronizado_con_cambios(self):
+        self.taladro.nombre_producto = 'Rotomartillo'
+        self.taladro.descripcion = ''
+        self.taladro.save()
+        self.assertEqual(self.buscar('taladro'), [])
+        self.herramientas.nombre_categoria = 'Ferretería'
+        self.herramientas.save()
+        self.assertEqual(len(self.buscar('ferreteria')), 2)
+        self.martillo.delete()
+        self.assertEqual(self.buscar('ferreteria'), [self.taladro.pk])
+
+    def test_endpoint_paginado(self):
+        response = self.client.get('/api/productos/productos/buscar/', {'q': 'martillo', 'page_size': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['results'][0]['id'], self.martillo.pk)
+        self.assertIn('relevancia', response.data['results'][0])
+        self.assertIsNotNone(response.data['next'])
+
+
+class CacheCatalogoTests(TestCase):
+    def setUp(self):
+        cache_catalogo.obtener_cache().clear()
+        self.categoria = Categoria.objects.create(nombre_categoria='Pinturas')
+        self.producto = Producto.objects.create(
+            nombre_producto='Látex blanco', precio='8990.00', codigo_producto='PIN-001', categoria=self.categoria,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(Usuario.objects.create_superuser('admin', 'clave-segura'))
+
+    def test_segunda_lectura_no_consulta_la_base(self):
+        url = f'/api/productos/productos/{self.producto.pk}/'
+        self.assertEqual(self.client.get(url).status_code, 200)
+        # Solo se consulta la versión de las tablas para calcular el ETag
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.data['nombre_producto'], 'Látex blanco')
+        self.assertEqual(cache_catalogo.estadisticas()['aciertos'], 1)
+
+    def test_guardar_invalida_listado_y_detalle(self):
+        lista = '/api/productos/productos/'
+        detalle = f'/api/productos/productos/{self.producto.pk}/'
+        self.client.get(lista)
+        self.client.get(detalle)
+        self.producto.precio = '7990.00'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.producto.save()
+            # Hasta confirmar la transacción se sigue sirviendo la versión en caché
+            self.assertEqual(self.client.get(detalle).data['precio'], '8990.00')
+        self.assertEqual(self.client.get(lista).data['results'][0]['precio'], '7990.00')
+        self.assertEqual(self.client.get(detalle).data['precio'], '7990.00')
+
+    def test_invalidacion_precisa_por_objeto(self):
+        otro = Producto.objects.create(nombre_producto='Esmalte', precio='5990.00', codigo_producto='PIN-002')
+        url = f'/api/productos/productos/{self.producto.pk}/'
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            otro.save()
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+    def test_estadisticas(self):
+        self.client.get('/api/productos/categorias/')
+        self.client.get('/api/productos/categorias/')
+        response = self.client.get('/api/productos/cache/estadisticas/')
+        self.assertEqual(response.data, {'aciertos': 1, 'fallos': 1, 'tasa_aciertos': 0.5})
+
+
+class ImportProductosTests(TestCase):
+    def importar(self, contenido, sufijo='.csv', *args):
+        with tempfile.NamedTemporaryFile('w', suffix=sufijo, delete=False, encoding='utf-8') as archivo:
+            archivo.write(contenido)
+        self.addCleanup(os.remove, archivo.name)
+        salida, errores = StringIO(), StringIO()
+        call_command('import_productos', archivo.name, '--lote', '2', *args, stdout=salida, stderr=errores)
+        return salida.getvalue(), errores.getvalue()
+
+    def test_upsert_por_codigo_csv(self):
+        Categoria.objects.create(nombre_categoria='Jardín')
+        Producto.objects.create(nombre_producto='Pala', precio='1000.00', codigo_producto='J-1')
+        salida, errores = self.importar(
+            'codigo_producto,nombre_producto,precio,marca,categoria\n'
+            'J-1,Pala punta huevo,4990,Truper,Jardín\n'
+            'J-2,Rastrillo,3990,,Jardín\n'
+            'J-3,Manguera,abc,,\n'
+            'J-4,Tijera de podar,5990,,Exterior\n'
+        )
+        self.assertIn('1 creados, 1 actualizados', salida)
+        self.assertIn('Línea 4', errores)
+        self.assertIn('Línea 5', errores)
+        pala = Producto.objects.get(codigo_producto='J-1')
+        self.assertEqual((pala.nombre_producto, str(pala.precio), pala.categoria.nombre_categoria),
+                         ('Pala punta huevo', '4990.00', 'Jardín'))
+        self.assertEqual([p.codigo_producto for p in obtener_backend().buscar('rastrillo')[0:5]], ['J-2'])
+
+    def test_ndjson_crea_categorias_y_omite_filas_sin_cambios(self):
+        contenido = (
+            '{"codigo_producto": "E-1", "nombre_producto": "Ampolleta LED", "precio": 1990, "categoria": "Electricidad"}\n'
+            '{"codigo_producto": "E-2", "nombre_producto": "Enchufe", "precio": "2490.5"}\n'
+        )
+        self.importar(contenido, '.ndjson', '--crear-categorias')
+        salida, _ = self.importar(contenido, '.ndjson', '--crear-categorias')
+        self.assertIn('0 creados, 0 actualizados, 2 sin cambios', salida)
+        self.assertEqual(Producto.objects.get(codigo_producto='E-1').categoria.nombre_categoria, 'Electricidad')
+
+    def test_filas_que_no_son_objetos_o_precios_no_finitos(self):
+        salida, errores = self.importar(
+            '[1]\n5\n"x"\n'
+            '{"codigo_producto": "N-1", "nombre_producto": "Serrucho", "precio": "NaN"}\n'
+            '{"codigo_producto": "N-2", "nombre_producto": "Lija", "precio": "Infinity"}\n'
+            '{"codigo_producto": "N-3", "nombre_producto": "Cincel", "precio": 2990}\n',
+            '.ndjson',
+        )
+        self.assertIn('1 creados', salida)
+        for linea in range(1, 6):
+            self.assertIn(f'Línea {linea}', errores)
+        self.assertEqual(list(Producto.objects.values_list('codigo_producto', flat=True)), ['N-3'])
+
+    def test_valores_que_no_caben_en_las_columnas(self):
+        salida, errores = self.importar(
+            'codigo_producto,nombre_producto,precio\n'
+            f'{"L" * 51},Taladro,4990\n'
+            f'L-2,{"Taladro " * 13},4990\n'
+            'L-3,Betonera,100000000\n'
+            'L-4,Grúa,99999999.99\n'
+        )
+        self.assertIn('1 creados', salida)
+        for linea in range(2, 5):
+            self.assertIn(f'Línea {linea}', errores)
+        self.assertEqual(list(Producto.objects.values_list('codigo_producto', flat=True)), ['L-4'])
+
+
+class FacetasProductosTests(TestCase):
+    def setUp(self):
+        cache_catalogo.obtener_cache().clear()
+        self.electricidad = Categoria.objects.create(nombre_categoria='Electricidad')
+        self.gasfiteria = Categoria.objects.create(nombre_categoria='Gasfitería')
+        datos = [
+            ('Cable 2.5mm', '15000.00', 10, 'Madeco', self.electricidad),
+            ('Interruptor', '2500.00', 0, 'Bticino', self.electricidad),
+            ('Enchufe doble', '3200.00', 4, 'Bticino', self.electricidad),
+            ('Llave de paso', '8900.00', 2, 'Stretto', self.gasfiteria),
+        ]
+        for i, (nombre, precio, stock, marca, categoria) in enumerate(datos):
+            Producto.objects.create(nombre_producto=nombre, precio=precio, stock=stock, marca=marca,
+                                    codigo_producto=f'F-{i}', categoria=categoria)
+        self.client = APIClient()
+        self.client.force_authenticate(Usuario.objects.create_user('cliente', 'clave-segura'))
+
+    def test_filtros_combinados(self):
+        response = self.client.get('/api/productos/productos/', {
+            'categoria': self.electricidad.pk, 'precio_max': '5000', 'en_stock': 'true',
+        })
+        self.assertEqual([p['nombre_producto'] for p in response.data['results']], ['Enchufe doble'])
+
+    def test_facetas_excluyen_su_propio_filtro(self):
+        response = self.client.get('/api/productos/productos/', {'categoria': self.electricidad.pk, 'marca': 'Bticino'})
+        facetas = response.data['facetas']
+        # Las categorías se cuentan solo con el filtro de marca; las marcas, solo con el de categoría
+        self.assertEqual(facetas['categorias'], [{'id': self.electricidad.pk, 'nombre': 'Electricidad', 'cantidad': 2}])
+        self.assertEqual(facetas['marcas'], [
+            {'marca': 'Bticino', 'cantidad': 2}, {'marca': 'Madeco', 'cantidad': 1},
+        ])
+        self.assertEqual(facetas['en_stock'], {'con_stock': 1, 'sin_stock': 1})
+        self.assertEqual(str(facetas['precio']['minimo']), '2500.00')
+
+    def test_facetas_con_consultas_fijas(self):
+        # Página + una consulta por dimensión de faceta, sin importar cuántos valores haya
+        with self.assertNumQueries(6):
+            self.client.get('/api/productos/productos/', {'marca': 'Bticino,Madeco,Stretto'})
+
+    def test_filtro_invalido(self):
+        response = self.client.get('/api/productos/productos/', {'precio_min': 'barato'})
+        self.assertEqual(response.status_code, 400)
+
+
+class AutocompletarTests(TestCase):
+    def setUp(self):
+        self.martillo = Producto.objects.create(nombre_producto='Martillo carpintero', precio='1.00', codigo_producto='MAR-16')
+        self.set = Producto.objects.create(nombre_producto='Set de martillos', precio='1.00', codigo_producto='SET-3')
+        self.destornillador = Producto.objects.create(nombre_producto='Destornillador cruz', precio='1.00', codigo_producto='DES-1')
+        indice_autocompletar.construir()
+
+        self.client = APIClient()
+        self.client.force_authenticate(Usuario.objects.create_user('comprador', 'clave-segura'))
+
+    def test_sugerencias_sin_consultas(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/productos/autocompletar/', {'q': 'MARTÍ'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({s['id'] for s in response.data}, {self.martillo.pk, self.set.pk})
+
+    def test_requiere_autenticacion_y_limite_positivo(self):
+        self.assertIn(APIClient().get('/api/productos/autocompletar/', {'q': 'mar'}).status_code, (401, 403))
+        for limite in ('-1', '0', 'diez'):
+            response = self.client.get('/api/productos/autocompletar/', {'q': 'mar', 'limite': limite})
+            self.assertEqual(response.status_code, 400)
+
+    @override_settings(AUTOCOMPLETAR_VERIFICAR_SEGUNDOS=0)
+    def test_detecta_cambios_de_otros_procesos(self):
+        # Cambio hecho "en otro proceso": sin señales locales, solo sube el contador del índice
+        Producto.objects.filter(pk=self.martillo.pk).update(nombre_producto='Mazo de goma')
+        incrementar_version(CONTADOR_AUTOCOMPLETAR)
+        with mock.patch.object(indice_autocompletar, '_reconstruir_en_segundo_plano',
+                               indice_autocompletar.construir):
+            indice_autocompletar.sugerir('mazo')
+        self.assertEqual([s['id'] for s in indice_autocompletar.sugerir('mazo')], [self.martillo.pk])
+
+    def test_cambios_durante_la_reconstruccion_no_se_pierden(self):
+        lectura = Producto.objects.values_list
+
+        def leer_y_cambiar(*campos):
+            filas = list(lectura(*campos))
+            # Llega un cambio incremental mientras se construye con la lectura anterior
+            indice_autocompletar.actualizar(self.set.pk, 'Juego de llaves', 'SET-3')
+            return mock.Mock(iterator=lambda chunk_size: iter(filas))
+
+        with mock.patch.object(Producto.objects, 'values_list', leer_y_cambiar):
+            indice_autocompletar.construir()
+        self.assertEqual([s['id'] for s in indice_autocompletar.sugerir('llaves')], [self.set.pk])
+        self.assertEqual([s['id'] for s in indice_autocompletar.sugerir('set de')], [])
+
+    def test_prefijo_de_codigo_y_limite(self):
+        self.assertEqual([s['id'] for s in indice_autocompletar.sugerir('des-')], [self.destornillador.pk])
+        self.assertEqual(len(indice_autocompletar.sugerir('m', limite=1)), 1)
+
+    def test_actualizacion_incremental_al_confirmar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.destornillador.nombre_producto = 'Atornillador inalámbrico'
+            self.destornillador.save()
+        self.assertEqual(indice_autocompletar.sugerir('destor'), [])
+        self.assertEqual([s['id'] for s in indice_autocompletar.sugerir('inalam')], [self.destornillador.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.set.delete()
+        self.assertEqual([s['id'] for s in indice_autocompletar.sugerir('martillo')], [self.martillo.pk])
+
+    @override_settings(AUTOCOMPLETAR_VERIFICAR_SEGUNDOS=0)
+    def test_cambios_locales_y_de_stock_no_reconstruyen(self):
+        sucursal = Sucursal.objects.create(nombre_sucursal='Centro', direccion='Alameda 1')
+        bodega = Bodega.objects.create(nombre_bodega='Principal', sucursal=sucursal)
+        with mock.patch.object(indice_autocompletar, '_reconstruir_en_segundo_plano') as reconstruir:
+            with self.captureOnCommitCallbacks(execute=True):
+                Inventario.objects.create(producto=self.martillo, bodega=bodega, cantidad=5)
+                self.martillo.precio = '2.00'
+                self.martillo.save()
+            indice_autocompletar.sugerir('mar')
+            # El propio proceso aplica su cambio y adopta la versión nueva
+            with self.captureOnCommitCallbacks(execute=True):
+                self.martillo.nombre_producto = 'Mazo de goma'
+                self.martillo.save()
+            self.assertEqual([s['id'] for s in indice_autocompletar.sugerir('mazo')], [self.martillo.pk])
+        reconstruir.assert_not_called()
@@ -1,4 +1,5 @@
 from rest_framework import viewsets, permissions
+from comun_app.api.serializacion import ListadoRapidoMixin
 from usuarios_app.models import Rol, Usuario, TipoPersonal, Personal, Cliente, BitacoraActividad
 from .serializers import (
     RolSerializer, UsuarioSerializer, TipoPersonalSerializer, 
@@ -42,7 +43,7 @@ class ClienteViewSet(viewsets.ModelViewSet):
 # ---------------------------
 # BITÁCORA DE ACTIVIDAD
 # ---------------------------
-class BitacoraActividadViewSet(viewsets.ModelViewSet):
+class BitacoraActividadViewSet(ListadoRapidoMixin, viewsets.ModelViewSet):
     queryset = BitacoraActividad.objects.all()
     serializer_class = BitacoraActividadSerializer
     permission_classes = [permissions.IsAdminUser]
\ No newline at end of file
@@ -1,3 +1,31 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from usuarios_app.models import BitacoraActividad, Usuario
+
+
+class PaginacionCursorTests(TestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser('admin', 'clave-segura')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        BitacoraActividad.objects.bulk_create(
+            BitacoraActividad(usuario=self.admin, accion=f'Acción {i}') for i in range(7)
+        )
+
+    def test_recorre_todas_las_paginas_sin_repetir(self):
+        vistos = []
+        url = '/api/usuarios/bitacora/?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 3)
+            vistos.extend(fila['id'] for fila in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(sorted(vistos), sorted(BitacoraActividad.objects.values_list('id', flat=True)))
+        self.assertEqual(len(vistos), len(set(vistos)))
+
+    def test_modelo_sin_ordering_usa_la_clave_primaria(self):
+        response = self.client.get('/api/usuarios/usuarios/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([u['id'] for u in response.data['results']], [self.admin.pk])